@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+"""
+Benchmark the CMakeScript packages over a corpus of CMake files.
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import sys
+import os
+import time
+import json
+import shutil
+import tempfile
+import resource
+import subprocess
+from optparse import OptionParser, SUPPRESS_HELP
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakescript
+
+## The corpus benchmarked when no paths are given
+defaultcorpus = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+							"cmakescript", "testdata", "WildModules")
+
+## Ways of reading input that can be compared: name -> parse_file keywords
+inputmodes = {	"string"	: {},
+				"mapped"	: {"mapped" : True}	}
+
+## Default slowdown, in percent, that --baseline counts as a regression
+defaultthreshold = 10.0
+
+def nested_source(depth):
+	"""Return CMake source with if() blocks nested depth deep, such as
+	generated build scripts can contain"""
+	return ("if(A)\n" * depth + "message(STATUS \"innermost\")\n" +
+			"else()\nset(B C)\nendif()\n" * depth)
+
+def phase_names():
+	"""Return the names of the phases timed, in the order they run"""
+	return (["parse", "wrap"] +
+			["visit:" + x.__class__.__name__ for x in cmakescript.cmakemodifier.cleanup_visitors()] +
+			["format"])
+
+## What must be the same for timings to be comparable with a baseline's
+comparedsettings = ("corpus", "mode", "nesting")
+
+def corpus_hash(inputfiles):
+	"""Return a hash of the contents of inputfiles, whatever their order
+	or where they are."""
+	hashes = []
+	for infile in inputfiles:
+		infilefile = open(infile, 'rb')
+		hashes.append(cmakescript.cmakemanifest.hash_contents(infilefile.read()))
+		infilefile.close()
+	return cmakescript.cmakemanifest.hash_contents("\n".join(sorted(hashes)))
+
+def baseline_differences(results, baseline):
+	"""Return a list of messages about the settings that differ between
+	results and baseline, making their timings incomparable."""
+	differences = []
+	for name in comparedsettings:
+		if results.get(name) != baseline.get(name):
+			differences.append("%s: %s, but %s in the baseline" % (
+				name, results.get(name), baseline.get(name)))
+	return differences
+
+def compare_to_baseline(results, baseline, threshold):
+	"""Return a list of messages about the phases in results whose
+	throughput is more than threshold percent below baseline's."""
+	regressions = []
+	for name in phase_names():
+		if name not in results["phases"] or name not in baseline.get("phases", {}):
+			continue
+		old = baseline["phases"][name]["bytes_per_s"]
+		new = results["phases"][name]["bytes_per_s"]
+		if new < old * (1.0 - threshold / 100.0):
+			regressions.append("%s: %.1f KiB/s, down %.1f%% from %.1f KiB/s" % (
+				name, new / 1024.0, 100.0 * (old - new) / old, old / 1024.0))
+	return regressions
+
+class App:
+	def __init__(self, args_in=sys.argv[1:]):
+		self.args_in = args_in
+
+	def main(self):
+		parser = OptionParser(usage="usage: %prog [options] [[file|dir]...]",
+							  version="%prog 0.5, part of the cmakescript tools")
+
+		parser.add_option("--mode",
+							type="choice",
+							choices=inputmodes.keys(),
+							metavar="MODE",
+							dest="mode",
+							default="string",
+							help="read input files using MODE when parsing.  "
+								 "Modes are: " + " ".join(inputmodes.keys()) +
+								 " (default string)"
+							)
+
+		parser.add_option("--compare-modes",
+							action="store_true",
+							dest="comparemodes",
+							default=False,
+							help="only time parsing, once for every input "
+								 "mode, each in its own process so peak "
+								 "memory use can be compared"
+							)
+
+		# Used by --compare-modes for the process running each mode
+		parser.add_option("--parse-only",
+							action="store_true",
+							dest="parseonly",
+							default=False,
+							help=SUPPRESS_HELP
+							)
+
+		parser.add_option("--nesting",
+							type="int",
+							metavar="DEPTH",
+							dest="nesting",
+							default=None,
+							help="instead of a corpus, benchmark a generated "
+								 "file of if() blocks nested DEPTH deep"
+							)
+
+		parser.add_option("-n", "--repeat",
+							type="int",
+							dest="repeat",
+							default=3,
+							help="run over the corpus N times and keep the "
+								 "fastest time for each phase (default 3)"
+							)
+
+		parser.add_option("--json",
+							metavar="FILE",
+							dest="json",
+							default=None,
+							help="save the results to FILE as JSON, such as "
+								 "to use as a later --baseline"
+							)
+
+		parser.add_option("--baseline",
+							metavar="FILE",
+							dest="baseline",
+							default=None,
+							help="compare with results saved by --json, and "
+								 "exit with an error if any phase got slower "
+								 "than the threshold"
+							)
+
+		parser.add_option("--threshold",
+							type="float",
+							metavar="PERCENT",
+							dest="threshold",
+							default=defaultthreshold,
+							help="the throughput drop, in percent, that counts "
+								 "as a regression (default %g)" % defaultthreshold
+							)
+
+		(self.options, args) = parser.parse_args(self.args_in)
+
+		if self.options.comparemodes:
+			# Run each mode in a fresh interpreter so the peak RSS we report
+			# belongs to that mode alone.
+			if self.options.nesting is not None:
+				args = ["--nesting", str(self.options.nesting)] + args
+			for mode in sorted(inputmodes.keys()):
+				subprocess.call([sys.executable, os.path.abspath(__file__),
+								"--mode", mode, "--parse-only",
+								"--repeat", str(self.options.repeat)] + args)
+			return 0
+
+		if self.options.nesting is not None:
+			tempdir = tempfile.mkdtemp()
+			try:
+				nestedfn = os.path.join(tempdir, "CMakeLists.txt")
+				nestedfile = open(nestedfn, 'w')
+				nestedfile.write(nested_source(self.options.nesting))
+				nestedfile.close()
+				return self.run([nestedfn])
+			finally:
+				shutil.rmtree(tempdir)
+
+		if len(args) == 0:
+			args.append(defaultcorpus)
+
+		return self.run(cmakescript.find_cmake_scripts(args))
+
+	def run(self, inputfiles):
+		keywords = inputmodes[self.options.mode]
+
+		if self.options.parseonly:
+			self.reportParseOnly(inputfiles, keywords)
+			return 0
+
+		results = self.runPhases(inputfiles, keywords)
+		results["nesting"] = self.options.nesting
+		results["corpus"] = corpus_hash(inputfiles)
+		self.report(results)
+
+		if self.options.json is not None:
+			jsonfile = open(self.options.json, 'w')
+			json.dump(results, jsonfile, indent=1, sort_keys=True)
+			jsonfile.close()
+
+		if self.options.baseline is not None:
+			baselinefile = open(self.options.baseline, 'r')
+			baseline = json.load(baselinefile)
+			baselinefile.close()
+			differences = baseline_differences(results, baseline)
+			if len(differences) > 0:
+				for message in differences:
+					print "NOT COMPARABLE " + message
+				print "Record a new baseline with the same input and options"
+				return 2
+			regressions = compare_to_baseline(results, baseline,
+											self.options.threshold)
+			for message in regressions:
+				print "REGRESSION " + message
+			if len(regressions) > 0:
+				return 1
+			print "No phase more than %g%% slower than the baseline" % self.options.threshold
+		return 0
+
+	def runPhases(self, inputfiles, keywords):
+		"""Time every phase over the corpus, keeping each phase's best
+		run, and return the results as a dict ready to save as JSON."""
+		names = phase_names()
+		best = dict([(x, None) for x in names])
+		for run in range(self.options.repeat):
+			times = dict([(x, 0.0) for x in names])
+			parsed = []
+			for infile in inputfiles:
+				start = time.time()
+				try:
+					tree = cmakescript.parse_file(infile, **keywords).parsetree
+				except (cmakescript.IncompleteStatementError,
+						cmakescript.UnclosedChildBlockError):
+					continue
+				now = time.time()
+				times["parse"] += now - start
+				parsed.append(infile)
+
+				start = now
+				block = cmakescript.CMakeBlock(tree)
+				now = time.time()
+				times["wrap"] += now - start
+
+				for visitor in cmakescript.cmakemodifier.cleanup_visitors():
+					start = now
+					block.accept(visitor)
+					now = time.time()
+					times["visit:" + visitor.__class__.__name__] += now - start
+
+				start = now
+				cmakescript.NiceFormatter(block).output_as_cmake()
+				times["format"] += time.time() - start
+
+			for name in names:
+				if best[name] is None or times[name] < best[name]:
+					best[name] = times[name]
+
+		totalbytes = 0
+		totallines = 0
+		for infile in parsed:
+			infilefile = open(infile, 'rb')
+			data = infilefile.read()
+			infilefile.close()
+			totalbytes = totalbytes + len(data)
+			totallines = totallines + data.count("\n")
+
+		phases = {}
+		for name in names:
+			seconds = max(best[name], 1e-9)
+			phases[name] = {	"seconds"		: best[name],
+								"lines_per_s"	: totallines / seconds,
+								"bytes_per_s"	: totalbytes / seconds	}
+		return {	"python"	: "%d.%d.%d" % sys.version_info[:3],
+					"mode"		: self.options.mode,
+					"repeat"	: self.options.repeat,
+					"files"		: len(parsed),
+					"unparsable": len(inputfiles) - len(parsed),
+					"lines"		: totallines,
+					"bytes"		: totalbytes,
+					"phases"	: phases	}
+
+	def report(self, results):
+		print "%d files, %d lines, %.1f KiB (%d unparsable), best of %d" % (
+			results["files"], results["lines"], results["bytes"] / 1024.0,
+			results["unparsable"], results["repeat"])
+		for name in phase_names():
+			phase = results["phases"][name]
+			print "%-40s %8.3f s  %10.0f lines/s  %8.1f KiB/s" % (name,
+				phase["seconds"], phase["lines_per_s"],
+				phase["bytes_per_s"] / 1024.0)
+
+	def reportParseOnly(self, inputfiles, keywords):
+		totalbytes = sum([os.path.getsize(x) for x in inputfiles])
+
+		best = None
+		for run in range(self.options.repeat):
+			elapsed, failures = self.parseAll(inputfiles, keywords)
+			if best is None or elapsed < best:
+				best = elapsed
+
+		peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		print ("%-8s %5d files  %8.1f KiB  %7.3f s  %8.1f KiB/s  "
+				"peak RSS %d KiB  (%d unparsable)" % (
+				self.options.mode, len(inputfiles), totalbytes / 1024.0,
+				best, totalbytes / 1024.0 / best, peak, failures))
+
+	def parseAll(self, inputfiles, keywords):
+		failures = 0
+		start = time.time()
+		for infile in inputfiles:
+			try:
+				cmakescript.parse_file(infile, **keywords)
+			except (cmakescript.IncompleteStatementError,
+					cmakescript.UnclosedChildBlockError):
+				failures = failures + 1
+		return (time.time() - start, failures)
+
+###
+# __main__
+
+if __name__ == "__main__":
+## Can be used as a tool when executed directly
+	app = App()
+	sys.exit(app.main())
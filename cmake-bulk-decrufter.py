@@ -17,7 +17,10 @@ Iowa State University HCI Graduate Program/VRAC
 # standard packages
 import sys
 import os
-import subprocess
+import tempfile
+import multiprocessing
+from itertools import izip
+from cStringIO import StringIO
 from optparse import OptionParser
 
 ###
@@ -29,11 +32,78 @@ from optparse import OptionParser
 import cmakescript
 from mergetool import MergeTool
 
+## Default file for --changed-only to keep what it saw in
+defaultmanifest = ".cmake-decrufter-manifest"
+
+def tool_version(mode=""):
+	"""Return a string that changes whenever this tool, or the parts of
+	cmakescript it uses, would produce different output, or the output
+	goes somewhere else, as given by mode."""
+	return cmakescript.source_version([	cmakescript.cmakegrammar,
+										cmakescript.cmaketokenizer,
+										cmakescript.cmakeparser,
+										cmakescript.cmakemodifier,
+										cmakescript.cmakeformatter,
+										os.path.abspath(__file__)	],
+									"mode " + mode)
+
+def decruft_file(filename, cache=None):
+	"""Parse, clean up and format one file.
+
+	Returns (output, error): the cleaned-up script, ending in a newline,
+	or None and the name of the error that kept the file from being
+	parsed.
+	"""
+	try:
+		parser = cmakescript.parse_file(filename, cache=cache)
+	except cmakescript.IncompleteStatementError:
+		cmakescript.cmakestats.count("parse errors")
+		return (None, "IncompleteStatementError")
+	except cmakescript.UnclosedChildBlockError:
+		cmakescript.cmakestats.count("parse errors")
+		return (None, "UnclosedChildBlockError")
+
+	#formatter = cmakescript.CMakeFormatter(parser.parsetree)
+	cleaned = cmakescript.cleanup_block(parser.parsetree)
+	formatter = cmakescript.NiceFormatter(cleaned)
+	output = StringIO()
+	formatter.write_to(output)
+	return (output.getvalue(), None)
+
+def decruft_file_stats(filename, cache=None, collect=False):
+	"""Like decruft_file, but returns (output, error, stats), where stats
+	is what cmakestats collected while doing it, as a dict, if collect
+	is true, and None otherwise."""
+	if not collect:
+		return decruft_file(filename, cache) + (None,)
+	with cmakescript.cmakestats.collecting() as stats:
+		result = decruft_file(filename, cache)
+	return result + (stats.as_dict(),)
+
+## The parse cache of a worker process, if any
+_workercache = None
+
+## Whether a worker process should collect stats
+_workerstats = False
+
+def _init_worker(cachedir, collect):
+	global _workercache, _workerstats
+	if cachedir is not None:
+		_workercache = cmakescript.ParseCache(cachedir)
+	_workerstats = collect
+
+def _decruft_worker(filename):
+	return decruft_file_stats(filename, _workercache, _workerstats)
 
 class App:
 	def __init__(self, args_in=sys.argv[1:]):
 		self.args_in = args_in
 		self.mergetool = None
+		self.cache = None
+		self.manifest = None
+		self.stats = None
+		self.writer = None
+		self.status = sys.stdout
 
 	def main(self):
 		parser = OptionParser(usage="usage: %prog [options] [[file|dir]...]",
@@ -50,49 +120,219 @@ class App:
 								 " ".join(MergeTool.mergetools.keys())
 							)
 
+		parser.add_option("--patch",
+							metavar="FILE",
+							dest="patch",
+							default=None,
+							help="instead of printing or merging each file, "
+								 "write the changes to every file as one "
+								 "unified diff to FILE ('-' for stdout), "
+								 "ready for 'git apply'.  Paths are relative "
+								 "to the current directory.")
+
+		parser.add_option("--patch-dir",
+							metavar="DIR",
+							dest="patchdir",
+							default=None,
+							help="like --patch, but write a separate "
+								 "numbered patch for each changed file "
+								 "into DIR")
+
+		parser.add_option("-i", "--in-place",
+							action="store_true",
+							dest="inplace",
+							default=False,
+							help="instead of printing or merging each file, "
+								 "replace it with the cleaned version, if "
+								 "that differs.  Each file is written to a "
+								 "temporary file first and renamed over the "
+								 "original once safely on disk.")
+
 		parser.add_option("-q", "--quiet",
 						action="store_false", dest="verbose", default=True,
 						help="don't print status messages to stdout")
 
+		parser.add_option("--cache-dir",
+						metavar="DIR",
+						dest="cachedir",
+						default=None,
+						help="keep parsed files in DIR and reuse them "
+							 "on later runs for files that haven't changed")
+
+		parser.add_option("-j", "--jobs",
+						type="int",
+						metavar="N",
+						dest="jobs",
+						default=1,
+						help="parse, clean and format up to N files at once, "
+							 "each in its own process.  Output and merge "
+							 "tools still come one file at a time, in order.")
+
+		parser.add_option("-x", "--exclude",
+						action="append",
+						metavar="GLOB",
+						dest="excludes",
+						default=[],
+						help="skip files and directories matching GLOB "
+							 "when searching directories, such as 'build*/' "
+							 "or '_deps/'.  May be given more than once.")
+
+		parser.add_option("--changed-only",
+						action="store_true",
+						dest="changedonly",
+						default=False,
+						help="skip files that haven't changed since the "
+							 "last run with the same manifest and the same "
+							 "version of this tool")
+
+		parser.add_option("--manifest",
+						metavar="FILE",
+						dest="manifest",
+						default=None,
+						help="record the files processed in FILE, for "
+							 "--changed-only (default " + defaultmanifest +
+							 " in the current directory, if --changed-only "
+							 "is given)")
+
+		parser.add_option("--stats",
+						metavar="FILE",
+						dest="stats",
+						default=None,
+						help="time each phase of the work and count what "
+							 "was parsed, in total and for each file, and "
+							 "save it to FILE as JSON")
+
 		(self.options, args) = parser.parse_args(self.args_in)
 
+		outputmodes = [self.options.mergetool, self.options.patch,
+						self.options.patchdir, self.options.inplace or None]
+		if len([x for x in outputmodes if x is not None]) > 1:
+			parser.error("only one of --merge, --patch, --patch-dir and "
+						 "--in-place may be given")
+
+		if self.options.stats is not None:
+			self.stats = cmakescript.cmakestats.enable()
+
+		if self.options.cachedir is not None:
+			self.cache = cmakescript.ParseCache(self.options.cachedir)
+
 		if len(args) == 0:
 			args.append(os.getcwd())
 
-		inputfiles = []
+		inputfiles = cmakescript.find_cmake_scripts(args,
+													self.options.excludes)
 
-		for arg in args:
-			inputfiles.extend(cmakescript.find_cmake_scripts(arg))
+		if self.options.changedonly and self.options.manifest is None:
+			self.options.manifest = os.path.join(os.getcwd(), defaultmanifest)
+		if self.options.manifest is not None:
+			# A file done in one mode still needs doing in another: printing
+			# it doesn't rewrite it in place.
+			self.manifest = cmakescript.Manifest(self.options.manifest,
+												tool_version(self.outputMode()))
 
-		for infile, number in zip(inputfiles, range(1, len(inputfiles)+1)):
-			print "------------------------"
-			print infile + " - " + str(number) + " of " + str(len(inputfiles))
-			print "------------------------"
+		if self.options.changedonly:
+			unchanged = len(inputfiles)
+			inputfiles = [x for x in inputfiles if not self.manifest.unchanged(x)]
+			unchanged = unchanged - len(inputfiles)
+			if self.options.verbose and unchanged > 0:
+				print "Skipping %d unchanged files" % unchanged
 
-			output = self.processFile(infile)
-			if output is not None:
-				# A trailing newline
-				output = output + "\n"
-				self.runMergeTool(infile, output)
-				#if self.mergetool is not None and len(inputfiles) > 1:
+		if self.options.inplace:
+			self.writer = cmakescript.FileRewriter()
+		elif self.options.patch is not None or self.options.patchdir is not None:
+			self.writer = cmakescript.PatchWriter(self.options.patch,
+												self.options.patchdir)
+			if self.options.patch == "-":
+				# Keep the patch on stdout clean
+				self.status = sys.stderr
+
+		pool = None
+		if self.options.jobs > 1 and len(inputfiles) > 1:
+			# Workers hand back results in input order, while the merge
+			# tool keeps running here, one file at a time.
+			pool = multiprocessing.Pool(self.options.jobs, _init_worker,
+										(self.options.cachedir,
+										 self.stats is not None))
+			# Hand out files in chunks, so small ones don't each cost a
+			# round trip to a worker.
+			chunksize = max(1, len(inputfiles) // (self.options.jobs * 4))
+			results = pool.imap(_decruft_worker, inputfiles, chunksize)
+		else:
+			results = (self.processFile(x) for x in inputfiles)
+
+		try:
+			for infile, number, (output, error, filestats) in izip(inputfiles,
+					range(1, len(inputfiles)+1), results):
+				if self.stats is not None:
+					self.stats.begin_file(infile)
+					self.stats.merge(filestats)
+				if self.writer is None:
+					print "------------------------"
+					print infile + " - " + str(number) + " of " + str(len(inputfiles))
+					print "------------------------"
 
-				#	x = raw_input("Press enter to continue to the next file")
+				if error is not None:
+					if self.writer is None:
+						print "Error parsing file: " + error
+					else:
+						print >>self.status, infile + ": error parsing file: " + error
+				rewritten = False
+				if output is not None and self.writer is not None:
+					rewritten = self.writeChanges(infile, output) and self.options.inplace
+				elif output is not None:
+					self.runMergeTool(infile, output)
+					#if self.mergetool is not None and len(inputfiles) > 1:
 
+					#	x = raw_input("Press enter to continue to the next file")
+				if self.manifest is not None:
+					self.manifest.record(infile, output, error, rewritten)
+				if self.stats is not None:
+					self.stats.end_file()
+		except:
+			if pool is not None:
+				pool.terminate()
+			raise
+		finally:
+			# Keep what was done so far, even if interrupted
+			if self.manifest is not None:
+				self.manifest.save()
+			if self.writer is not None:
+				self.writer.close()
+			if self.stats is not None:
+				cmakescript.cmakestats.disable()
+				statsfile = open(self.options.stats, 'w')
+				self.stats.dump(statsfile)
+				statsfile.close()
+
+		if pool is not None:
+			pool.close()
+			pool.join()
+
+		if self.writer is not None and self.options.verbose:
+			print >>self.status, "%d of %d files changed" % (self.writer.changed,
+															self.writer.files)
+
+
+	def outputMode(self):
+		"""Return the name of where output goes, for the manifest"""
+		if self.options.inplace:
+			return "in-place"
+		if self.options.patch is not None or self.options.patchdir is not None:
+			return "patch"
+		if self.options.mergetool is not None:
+			return "merge"
+		return "print"
 
 	def processFile(self, filename):
-		try:
-			parser = cmakescript.parse_file(filename)
-		except cmakescript.IncompleteStatementError:
-			print "Error parsing file: IncompleteStatementError"
-			return None
-		except cmakescript.UnclosedChildBlockError:
-			print "Error parsing file: UnclosedChildBlockError"
-			return None
-
-		#formatter = cmakescript.CMakeFormatter(parser.parsetree)
-		cleaned = cmakescript.apply_all_cleanup_visitors(parser.parsetree)
-		formatter = cmakescript.NiceFormatter(cleaned)
-		return formatter.output_as_cmake()
+		return decruft_file_stats(filename, self.cache, self.stats is not None)
+
+	def writeChanges(self, filename, formatted):
+		"""Patch or rewrite the file, and return True if it changed"""
+		orig = open(filename, 'rb')
+		originalscript = orig.read()
+		orig.close()
+		with cmakescript.cmakestats.timer("write"):
+			return self.writer.add(filename, originalscript, formatted)
 
 	def runMergeTool(self, filename, formatted):
 		if self.mergetool is None and self.options.mergetool is not None:
@@ -108,8 +348,7 @@ class App:
 
 			modname = os.path.splitext(os.path.basename(filename))[0]
 
-			t1 = subprocess.Popen(["mktemp", "-d"], stdout=subprocess.PIPE)
-			tempdir = t1.communicate()[0].strip()
+			tempdir = tempfile.mkdtemp()
 			tempclean = os.path.join(tempdir, modname+".Decrufted.cmake")
 			temporig = os.path.join(tempdir, modname+".Original.cmake")
 
@@ -122,7 +361,8 @@ class App:
 			tempcleanfile.write(formatted)
 			tempcleanfile.close()
 
-			self.mergetool.run(tempclean, filename, temporig)
+			with cmakescript.cmakestats.timer("merge tool"):
+				self.mergetool.run(tempclean, filename, temporig)
 		else:
 			# If we aren't merging, print the formatted output
 			print formatted
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 """
-Main application to use the CMakeScript packages to output cleaner code.
+Main application to use the CMakeScript packages to graph the dependencies
+between CMake scripts and modules.
 
 Original Author:
 2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
@@ -17,12 +18,11 @@ Iowa State University HCI Graduate Program/VRAC
 # standard packages
 import sys
 import os
-import subprocess
 from optparse import OptionParser
 
 ###
 # third-party packages
-import yapgvb	# GraphViz
+# - none
 
 ###
 # internal packages
@@ -34,6 +34,8 @@ class App:
 	def __init__(self, args_in=sys.argv[1:]):
 		self.args_in = args_in
 		self.mergetool = None
+		self.cache = None
+		self.stats = None
 
 	def main(self):
 		parser = OptionParser(usage="usage: %prog [options] [[file|dir]...]",
@@ -54,75 +56,145 @@ class App:
 						action="store_false", dest="verbose", default=True,
 						help="don't print status messages to stdout")
 
+		parser.add_option("--cache-dir",
+						metavar="DIR",
+						dest="cachedir",
+						default=None,
+						help="keep parsed files in DIR and reuse them "
+							 "on later runs for files that haven't changed")
+
+		parser.add_option("-x", "--exclude",
+						action="append",
+						metavar="GLOB",
+						dest="excludes",
+						default=[],
+						help="skip files and directories matching GLOB "
+							 "when searching directories, such as 'build*/' "
+							 "or '_deps/'.  May be given more than once.")
+
+		parser.add_option("--dot",
+						metavar="FILE",
+						dest="dot",
+						default=None,
+						help="write the graph to FILE in GraphViz DOT "
+							 "format ('-' for stdout, the default if "
+							 "--json isn't given either)")
+
+		parser.add_option("--json",
+						metavar="FILE",
+						dest="json",
+						default=None,
+						help="write the graph to FILE as JSON ('-' for "
+							 "stdout)")
+
+		parser.add_option("--modules-dir",
+						metavar="DIR",
+						dest="modulesdir",
+						default=None,
+						help="the modules that come with CMake are those "
+							 "in DIR (default: the Modules directory of "
+							 "the cmake on the PATH, if any)")
+
+		parser.add_option("--catalog",
+						metavar="FILE",
+						dest="catalog",
+						default=None,
+						help="keep the list of modules that come with "
+							 "CMake in FILE, and reuse it while the modules "
+							 "directory is unchanged.  Without --modules-dir, "
+							 "a saved FILE is used as it is, even with no "
+							 "CMake installed.")
+
+		parser.add_option("--no-system-modules",
+						action="store_false",
+						dest="systemmodules",
+						default=True,
+						help="don't tell which modules come with CMake")
+
+		parser.add_option("--stats",
+						metavar="FILE",
+						dest="stats",
+						default=None,
+						help="time each phase of the work and count what "
+							 "was parsed, in total and for each file, and "
+							 "save it to FILE as JSON")
+
 		(self.options, args) = parser.parse_args(self.args_in)
 
+		if self.options.stats is not None:
+			self.stats = cmakescript.cmakestats.enable()
+
+		if self.options.cachedir is not None:
+			self.cache = cmakescript.ParseCache(self.options.cachedir)
+
 		if len(args) == 0:
 			args.append(os.getcwd())
 
-		inputfiles = []
+		inputfiles = cmakescript.find_cmake_scripts(args,
+													self.options.excludes)
 
-		for arg in args:
-			inputfiles.extend(cmakescript.find_cmake_scripts(arg))
+		if self.options.dot is None and self.options.json is None:
+			self.options.dot = "-"
 
-		dependencies["findmodules"] = {}
-		dependencies["othermodules"] = {}
-		dependencies["optionalmodules"] = {}
-		dependencies["files"] = {}
-		dependencies["optionalfiles"] = {}
+		systemmodules = None
+		if self.options.systemmodules:
+			with cmakescript.cmakestats.timer("catalog"):
+				systemmodules = cmakescript.open_catalog(self.options.modulesdir,
+														self.options.catalog)
+		if systemmodules is None:
+			systemmodules = ()
 
-		knownfiles = [os.path.relpath(x) for x in inputfiles]
-		justname = lambda x:os.path.splitext(os.path.basename(x))[0]
-		allmodules["found"] = [justname(x) for x in knownfiles]
-		t1 = subprocess.Popen(["cmake", "--help-modules-list"], stdout=subprocess.PIPE)
-		allmodules["system"] = [x.strip()
-								for x in t1.communicate()[0].splitlines()[1:]]
+		with cmakescript.cmakestats.timer("graph"):
+			graph = cmakescript.DependencyGraph(inputfiles,
+												systemmodules=systemmodules)
 
-		nodes = {}
-		edges = []
-
-		for key, val in allmodules.iteritems():
-			findmodules[key] = [x
-								for x in allmodules[key]
-								if re.match(r"Find", x)]
-			othermodules[key] = [x
-								 for x in allmodules[key]
-								 if re.match(r"Find", x) is None]
+		for infile in inputfiles:
+			if self.stats is not None:
+				self.stats.begin_file(infile)
+			visitor = self.processFile(infile)
+			if visitor is not None:
+				with cmakescript.cmakestats.timer("graph"):
+					graph.add_dependencies(infile, visitor)
+			if self.stats is not None:
+				self.stats.end_file()
 
-		for infile, number in zip(inputfiles, range(1, len(inputfiles)+1)):
-			print "------------------------"
-			print infile + " - " + str(number) + " of " + str(len(inputfiles))
-			print "------------------------"
+		with cmakescript.cmakestats.timer("export"):
+			for filename, write in ((self.options.dot, graph.write_dot),
+									(self.options.json, graph.write_json)):
+				if filename == "-":
+					write(sys.stdout)
+				elif filename is not None:
+					outfile = open(filename, 'w', 1 << 16)
+					write(outfile)
+					outfile.close()
 
-			visitor = self.processFile(infile)
-			shortname = os.path.relpath(infile)
-			pathto = os.path.split(shortname)[0]
-			
+		if self.options.verbose:
+			print >>sys.stderr, "%d scripts, %d nodes, %d edges" % (
+				len(inputfiles), len(graph), graph.edge_count())
 
-			dependencies["findmodules"][shortname] = visitor.findmodules
-			dependencies["othermodules"][shortname] = visitor.modules
-			dependencies["othermodules"][shortname] = visitor.modules
-			dependencies["optionalmodules"][shortname] = visitor.optionalmodules
-			dependencies["files"][shortname] = [os.path.join(pathto, x)
-												for x in visitor.files]
-			dependencies["optionalfiles"][shortname] = [os.path.join(pathto, x)
-														for x in visitor.optionalfiles]
+		if self.stats is not None:
+			cmakescript.cmakestats.disable()
+			statsfile = open(self.options.stats, 'w')
+			self.stats.dump(statsfile)
+			statsfile.close()
 
 
 
 
 	def processFile(self, filename):
 		try:
-			parser = cmakescript.parse_file(filename)
+			parser = cmakescript.parse_file(filename, cache=self.cache)
 		except cmakescript.IncompleteStatementError:
-			print "Error parsing file: IncompleteStatementError"
+			print >>sys.stderr, filename + ": error parsing file: IncompleteStatementError"
 			return None
 		except cmakescript.UnclosedChildBlockError:
-			print "Error parsing file: UnclosedChildBlockError"
+			print >>sys.stderr, filename + ": error parsing file: UnclosedChildBlockError"
 			return None
 
 		visitor = cmakescript.VisitorFindModuleDependencies()
-		tree = cmakescript.CMakeBlock(parser.parsetree)
-		tree.accept(visitor)
+		with cmakescript.cmakestats.timer("visit"):
+			tree = cmakescript.CMakeBlock(parser.parsetree)
+			tree.accept(visitor)
 		return visitor
 
 
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+Main application to use the CMakeScript packages to find the commands, by
+name and arguments, in many CMake scripts at once.
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import sys
+import os
+import re
+import multiprocessing
+from optparse import OptionParser
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakescript
+
+## The query of a worker process
+_workerquery = None
+
+def _init_worker(command, argpatterns, ignorecase):
+	global _workerquery
+	_workerquery = cmakescript.Query(command, argpatterns, ignorecase)
+
+def _search_worker(filename):
+	return cmakescript.search_file(filename, _workerquery)
+
+class App:
+	def __init__(self, args_in=sys.argv[1:]):
+		self.args_in = args_in
+
+	def main(self):
+		parser = OptionParser(usage="usage: %prog [options] COMMAND [[file|dir]...]",
+							  version="%prog 0.5, part of the cmakescript tools",
+							  description="Print each call of a command whose "
+								"name matches the glob COMMAND, such as "
+								"'target_link_libraries' or 'find_*', "
+								"without regard to case.  Comments never "
+								"match, and commands spanning several lines "
+								"match as a whole.")
+
+		parser.add_option("-q", "--quiet",
+						action="store_false", dest="verbose", default=True,
+						help="don't print status messages to stderr")
+
+		parser.add_option("-a", "--arg",
+						action="append",
+						metavar="REGEX",
+						dest="argpatterns",
+						default=[],
+						help="only match commands with an argument "
+							 "containing REGEX.  May be given more than "
+							 "once, to require each.")
+
+		parser.add_option("-i", "--ignore-case",
+						action="store_true",
+						dest="ignorecase",
+						default=False,
+						help="match arguments without regard to case")
+
+		parser.add_option("-l", "--files-with-matches",
+						action="store_true",
+						dest="filesonly",
+						default=False,
+						help="only print the name of each file with a match")
+
+		parser.add_option("-j", "--jobs",
+						type="int",
+						metavar="N",
+						dest="jobs",
+						default=multiprocessing.cpu_count(),
+						help="search up to N files at once, each in its "
+							 "own process (default: %default).  Files are "
+							 "printed as soon as they are searched, so "
+							 "not in order.")
+
+		parser.add_option("-x", "--exclude",
+						action="append",
+						metavar="GLOB",
+						dest="excludes",
+						default=[],
+						help="skip files and directories matching GLOB "
+							 "when searching directories, such as 'build*/' "
+							 "or '_deps/'.  May be given more than once.")
+
+		(self.options, args) = parser.parse_args(self.args_in)
+
+		if len(args) == 0:
+			parser.error("no COMMAND to search for")
+		command = args.pop(0)
+		try:
+			query = cmakescript.Query(command, self.options.argpatterns,
+									self.options.ignorecase)
+		except re.error, e:
+			parser.error("bad --arg pattern: " + str(e))
+
+		if len(args) == 0:
+			args.append(os.getcwd())
+
+		inputfiles = cmakescript.find_cmake_scripts(args,
+													self.options.excludes)
+
+		pool = None
+		if self.options.jobs > 1 and len(inputfiles) > 1:
+			pool = multiprocessing.Pool(self.options.jobs, _init_worker,
+										(command, self.options.argpatterns,
+										 self.options.ignorecase))
+			results = pool.imap_unordered(_search_worker, inputfiles, 4)
+		else:
+			results = (cmakescript.search_file(x, query) for x in inputfiles)
+
+		searched = 0
+		matched = 0
+		found = 0
+		try:
+			for infile, matches, error, wassearched in results:
+				if wassearched:
+					searched = searched + 1
+				if error is not None:
+					print >>sys.stderr, infile + ": error parsing file: " + error
+				if len(matches) == 0:
+					continue
+				matched = matched + 1
+				found = found + len(matches)
+				if self.options.filesonly:
+					print infile
+				else:
+					for line, func, funcargs in matches:
+						if funcargs is None:
+							funcargs = ""
+						print "%s:%d: %s(%s)" % (infile, line, func, funcargs)
+				sys.stdout.flush()
+		except:
+			if pool is not None:
+				pool.terminate()
+			raise
+
+		if pool is not None:
+			pool.close()
+			pool.join()
+
+		if self.options.verbose:
+			print >>sys.stderr, "%d matches in %d files (%d of %d searched)" % (
+				found, matched, searched, len(inputfiles))
+
+		# Like grep: a failure exit when nothing matched
+		return matched > 0
+
+
+###
+# __main__
+
+if __name__ == "__main__":
+## Can be used as a tool when executed directly
+	app = App()
+	if not app.main():
+		sys.exit(1)
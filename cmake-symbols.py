@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Main application to use the CMakeScript packages to index the functions and
+macros defined in CMake scripts, and to find where they are defined and
+called from.
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import sys
+import os
+from optparse import OptionParser
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakescript
+
+
+class App:
+	def __init__(self, args_in=sys.argv[1:]):
+		self.args_in = args_in
+		self.stats = None
+
+	def main(self):
+		parser = OptionParser(usage="usage: %prog [options] [[file|dir]...]",
+							  version="%prog 0.5, part of the cmakescript tools")
+
+		parser.add_option("-q", "--quiet",
+						action="store_false", dest="verbose", default=True,
+						help="don't print status messages to stderr")
+
+		parser.add_option("--index",
+						metavar="FILE",
+						dest="index",
+						default=".cmake-symbols.sqlite",
+						help="keep the index in FILE, re-indexing only "
+							 "files changed since the last run "
+							 "(default: %default)")
+
+		parser.add_option("--no-update",
+						action="store_false",
+						dest="update",
+						default=True,
+						help="query the index as it is, without looking "
+							 "for changed files")
+
+		parser.add_option("--prune",
+						action="store_true",
+						dest="prune",
+						default=False,
+						help="forget the indexed files that weren't found "
+							 "this time, such as deleted ones")
+
+		parser.add_option("-x", "--exclude",
+						action="append",
+						metavar="GLOB",
+						dest="excludes",
+						default=[],
+						help="skip files and directories matching GLOB "
+							 "when searching directories, such as 'build*/' "
+							 "or '_deps/'.  May be given more than once.")
+
+		parser.add_option("-d", "--definitions",
+						action="append",
+						metavar="NAME",
+						dest="definitions",
+						default=[],
+						help="list where the function or macro NAME is "
+							 "defined.  May be given more than once.")
+
+		parser.add_option("-c", "--callers",
+						action="append",
+						metavar="NAME",
+						dest="callers",
+						default=[],
+						help="list where the command NAME is called, and "
+							 "from which function or macro.  May be given "
+							 "more than once.")
+
+		parser.add_option("--errors",
+						action="store_true",
+						dest="errors",
+						default=False,
+						help="list the files that couldn't be read to "
+							 "the end")
+
+		parser.add_option("--stats",
+						metavar="FILE",
+						dest="stats",
+						default=None,
+						help="time each phase of the work and count what "
+							 "was indexed, and save it to FILE as JSON")
+
+		(self.options, args) = parser.parse_args(self.args_in)
+
+		if self.options.stats is not None:
+			self.stats = cmakescript.cmakestats.enable()
+
+		index = cmakescript.SymbolIndex(self.options.index)
+
+		if self.options.update:
+			if len(args) == 0:
+				args.append(os.getcwd())
+			inputfiles = cmakescript.find_cmake_scripts(args,
+														self.options.excludes)
+			indexed = index.update(inputfiles, prune=self.options.prune)
+			if self.options.verbose:
+				print >>sys.stderr, "%d scripts, %d indexed" % (len(inputfiles),
+																indexed)
+
+		for name in self.options.definitions:
+			for path, line, kind, spelling in index.definitions(name):
+				print "%s:%d: %s(%s)" % (path, line, kind, spelling)
+
+		for name in self.options.callers:
+			for path, line, caller in index.callers(name):
+				if caller is None:
+					print "%s:%d" % (path, line)
+				else:
+					print "%s:%d: in %s" % (path, line, caller)
+
+		if self.options.errors:
+			for path, error in index.errors():
+				print "%s: %s" % (path, error)
+
+		index.close()
+
+		if self.stats is not None:
+			cmakescript.cmakestats.disable()
+			statsfile = open(self.options.stats, 'w')
+			self.stats.dump(statsfile)
+			statsfile.close()
+
+
+###
+# __main__
+
+if __name__ == "__main__":
+## Can be used as a tool when executed directly
+	app = App()
+	app.main()
@@ -13,7 +13,19 @@ Iowa State University HCI Graduate Program/VRAC
 """
 
 from cmakescript.cmakegrammar import IncompleteStatementError
-from cmakescript.cmakeparser import CMakeParser, parse_file, parse_string, UnclosedChildBlockError, InputExhaustedError
+from cmakescript.cmaketokenizer import StatementTokenizer, tokenize_string
+from cmakescript.cmakeparser import CMakeParser, parse_file, parse_string, iter_statements, STATEMENT, BLOCK_START, BLOCK_END, UnclosedChildBlockError, InputExhaustedError
+from cmakescript.cmakecache import ParseCache, MemoryParseCache, source_version
+from cmakescript.cmakemanifest import Manifest
+from cmakescript.cmakestats import Stats
+from cmakescript.cmakepatch import PatchWriter, unified_diff
+from cmakescript.cmakerewrite import FileRewriter
+from cmakescript.cmakedepgraph import DependencyGraph
+from cmakescript.cmakecatalog import ModuleCatalog, open_catalog
+from cmakescript.cmakesymbols import SymbolIndex
+from cmakescript.cmakequery import Query, search_file
+from cmakescript.cmakeincremental import IncrementalParser
+from cmakescript.cmakeflattree import FlatTree, FlatStatement, flatten_tree, flat_tree_from_lines
 from cmakescript.cmakeformatter import CMakeFormatter, NiceFormatter
 from cmakescript.findcmakescripts import find_cmake_scripts
-from cmakescript.cmakemodifier import CMakeBlock, CMakeStatement, CMakeVisitor, VisitorRemoveRedundantConditions, VisitorReplaceSubdirs, apply_all_cleanup_visitors
+from cmakescript.cmakemodifier import CMakeBlock, CMakeStatement, CMakeVisitor, build_block, VisitorPipeline, VisitorRemoveRedundantConditions, VisitorReplaceSubdirs, VisitorFindModuleDependencies, cleanup_block, apply_all_cleanup_visitors
@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+"""
+Module for caching parsed CMake source files on disk
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import os
+import re
+import sys
+import shutil
+import marshal
+import hashlib
+import tempfile
+from collections import OrderedDict
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakegrammar
+import cmaketokenizer
+import cmakeparser
+
+## Default limit on the total size of one cache directory
+DEFAULT_MAXBYTES = 64 * 1024 * 1024
+
+## Default limit on the estimated memory used by a MemoryParseCache
+DEFAULT_MEMORY_MAXBYTES = 256 * 1024 * 1024
+
+## The name of a per-grammar-version subdirectory of the cache
+_reVersionDir = re.compile(r"^[0-9a-f]{16}$")
+
+def source_version(modules, extra=""):
+	"""Return a short string that changes whenever the source of any of
+	the given modules (or files, by name) changes, or extra does."""
+	digest = hashlib.sha1()
+	for module in modules:
+		if isinstance(module, basestring):
+			source = module
+		else:
+			source = os.path.splitext(module.__file__)[0] + ".py"
+			if not os.path.exists(source):
+				source = module.__file__
+		sourcefile = open(source, 'rb')
+		digest.update(sourcefile.read())
+		sourcefile.close()
+	digest.update(extra)
+	return digest.hexdigest()[:16]
+
+def grammar_version():
+	"""Return a short string that changes whenever the grammar, tokenizer
+	or parser source changes, or the serialization format might."""
+	return source_version((cmakegrammar, cmaketokenizer, cmakeparser),
+						"marshal %d python %d.%d" % ((marshal.version,)
+													+ sys.version_info[:2]))
+
+class ParseCache():
+	"""A directory of parse trees keyed by a hash of the source contents.
+
+	Entries for other grammar versions are removed when the cache is
+	opened, and the least recently used entries are removed whenever
+	the cache grows past maxbytes.
+	"""
+
+	def __init__(self, directory, maxbytes=DEFAULT_MAXBYTES, version=None):
+		if version is None:
+			version = grammar_version()
+		self.version = version
+		self.maxbytes = maxbytes
+		self.path = os.path.join(directory, version)
+		self.hits = 0
+		self.misses = 0
+
+		if not os.path.isdir(self.path):
+			os.makedirs(self.path)
+
+		# Whatever was cached by another grammar is no good to us now
+		for name in os.listdir(directory):
+			if name != version and _reVersionDir.match(name):
+				shutil.rmtree(os.path.join(directory, name), True)
+
+		self._size = sum([os.path.getsize(os.path.join(self.path, x))
+						for x in os.listdir(self.path)])
+
+	def key(self, data):
+		"""Return the cache key for some source text (or buffer)"""
+		digest = hashlib.sha1(self.version)
+		digest.update(data)
+		return digest.hexdigest()
+
+	def load(self, key):
+		"""Return the cached parse tree for key, or None"""
+		entry = os.path.join(self.path, key)
+		try:
+			entryfile = open(entry, 'rb')
+			try:
+				tree = marshal.loads(entryfile.read())
+			finally:
+				entryfile.close()
+			# Mark as recently used
+			os.utime(entry, None)
+		except (IOError, OSError):
+			return None
+		except (ValueError, EOFError, TypeError):
+			# A damaged entry is just a miss
+			self._remove(entry)
+			return None
+		return tree
+
+	def store(self, key, tree):
+		"""Save a parse tree under key, evicting old entries if needed"""
+		try:
+			data = marshal.dumps(tree)
+		except ValueError:
+			# Nested too deeply for marshal: leave it uncached
+			return
+		handle, temp = tempfile.mkstemp(dir=self.path)
+		try:
+			os.write(handle, data)
+		finally:
+			os.close(handle)
+		try:
+			os.rename(temp, os.path.join(self.path, key))
+		except OSError:
+			# Someone else stored it first
+			self._remove(temp)
+			return
+
+		self._size = self._size + len(data)
+		if self._size > self.maxbytes:
+			self.evict(self.maxbytes * 3 / 4)
+
+	def evict(self, targetbytes):
+		"""Remove least recently used entries until at most targetbytes
+		remain."""
+		entries = []
+		for name in os.listdir(self.path):
+			entry = os.path.join(self.path, name)
+			try:
+				info = os.stat(entry)
+			except OSError:
+				continue
+			entries.append((info.st_mtime, info.st_size, entry))
+		entries.sort()
+
+		self._size = sum([x[1] for x in entries])
+		for mtime, size, entry in entries:
+			if self._size <= targetbytes:
+				break
+			self._remove(entry)
+			self._size = self._size - size
+
+	def _remove(self, entry):
+		try:
+			os.remove(entry)
+		except OSError:
+			pass
+
+	def parse_file(self, filename, mapped=False):
+		"""Like cmakeparser.parse_file, but returns the cached parse tree
+		when the file contents have been parsed before."""
+		if mapped:
+			data = cmakeparser.map_file(filename)
+			if data is None:
+				# An empty file, which can't be mapped
+				data = ""
+				mapped = False
+		else:
+			cmakefile = open(filename, 'r')
+			data = cmakefile.read()
+			cmakefile.close()
+
+		try:
+			key = self.key(data)
+			tree = self.load(key)
+			if tree is not None:
+				self.hits = self.hits + 1
+				parser = cmakeparser.CMakeParser(None)
+				parser.parsetree = tree
+				return parser
+
+			self.misses = self.misses + 1
+			if mapped:
+				parser = cmakeparser.parse_buffer(data)
+			else:
+				parser = cmakeparser.parse_string(data)
+			self.store(key, parser.parsetree)
+			return parser
+		finally:
+			if mapped:
+				data.close()
+
+def freeze_tree(tree):
+	"""Return a copy of a parse tree made only of tuples, which can be
+	shared between callers without any of them changing it."""
+	frozen = []
+	# (statements left, frozen so far, the statement they are children of)
+	stack = [(iter(tree), frozen, None)]
+	while len(stack) > 0:
+		remaining, done, parent = stack[-1]
+		for func, args, comment, children in remaining:
+			if children is None:
+				done.append((func, args, comment, None))
+			else:
+				stack.append((iter(children), [], (func, args, comment)))
+				break
+		else:
+			stack.pop()
+			if parent is not None:
+				stack[-1][1].append(parent + (tuple(done),))
+	return tuple(frozen)
+
+def tree_size(tree):
+	"""Return a rough estimate, in bytes, of the memory used by a parse
+	tree."""
+	size = 0
+	stack = [tree]
+	while len(stack) > 0:
+		block = stack.pop()
+		size = size + sys.getsizeof(block)
+		for statement in block:
+			size = size + sys.getsizeof(statement)
+			for string in statement[1:3]:
+				if string is not None:
+					size = size + sys.getsizeof(string)
+			if statement[3] is not None:
+				stack.append(statement[3])
+	return size
+
+class MemoryParseCache():
+	"""An in-process, least recently used cache of parse trees by path.
+
+	A cached tree is reused as long as the file's mtime, size and inode
+	are unchanged.  Trees are frozen into tuples so the same one can be
+	handed to every caller.  If a backing cache (such as a ParseCache)
+	is given, misses are parsed through it.
+	"""
+
+	def __init__(self, maxbytes=DEFAULT_MEMORY_MAXBYTES, backing=None):
+		self.maxbytes = maxbytes
+		self.backing = backing
+		self.size = 0
+		self.hits = 0
+		self.misses = 0
+		self._entries = OrderedDict()
+
+	def __len__(self):
+		return len(self._entries)
+
+	def clear(self):
+		self._entries.clear()
+		self.size = 0
+
+	def parse_file(self, filename, mapped=False):
+		"""Like cmakeparser.parse_file, but returns the cached, frozen
+		parse tree when the file hasn't changed since it was parsed."""
+		path = os.path.abspath(filename)
+		info = os.stat(path)
+		stamp = (info.st_mtime, info.st_size, info.st_ino)
+
+		entry = self._entries.pop(path, None)
+		if entry is not None:
+			if entry[0] == stamp:
+				# Put it back as the most recently used
+				self._entries[path] = entry
+				self.hits = self.hits + 1
+				parser = cmakeparser.CMakeParser(None)
+				parser.parsetree = entry[1]
+				return parser
+			self.size = self.size - entry[2]
+
+		self.misses = self.misses + 1
+		parser = cmakeparser._parse_file(filename, mapped, self.backing)
+		parser.parsetree = freeze_tree(parser.parsetree)
+		size = tree_size(parser.parsetree)
+		if size <= self.maxbytes:
+			self._entries[path] = (stamp, parser.parsetree, size)
+			self.size = self.size + size
+			while self.size > self.maxbytes:
+				oldest, entry = self._entries.popitem(last=False)
+				self.size = self.size - entry[2]
+		return parser
+
+#if __name__ == "__main__":
+#	pass
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+"""
+Tests for the cmakescript.cmakecache module
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import unittest
+import os
+import glob
+import shutil
+import tempfile
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakecache
+import cmakeparser
+import cmakeparser_test
+
+
+## Requirement:
+## A cached parse is the same as a fresh parse, and is reused
+class CachedParses(unittest.TestCase):
+	def setUp(self):
+		self.cachedir = tempfile.mkdtemp()
+		self.cmakes = glob.glob(os.path.split(__file__)[0] + '/testdata/KnownValues/*.cmake')
+		self.cmakes.sort()
+
+	def tearDown(self):
+		shutil.rmtree(self.cachedir)
+
+	def testCachedParseMatches(self):
+		"""parsing through the cache gives the plain parse, and hits the second time"""
+		for mapped in (False, True):
+			cache = cmakecache.ParseCache(self.cachedir)
+			for cmakefn in self.cmakes:
+				expected = cmakeparser.parse_file(cmakefn).parsetree
+				first = cmakeparser.parse_file(cmakefn, mapped=mapped, cache=cache)
+				second = cmakeparser.parse_file(cmakefn, mapped=mapped, cache=cache)
+				self.assertEqual(first.parsetree, expected)
+				self.assertEqual(second.parsetree, expected)
+			self.assertEqual(cache.hits + cache.misses, 2 * len(self.cmakes))
+
+		# The second cache object found everything the first one stored.
+		self.assertEqual(cache.misses, 0)
+
+	def testGrammarChangeInvalidates(self):
+		"""a cache opened for another grammar version drops old entries"""
+		cache = cmakecache.ParseCache(self.cachedir, version="0" * 16)
+		cmakeparser.parse_file(self.cmakes[-1], cache=cache)
+		self.assertEqual(cache.misses, 1)
+
+		cache = cmakecache.ParseCache(self.cachedir, version="1" * 16)
+		cmakeparser.parse_file(self.cmakes[-1], cache=cache)
+		self.assertEqual(cache.misses, 1)
+		self.assertEqual(os.listdir(self.cachedir), ["1" * 16])
+
+	def testEviction(self):
+		"""the cache stays under its size limit"""
+		cache = cmakecache.ParseCache(self.cachedir, maxbytes=400)
+		for cmakefn in self.cmakes:
+			cmakeparser.parse_file(cmakefn, cache=cache)
+		total = sum([os.path.getsize(os.path.join(cache.path, x))
+					for x in os.listdir(cache.path)])
+		self.assertTrue(total <= 400)
+		self.assertTrue(len(os.listdir(cache.path)) > 0)
+
+	def testDamagedEntry(self):
+		"""a damaged entry is treated as a miss"""
+		cache = cmakecache.ParseCache(self.cachedir)
+		cmakefn = self.cmakes[-1]
+		cmakeparser.parse_file(cmakefn, cache=cache)
+		for name in os.listdir(cache.path):
+			damaged = open(os.path.join(cache.path, name), 'wb')
+			damaged.write("not a parse tree")
+			damaged.close()
+		out = cmakeparser.parse_file(cmakefn, cache=cache)
+		self.assertEqual(out.parsetree, cmakeparser.parse_file(cmakefn).parsetree)
+		self.assertEqual(cache.misses, 2)
+
+## Requirement:
+## An in-memory cache reuses trees only while the file is unchanged
+class MemoryCachedParses(unittest.TestCase):
+	def setUp(self):
+		self.tempdir = tempfile.mkdtemp()
+		self.cmakefn = os.path.join(self.tempdir, "CMakeLists.txt")
+		self.write("project(a)\nif(WIN32)\n  foo()\nendif()\n")
+
+	def tearDown(self):
+		shutil.rmtree(self.tempdir)
+
+	def write(self, contents):
+		cmakefile = open(self.cmakefn, 'w')
+		cmakefile.write(contents)
+		cmakefile.close()
+
+	def testSharedTree(self):
+		"""an unchanged file gives back the very same frozen tree"""
+		cache = cmakecache.MemoryParseCache()
+		first = cmakeparser.parse_file(self.cmakefn, cache=cache).parsetree
+		second = cmakeparser.parse_file(self.cmakefn, cache=cache).parsetree
+		self.assertTrue(first is second)
+		self.assertEqual((cache.hits, cache.misses), (1, 1))
+		self.assertTrue(isinstance(first, tuple))
+		self.assertTrue(isinstance(first[1][3], tuple))
+		self.assertEqual(list(first[0]),
+						list(cmakeparser.parse_file(self.cmakefn).parsetree[0]))
+
+	def testChangedFile(self):
+		"""changing the file's size or mtime gives a fresh parse"""
+		cache = cmakecache.MemoryParseCache()
+		cmakeparser.parse_file(self.cmakefn, cache=cache)
+		self.write("project(b)\n")
+		out = cmakeparser.parse_file(self.cmakefn, cache=cache)
+		self.assertEqual(out.parsetree, (("project", "b", None, None),))
+		self.assertEqual(cache.misses, 2)
+
+	def testMemoryCap(self):
+		"""the least recently used trees are dropped to stay under the cap"""
+		other = os.path.join(self.tempdir, "other.cmake")
+		shutil.copy(self.cmakefn, other)
+		size = cmakecache.tree_size(cmakecache.freeze_tree(
+			cmakeparser.parse_file(self.cmakefn).parsetree))
+		cache = cmakecache.MemoryParseCache(maxbytes=size + size / 2)
+		cmakeparser.parse_file(self.cmakefn, cache=cache)
+		cmakeparser.parse_file(other, cache=cache)
+		self.assertEqual(len(cache), 1)
+		self.assertTrue(cache.size <= cache.maxbytes)
+		cmakeparser.parse_file(other, cache=cache)
+		self.assertEqual(cache.hits, 1)
+
+	def testDeepTree(self):
+		"""trees nested past the recursion limit are frozen in memory,
+		even though they are too deep to cache on disk"""
+		self.write(cmakeparser_test.nested_source(cmakeparser_test.deepnesting))
+		expected = cmakeparser_test.walk(cmakeparser.parse_file(self.cmakefn).parsetree)
+		backing = cmakecache.ParseCache(os.path.join(self.tempdir, "cache"))
+		cache = cmakecache.MemoryParseCache(backing=backing)
+		first = cmakeparser.parse_file(self.cmakefn, cache=cache).parsetree
+		second = cmakeparser.parse_file(self.cmakefn, cache=cache).parsetree
+		self.assertTrue(first is second)
+		self.assertEqual(cmakeparser_test.walk(first), expected)
+		self.assertTrue(cmakecache.tree_size(first) > 0)
+		self.assertEqual(backing.load(backing.key(open(self.cmakefn).read())), None)
+
+
+if __name__=="__main__":
+	## Run tests if executed directly
+	try:
+		import nose
+		start = nose.main
+	except (ImportError):
+		start = unittest.main
+
+	start()
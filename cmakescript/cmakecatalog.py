@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+"""
+Module for cataloguing the modules that come with CMake, without running it
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import os
+import re
+import glob
+import json
+import tempfile
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+# - none
+
+## Kinds of module
+FIND_MODULE = "find"
+OTHER_MODULE = "module"
+
+## Changes whenever saved catalogs can no longer be read back
+CATALOG_FORMAT = 1
+
+def module_kind(name):
+	"""Return whether the module called name is a FIND_MODULE, for
+	find_package, or an OTHER_MODULE, for include"""
+	if name.startswith("Find"):
+		return FIND_MODULE
+	return OTHER_MODULE
+
+def _version_key(path):
+	"""Sort key putting share/cmake-3.10/Modules after share/cmake-3.9/Modules"""
+	name = os.path.basename(os.path.dirname(path))
+	return ([int(x) for x in re.findall(r"\d+", name)], name)
+
+def default_modules_directory():
+	"""Return the Modules directory of the cmake found on the PATH,
+	without running it, or None if there is none.  A cmake that is a
+	symlink, such as /usr/bin/cmake, is followed to where it is
+	installed, and the newest of several versions there is used."""
+	for bindir in os.environ.get("PATH", "").split(os.pathsep):
+		for executable in ("cmake", "cmake.exe"):
+			executable = os.path.join(bindir, executable)
+			if os.path.isfile(executable):
+				break
+		else:
+			continue
+		prefix = os.path.dirname(os.path.dirname(os.path.realpath(executable)))
+		candidates = glob.glob(os.path.join(prefix, "share", "cmake*", "Modules"))
+		if len(candidates) > 0:
+			return max(candidates, key=_version_key)
+	return None
+
+class ModuleCatalog():
+	"""The modules in a CMake modules directory, by name.
+
+	Only the .cmake files directly in the directory are modules: the
+	subdirectories hold their helpers.  Checking for a module, its kind
+	or its file is a dict lookup.  A catalog saved with save() is still
+	current as long as the directory's mtime, which changes whenever a
+	file is added, removed or renamed in it, is the same.
+	"""
+
+	def __init__(self, directory, mtime, modules):
+		self.directory = directory
+		self.mtime = mtime
+		# module name -> file name in directory
+		self.modules = modules
+
+	def __len__(self):
+		return len(self.modules)
+
+	def __contains__(self, name):
+		return name in self.modules
+
+	def kind(self, name):
+		"""Return the kind of the module called name, or None if there is
+		no such module."""
+		if name not in self.modules:
+			return None
+		return module_kind(name)
+
+	def path(self, name):
+		"""Return the path of the module called name, or None"""
+		filename = self.modules.get(name)
+		if filename is None:
+			return None
+		return os.path.join(self.directory, filename)
+
+	def find_modules(self):
+		return sorted([x for x in self.modules if module_kind(x) == FIND_MODULE])
+
+	def other_modules(self):
+		return sorted([x for x in self.modules if module_kind(x) == OTHER_MODULE])
+
+	def is_current(self):
+		"""Return True if the directory hasn't changed since indexed"""
+		try:
+			return os.stat(self.directory).st_mtime == self.mtime
+		except OSError:
+			return False
+
+	def save(self, filename):
+		"""Write the catalog to filename as JSON, replacing the old one
+		all at once."""
+		directory = os.path.dirname(os.path.abspath(filename))
+		handle, temp = tempfile.mkstemp(dir=directory)
+		try:
+			out = os.fdopen(handle, 'w')
+			try:
+				json.dump({	"format"	: CATALOG_FORMAT,
+							"directory"	: self.directory,
+							"mtime"		: self.mtime,
+							"modules"	: self.modules	},
+						out, indent=1, sort_keys=True)
+			finally:
+				out.close()
+			os.rename(temp, filename)
+		except:
+			os.remove(temp)
+			raise
+
+def index_modules(directory):
+	"""Return a new ModuleCatalog of the modules in directory"""
+	directory = os.path.abspath(directory)
+	mtime = os.stat(directory).st_mtime
+	modules = {}
+	for filename in os.listdir(directory):
+		name, ext = os.path.splitext(filename)
+		if ext == ".cmake" and os.path.isfile(os.path.join(directory, filename)):
+			modules[name] = filename
+	return ModuleCatalog(directory, mtime, modules)
+
+def load_catalog(filename):
+	"""Return the ModuleCatalog saved in filename, or None if there is
+	no readable one."""
+	try:
+		catalogfile = open(filename, 'r')
+		try:
+			data = json.load(catalogfile)
+		finally:
+			catalogfile.close()
+	except (IOError, ValueError):
+		return None
+	if not isinstance(data, dict) or data.get("format") != CATALOG_FORMAT:
+		return None
+	# JSON gives back unicode, but names are compared with byte strings
+	modules = dict([(name.encode("utf-8"), x.encode("utf-8"))
+					for name, x in data["modules"].items()])
+	return ModuleCatalog(data["directory"].encode("utf-8"), data["mtime"], modules)
+
+def open_catalog(directory=None, filename=None):
+	"""Return the catalog of the modules in directory, reusing the one
+	saved in filename if it is of that directory and still current, and
+	saving a fresh one there if not.
+
+	With no directory, a catalog saved in filename is used as it is, so
+	it can be used where CMake isn't installed; failing that, the
+	modules of the cmake on the PATH are catalogued.  Returns None if
+	there is nothing to catalog.
+	"""
+	catalog = None
+	if filename is not None:
+		catalog = load_catalog(filename)
+
+	if directory is None:
+		if catalog is not None:
+			return catalog
+		directory = default_modules_directory()
+		if directory is None:
+			return None
+
+	directory = os.path.abspath(directory)
+	if catalog is not None and catalog.directory == directory and catalog.is_current():
+		return catalog
+
+	catalog = index_modules(directory)
+	if filename is not None:
+		catalog.save(filename)
+	return catalog
+
+#if __name__ == "__main__":
+#	pass
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+Tests for the cmakescript.cmakecatalog module
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import unittest
+import os
+import glob
+import shutil
+import tempfile
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakecatalog
+
+modulesdir = os.path.join(os.path.split(os.path.abspath(__file__))[0],
+						'testdata', 'WildModules', 'cmake-2.8.0-modules')
+
+## Requirement:
+## Every module directly in a modules directory is catalogued by kind
+class IndexModules(unittest.TestCase):
+	def testIndex(self):
+		"""only .cmake files directly in the directory are modules"""
+		catalog = cmakecatalog.index_modules(modulesdir)
+		self.assertEqual(len(catalog), len(glob.glob(os.path.join(modulesdir, "*.cmake"))))
+		self.assertTrue("FindBoost" in catalog)
+		self.assertFalse("run_nvcc" in catalog)
+		self.assertFalse("CMakeASMCompiler.cmake" in catalog)
+		self.assertEqual(catalog.path("FindBoost"),
+						os.path.join(modulesdir, "FindBoost.cmake"))
+
+	def testKinds(self):
+		"""Find modules are told apart from the others"""
+		catalog = cmakecatalog.index_modules(modulesdir)
+		self.assertEqual(catalog.kind("FindBoost"), cmakecatalog.FIND_MODULE)
+		self.assertEqual(catalog.kind("CheckCSourceCompiles"), cmakecatalog.OTHER_MODULE)
+		self.assertEqual(catalog.kind("FindNothing"), None)
+		self.assertEqual(len(catalog.find_modules()) + len(catalog.other_modules()),
+						len(catalog))
+		self.assertTrue("FindBoost" in catalog.find_modules())
+
+## Requirement:
+## The modules of the cmake on the PATH are found without running it
+class DefaultDirectory(unittest.TestCase):
+	def setUp(self):
+		self.tempdir = tempfile.mkdtemp()
+		self.path = os.environ.get("PATH")
+
+	def tearDown(self):
+		if self.path is None:
+			del os.environ["PATH"]
+		else:
+			os.environ["PATH"] = self.path
+		shutil.rmtree(self.tempdir)
+
+	def testNewestThroughSymlink(self):
+		"""a symlinked cmake leads to the newest Modules where it really is"""
+		if not hasattr(os, "symlink"):
+			return
+		prefix = os.path.join(self.tempdir, "opt", "cmake")
+		os.makedirs(os.path.join(prefix, "bin"))
+		open(os.path.join(prefix, "bin", "cmake"), 'w').close()
+		for version in ("cmake-3.9", "cmake-3.10", "cmake-2.8"):
+			os.makedirs(os.path.join(prefix, "share", version, "Modules"))
+		bindir = os.path.join(self.tempdir, "usr", "bin")
+		os.makedirs(bindir)
+		os.symlink(os.path.join(prefix, "bin", "cmake"), os.path.join(bindir, "cmake"))
+		os.environ["PATH"] = bindir
+		self.assertEqual(cmakecatalog.default_modules_directory(),
+						os.path.join(os.path.realpath(prefix), "share", "cmake-3.10", "Modules"))
+
+	def testNoCMake(self):
+		"""without a cmake on the PATH there is no directory"""
+		os.environ["PATH"] = self.tempdir
+		self.assertEqual(cmakecatalog.default_modules_directory(), None)
+
+## Requirement:
+## A saved catalog is reused until its directory changes
+class SavedCatalog(unittest.TestCase):
+	def setUp(self):
+		self.tempdir = tempfile.mkdtemp()
+		self.modules = os.path.join(self.tempdir, "Modules")
+		os.mkdir(self.modules)
+		self.touch("FindFoo.cmake")
+		self.catalogfn = os.path.join(self.tempdir, "catalog.json")
+
+	def tearDown(self):
+		shutil.rmtree(self.tempdir)
+
+	def touch(self, name):
+		open(os.path.join(self.modules, name), 'w').close()
+
+	def testRoundtrip(self):
+		"""a saved catalog loads back the same"""
+		catalog = cmakecatalog.open_catalog(self.modules, self.catalogfn)
+		loaded = cmakecatalog.load_catalog(self.catalogfn)
+		self.assertEqual(loaded.modules, {"FindFoo" : "FindFoo.cmake"})
+		self.assertEqual(loaded.directory, catalog.directory)
+		self.assertTrue(loaded.is_current())
+
+	def testChangedDirectory(self):
+		"""adding a module to the directory catalogs it again"""
+		cmakecatalog.open_catalog(self.modules, self.catalogfn)
+		self.touch("Bar.cmake")
+		# Make sure the directory's mtime moves on
+		stamp = os.stat(self.modules).st_mtime + 10
+		os.utime(self.modules, (stamp, stamp))
+		catalog = cmakecatalog.open_catalog(self.modules, self.catalogfn)
+		self.assertTrue("Bar" in catalog)
+		self.assertTrue("Bar" in cmakecatalog.load_catalog(self.catalogfn))
+
+	def testWithoutDirectory(self):
+		"""without a directory, a saved catalog is used as it is"""
+		cmakecatalog.open_catalog(self.modules, self.catalogfn)
+		shutil.rmtree(self.modules)
+		catalog = cmakecatalog.open_catalog(None, self.catalogfn)
+		self.assertTrue("FindFoo" in catalog)
+
+	def testDamagedCatalog(self):
+		"""a damaged catalog is ignored"""
+		catalogfile = open(self.catalogfn, 'w')
+		catalogfile.write("{ not json")
+		catalogfile.close()
+		self.assertEqual(cmakecatalog.load_catalog(self.catalogfn), None)
+		catalog = cmakecatalog.open_catalog(self.modules, self.catalogfn)
+		self.assertTrue("FindFoo" in catalog)
+
+
+if __name__=="__main__":
+	## Run tests if executed directly
+	try:
+		import nose
+		start = nose.main
+	except (ImportError):
+		start = unittest.main
+
+	start()
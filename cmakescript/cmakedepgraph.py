@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+"""
+Module for the graph of dependencies between CMake scripts and modules
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import os
+import json
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+# - none
+
+## Kinds of node
+SCRIPT = "script"			# one of the scripts the graph was built from
+SYSTEM_MODULE = "system"	# a module that comes with CMake
+MODULE = "module"			# any other module used by name
+FILE = "file"				# any other file used by path
+
+## Kinds of edge
+FIND = "find_package"
+INCLUDE = "include"
+OPTIONAL_INCLUDE = "optional include"
+SUBDIRECTORY = "add_subdirectory"
+
+## Edges that replace an optional edge between the same nodes
+_required = (FIND, INCLUDE, SUBDIRECTORY)
+
+## DOT attributes for each kind of node and edge
+_dotnodes = {	SCRIPT			: 'shape=box',
+				SYSTEM_MODULE	: 'shape=ellipse, style=filled, fillcolor="#dddddd"',
+				MODULE			: 'shape=ellipse',
+				FILE			: 'shape=note'	}
+_dotedges = {	FIND				: '',
+				INCLUDE				: '',
+				OPTIONAL_INCLUDE	: ' [style=dashed]',
+				SUBDIRECTORY		: ' [style=bold]'	}
+
+def module_name(path):
+	"""Return the name a script is included or found by, such as FindFoo
+	for cmake/FindFoo.cmake, or None if it isn't a module."""
+	base, ext = os.path.splitext(os.path.basename(path))
+	if ext.lower() != ".cmake":
+		return None
+	return base
+
+def _dot_quote(string):
+	return '"' + string.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+class DependencyGraph():
+	"""Directed graph from each script to the modules, files and
+	subdirectories it uses.
+
+	Nodes are numbered in the order they are added: names, kinds and
+	edges are lists indexed by node number, and the edges of a node are
+	a dict from the number of each node it depends on to the kind of
+	edge.  Every script must be given when the graph is made, so that
+	uses of a module or file that is one of them point at that script.
+	"""
+
+	def __init__(self, scripts, root=None, systemmodules=()):
+		if root is None:
+			root = os.getcwd()
+		self.root = os.path.abspath(root)
+		self.systemmodules = systemmodules
+		self.names = []
+		self.kinds = []
+		self.edges = []
+		self.ids = {}
+		# module name -> node numbers of the scripts providing it
+		self._modules = {}
+
+		for path in scripts:
+			node = self.add_node(self.relative(path), SCRIPT)
+			name = module_name(path)
+			if name is not None:
+				self._modules.setdefault(name, []).append(node)
+
+	def __len__(self):
+		return len(self.names)
+
+	def edge_count(self):
+		return sum([len(x) for x in self.edges])
+
+	def relative(self, path):
+		"""Return the name of the node for a path"""
+		return os.path.relpath(os.path.abspath(path), self.root)
+
+	def add_node(self, name, kind):
+		"""Return the number of the node called name, adding it with kind
+		if there isn't one yet."""
+		node = self.ids.get(name)
+		if node is None:
+			node = self.ids[name] = len(self.names)
+			self.names.append(name)
+			self.kinds.append(kind)
+			self.edges.append({})
+		return node
+
+	def add_edge(self, source, target, kind):
+		"""Add an edge between node numbers.  A required edge replaces an
+		optional one between the same nodes, but not the other way."""
+		edges = self.edges[source]
+		if kind in _required or target not in edges:
+			edges[target] = kind
+
+	def module_node(self, name, fromdir):
+		"""Return the node for the module called name used by a script in
+		fromdir: one of the scripts if any of them is that module,
+		preferring one in fromdir, or else a module node."""
+		candidates = self._modules.get(name)
+		if candidates is not None:
+			for node in candidates:
+				if os.path.dirname(self.names[node]) == fromdir:
+					return node
+			return candidates[0]
+		if name in self.systemmodules:
+			return self.add_node(name, SYSTEM_MODULE)
+		return self.add_node(name, MODULE)
+
+	def file_node(self, path, fromdir):
+		"""Return the node for a file used by path from a script in
+		fromdir, relative to it unless absolute."""
+		if os.path.isabs(path):
+			name = self.relative(path)
+		else:
+			name = os.path.normpath(os.path.join(fromdir, path))
+		node = self.ids.get(name)
+		if node is None:
+			node = self.add_node(name, FILE)
+		return node
+
+	def add_dependencies(self, path, visitor):
+		"""Add the edges from the script at path to everything a
+		VisitorFindModuleDependencies found it using."""
+		source = self.ids[self.relative(path)]
+		fromdir = os.path.dirname(self.names[source])
+		for name in visitor.findmodules:
+			self.add_edge(source, self.module_node(name, fromdir), FIND)
+		for name in visitor.modules:
+			self.add_edge(source, self.module_node(name, fromdir), INCLUDE)
+		for name in visitor.optionalmodules:
+			self.add_edge(source, self.module_node(name, fromdir), OPTIONAL_INCLUDE)
+		for name in visitor.files:
+			self.add_edge(source, self.file_node(name, fromdir), INCLUDE)
+		for name in visitor.optionalfiles:
+			self.add_edge(source, self.file_node(name, fromdir), OPTIONAL_INCLUDE)
+		for name in visitor.directories:
+			self.add_edge(source, self.file_node(os.path.join(name, "CMakeLists.txt"),
+												fromdir), SUBDIRECTORY)
+
+	def dependencies(self, name):
+		"""Return a sorted list of (name, edge kind) of what the node
+		called name depends on."""
+		return sorted([(self.names[x], kind)
+					for x, kind in self.edges[self.ids[name]].items()])
+
+	def write_dot(self, outfile):
+		"""Write the graph to a file object in GraphViz DOT format, a line
+		at a time."""
+		write = outfile.write
+		write("digraph dependencies {\n")
+		for node in xrange(len(self.names)):
+			write("\tn%d [label=%s, %s];\n" % (node, _dot_quote(self.names[node]),
+											_dotnodes[self.kinds[node]]))
+		for node in xrange(len(self.names)):
+			for target, kind in sorted(self.edges[node].items()):
+				write("\tn%d -> n%d%s;\n" % (node, target, _dotedges[kind]))
+		write("}\n")
+
+	def write_json(self, outfile):
+		"""Write the graph to a file object as JSON, with a list of nodes
+		and a list of edges between node numbers, a line at a time."""
+		write = outfile.write
+		write('{"nodes": [')
+		separator = "\n"
+		for node in xrange(len(self.names)):
+			write(separator)
+			write(json.dumps({	"id"	: node,
+								"name"	: self.names[node],
+								"kind"	: self.kinds[node]	}, sort_keys=True))
+			separator = ",\n"
+		write('\n], "edges": [')
+		separator = "\n"
+		for node in xrange(len(self.names)):
+			for target, kind in sorted(self.edges[node].items()):
+				write(separator)
+				write(json.dumps({	"source"	: node,
+									"target"	: target,
+									"kind"		: kind	}, sort_keys=True))
+				separator = ",\n"
+		write("\n]}\n")
+
+#if __name__ == "__main__":
+#	pass
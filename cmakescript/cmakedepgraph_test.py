@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Tests for the cmakescript.cmakedepgraph module
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import unittest
+import os
+import json
+import StringIO
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakedepgraph
+import cmakemodifier
+
+## The scripts of a made-up project, relative to its root
+scripts = {	"CMakeLists.txt"	:	"find_package(Foo)\n"
+									"find_package(Threads)\n"
+									"include(Helpers)\n"
+									"include(CTest OPTIONAL)\n"
+									"include(build/config.cmake)\n"
+									"add_subdirectory(src)\n",
+			"src/CMakeLists.txt"	:	"include(../cmake/FindFoo.cmake)\n"
+										"include(Helpers OPTIONAL)\n"
+										"include(Helpers)\n",
+			"cmake/FindFoo.cmake"	:	"include(FindPackageHandleStandardArgs)\n",
+			"cmake/Helpers.cmake"	:	"# nothing needed\n"	}
+
+def visit(source):
+	visitor = cmakemodifier.VisitorFindModuleDependencies()
+	cmakemodifier.build_block(source.splitlines()).accept(visitor)
+	return visitor
+
+## Requirement:
+## Each script depends on the scripts, modules and files it uses
+class BuildGraph(unittest.TestCase):
+	def setUp(self):
+		self.root = os.path.abspath("project")
+		paths = sorted(scripts.keys())
+		self.graph = cmakedepgraph.DependencyGraph(
+			[os.path.join(self.root, x) for x in paths], root=self.root,
+			systemmodules=set(["FindThreads", "CTest", "FindPackageHandleStandardArgs"]))
+		for path in paths:
+			self.graph.add_dependencies(os.path.join(self.root, path),
+										visit(scripts[path]))
+
+	def testDependencies(self):
+		"""uses by name or path point at the script when there is one"""
+		self.assertEqual(self.graph.dependencies("CMakeLists.txt"), [
+			("CTest", cmakedepgraph.OPTIONAL_INCLUDE),
+			("FindThreads", cmakedepgraph.FIND),
+			("build/config.cmake", cmakedepgraph.INCLUDE),
+			("cmake/FindFoo.cmake", cmakedepgraph.FIND),
+			("cmake/Helpers.cmake", cmakedepgraph.INCLUDE),
+			("src/CMakeLists.txt", cmakedepgraph.SUBDIRECTORY)])
+
+	def testRequiredWins(self):
+		"""a required use outranks an optional one of the same thing"""
+		self.assertEqual(self.graph.dependencies("src/CMakeLists.txt"), [
+			("cmake/FindFoo.cmake", cmakedepgraph.INCLUDE),
+			("cmake/Helpers.cmake", cmakedepgraph.INCLUDE)])
+
+	def testNodeKinds(self):
+		"""nodes are scripts, system modules, or files"""
+		kinds = dict(zip(self.graph.names, self.graph.kinds))
+		self.assertEqual(kinds["cmake/Helpers.cmake"], cmakedepgraph.SCRIPT)
+		self.assertEqual(kinds["FindThreads"], cmakedepgraph.SYSTEM_MODULE)
+		self.assertEqual(kinds["build/config.cmake"], cmakedepgraph.FILE)
+		self.assertEqual(len(self.graph), 8)
+		self.assertEqual(self.graph.edge_count(), 9)
+
+	def testJson(self):
+		"""the JSON export holds every node and edge"""
+		out = StringIO.StringIO()
+		self.graph.write_json(out)
+		data = json.loads(out.getvalue())
+		self.assertEqual([x["name"] for x in data["nodes"]], self.graph.names)
+		self.assertEqual(len(data["edges"]), self.graph.edge_count())
+		edge = data["edges"][0]
+		self.assertEqual(self.graph.edges[edge["source"]][edge["target"]], edge["kind"])
+
+	def testDot(self):
+		"""the DOT export has a line for every node and edge"""
+		out = StringIO.StringIO()
+		self.graph.write_dot(out)
+		lines = out.getvalue().splitlines()
+		self.assertEqual(lines[0], "digraph dependencies {")
+		self.assertEqual(lines[-1], "}")
+		self.assertEqual(len(lines), 2 + len(self.graph) + self.graph.edge_count())
+		self.assertTrue('\tn0 -> n5 [style=dashed];' in lines)
+
+
+if __name__=="__main__":
+	## Run tests if executed directly
+	try:
+		import nose
+		start = nose.main
+	except (ImportError):
+		start = unittest.main
+
+	start()
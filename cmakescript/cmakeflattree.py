@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+"""
+Module for storing a parsed CMake source file as flat arrays
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+from array import array
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakegrammar
+import cmakeparser
+import cmakemodifier
+
+## Index used in place of a string or node that is None
+NONE = -1
+
+class FlatTree(object):
+	"""A parse tree stored as parallel arrays, one entry per statement in
+	depth-first order, with every string kept in one shared pool.
+
+	For statement i:
+	 - funcs[i], args[i], comments[i] are string ids in the pool, or NONE
+	 - parents[i] is the index of the enclosing statement, or NONE
+	 - ends[i] is one past the index of its last descendant
+	 - blocks[i] is 1 if the statement can have children (even if it has
+	   none), like a list rather than None in the nested tuple tree.
+	"""
+
+	def __init__(self):
+		self.pool = ""
+		self.offsets = array('i', [0])
+		self.funcs = array('i')
+		self.args = array('i')
+		self.comments = array('i')
+		self.parents = array('i')
+		self.ends = array('i')
+		self.blocks = array('b')
+
+	def __len__(self):
+		return len(self.funcs)
+
+	def string(self, stringid):
+		"""Return the pooled string with the given id, or None for NONE"""
+		if stringid == NONE:
+			return None
+		return self.pool[self.offsets[stringid]:self.offsets[stringid + 1]]
+
+	def statement(self, index):
+		"""Return the (func, args, comment) of a statement"""
+		return (self.string(self.funcs[index]),
+				self.string(self.args[index]),
+				self.string(self.comments[index]))
+
+	def levels(self):
+		"""Return the indent level of every statement.  As in the
+		formatter, a statement with a None func doesn't indent its
+		children."""
+		levels = array('i')
+		for i in xrange(len(self.funcs)):
+			parent = self.parents[i]
+			if parent == NONE:
+				levels.append(0)
+			elif self.funcs[parent] == NONE:
+				levels.append(levels[parent])
+			else:
+				levels.append(levels[parent] + 1)
+		return levels
+
+	def to_tree(self):
+		"""Return the nested (func, args, comment, children) tuple tree"""
+		tree = []
+		childlists = {}
+		for i in xrange(len(self.funcs)):
+			if self.blocks[i]:
+				children = childlists[i] = []
+			else:
+				children = None
+			func, args, comment = self.statement(i)
+			parent = self.parents[i]
+			if parent == NONE:
+				tree.append((func, args, comment, children))
+			else:
+				childlists[parent].append((func, args, comment, children))
+		return tree
+
+	def accept(self, visitor):
+		"""Visit every statement in order, in a plain loop over indices.
+
+		This is for visitors that only read the tree, such as
+		cmakemodifier.VisitorFindModuleDependencies: statements are passed
+		as read-only FlatStatements, and the cleanup visitors, which
+		change or replace statements, still need a CMakeBlock.  A
+		FlatStatement is only made for the statements the visitor has a
+		command_<command> method for, unless it overrides visit_statement.
+		visit_block is called once, with the whole tree.
+		"""
+		visitor.visit_block(self)
+		if visitor.visits_every_statement():
+			for i in xrange(len(self.funcs)):
+				visitor.visit_statement(FlatStatement(self, i))
+			return
+
+		table = visitor.dispatch_table()
+		# The handler of each distinct command string, looked up once
+		handlers = {}
+		funcs = self.funcs
+		for i in xrange(len(funcs)):
+			funcid = funcs[i]
+			try:
+				handler = handlers[funcid]
+			except KeyError:
+				handler = handlers[funcid] = table.get(
+					cmakemodifier.command_key(self.string(funcid)))
+			if handler is not None:
+				handler(FlatStatement(self, i))
+
+	def __getstate__(self):
+		return (self.pool, self.offsets.tostring(), self.funcs.tostring(),
+				self.args.tostring(), self.comments.tostring(),
+				self.parents.tostring(), self.ends.tostring(),
+				self.blocks.tostring())
+
+	def __setstate__(self, state):
+		self.__init__()
+		self.pool = state[0]
+		self.offsets = array('i')
+		for arr, data in zip((self.offsets, self.funcs, self.args,
+							self.comments, self.parents, self.ends,
+							self.blocks), state[1:]):
+			arr.fromstring(data)
+
+
+class FlatStatement(object):
+	"""A read-only view of one statement of a FlatTree, with the same
+	attributes visitors read from a cmakemodifier.CMakeStatement."""
+	__slots__ = ("tree", "index")
+
+	def __init__(self, tree, index):
+		self.tree = tree
+		self.index = index
+
+	def __repr__(self):
+		return repr(self.tree.statement(self.index))
+
+	@property
+	def func(self):
+		return self.tree.string(self.tree.funcs[self.index])
+
+	@property
+	def args(self):
+		return self.tree.string(self.tree.args[self.index])
+
+	@property
+	def comment(self):
+		return self.tree.string(self.tree.comments[self.index])
+
+	@property
+	def command(self):
+		"""The lowercase name of the command, as visitors dispatch on"""
+		return cmakemodifier.command_key(self.func)
+
+	@property
+	def tokens(self):
+		"""The tuple of argument tokens args splits into"""
+		return cmakegrammar.arg_tokens(self.args)
+
+
+class FlatTreeBuilder():
+	"""Appends statements to a new FlatTree in depth-first order"""
+
+	def __init__(self):
+		self.tree = FlatTree()
+		self._ids = {}
+		self._strings = []
+		self._open = []
+
+	def _intern(self, string):
+		if string is None:
+			return NONE
+		stringid = self._ids.get(string)
+		if stringid is None:
+			stringid = self._ids[string] = len(self._strings)
+			self._strings.append(string)
+		return stringid
+
+	def add(self, func, args, comment, isblock):
+		"""Add a statement inside the innermost open block.  If isblock,
+		it is left open to receive children until close() is called."""
+		tree = self.tree
+		index = len(tree.funcs)
+		tree.funcs.append(self._intern(func))
+		tree.args.append(self._intern(args))
+		tree.comments.append(self._intern(comment))
+		if len(self._open) > 0:
+			tree.parents.append(self._open[-1])
+		else:
+			tree.parents.append(NONE)
+		tree.ends.append(index + 1)
+		if isblock:
+			tree.blocks.append(1)
+			self._open.append(index)
+		else:
+			tree.blocks.append(0)
+		return index
+
+	def close(self):
+		"""Close the innermost open block"""
+		index = self._open.pop()
+		self.tree.ends[index] = len(self.tree.funcs)
+
+	def finish(self):
+		"""Return the finished FlatTree"""
+		assert len(self._open) == 0
+		tree = self.tree
+		tree.pool = "".join(self._strings)
+		for string in self._strings:
+			tree.offsets.append(tree.offsets[-1] + len(string))
+		return tree
+
+
+def flatten_tree(tree):
+	"""Return a FlatTree holding a nested (func, args, comment, children)
+	tuple tree, walking it with an explicit stack."""
+	builder = FlatTreeBuilder()
+	stack = [iter(tree)]
+	while len(stack) > 0:
+		for func, args, comment, children in stack[-1]:
+			builder.add(func, args, comment, children is not None)
+			if children is not None:
+				stack.append(iter(children))
+				break
+		else:
+			stack.pop()
+			if len(stack) > 0:
+				builder.close()
+	return builder.finish()
+
+def flat_tree_from_lines(lines):
+	"""Return a FlatTree straight from lines of CMake source, such as an
+	open file object, without building the tuple tree."""
+	builder = FlatTreeBuilder()
+	for event, (func, args, comment) in cmakeparser.iter_statements(lines):
+		if event == cmakeparser.BLOCK_END:
+			builder.close()
+		else:
+			builder.add(func, args, comment, event == cmakeparser.BLOCK_START)
+	return builder.finish()
+
+#if __name__ == "__main__":
+#	pass
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""
+Tests for the cmakescript.cmakeflattree module
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import unittest
+import os
+import glob
+import pickle
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakeflattree
+import cmakeformatter
+import cmakemodifier
+
+# format for each:
+# key is the filename - extension
+# value is whatever the variable name suggests
+inputfiles = dict()
+parsedfiles = dict()
+
+def setUpModule():
+	knownvalues = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+							'testdata', 'KnownValues')
+	cmakes = glob.glob(os.path.join(knownvalues, '*.cmake'))
+	cmakes.sort()
+	parses = glob.glob(os.path.join(knownvalues, '*.parse'))
+	parses.sort()
+
+	assert len(parses) == len(cmakes)
+	assert len(parses) == 10
+
+	for cmakefn, parsefn in zip(cmakes, parses):
+		cbase = os.path.splitext(cmakefn)[0]
+		pbase = os.path.splitext(parsefn)[0]
+		assert cbase == pbase
+
+		parsef = open(parsefn, 'r')
+		parsestr = parsef.read()
+		parsef.close()
+
+		inputfiles[cbase] = cmakefn
+		parsedfiles[cbase] = eval(parsestr)
+
+## Requirement:
+## A flat tree holds exactly the same statements as the nested tree
+class FlatRoundtrip(unittest.TestCase):
+
+	subtest = ""
+
+	def testFlattenKnownParses(self):
+		"""flattening a known parse and converting back gives it unchanged"""
+		for key in parsedfiles.keys():
+			self.subtest = key
+			flat = cmakeflattree.flatten_tree(parsedfiles[key])
+			self.assertEqual(flat.to_tree(), parsedfiles[key])
+
+	def testFlatFromKnownFiles(self):
+		"""building a flat tree from a known-good file matches its parse"""
+		for key in inputfiles.keys():
+			self.subtest = key
+			cmakefile = open(inputfiles[key], 'r')
+			flat = cmakeflattree.flat_tree_from_lines(cmakefile)
+			cmakefile.close()
+			self.assertEqual(flat.to_tree(), parsedfiles[key])
+
+	def testPickle(self):
+		"""a pickled flat tree loads back with the same contents"""
+		for key in parsedfiles.keys():
+			self.subtest = key
+			flat = cmakeflattree.flatten_tree(parsedfiles[key])
+			loaded = pickle.loads(pickle.dumps(flat, 2))
+			self.assertEqual(loaded.to_tree(), parsedfiles[key])
+
+## Requirement:
+## The arrays describe the shape of the tree
+class FlatStructure(unittest.TestCase):
+	def testParentsAndEnds(self):
+		"""parents and subtree ends of a nested block"""
+		tree = [('if', 'A', None, [('if', 'B', None, [('x', None, None, None)]),
+									('endif', None, None, None)]),
+				('endif', None, None, None)]
+		flat = cmakeflattree.flatten_tree(tree)
+		self.assertEqual(list(flat.parents), [-1, 0, 1, 0, -1])
+		self.assertEqual(list(flat.ends), [4, 3, 3, 4, 5])
+		self.assertEqual(list(flat.levels()), [0, 1, 2, 1, 0])
+		# Repeated strings are stored once
+		self.assertEqual(flat.funcs[0], flat.funcs[1])
+
+	def testFormatterOutput(self):
+		"""formatting a flat tree gives the same text as the nested tree"""
+		for key in parsedfiles.keys():
+			flat = cmakeflattree.flatten_tree(parsedfiles[key])
+			expected = cmakeformatter.CMakeFormatter(parsedfiles[key]).output_as_cmake()
+			self.assertEqual(cmakeformatter.CMakeFormatter(flat).output_as_cmake(), expected)
+
+
+## Requirement:
+## Visitors that only read can walk a flat tree
+class FlatVisitors(unittest.TestCase):
+	def testSameAsBlock(self):
+		"""a visitor finds the same in a flat tree as in a CMakeBlock"""
+		tree = [('find_package', 'Foo REQUIRED', None, None),
+				('if', 'A', None, [('INCLUDE', 'CTest', None, None),
+								('include', 'extra.cmake OPTIONAL', None, None),
+								('add_subdirectory', 'src', None, None)]),
+				('endif', None, None, None)]
+		expected = cmakemodifier.VisitorFindModuleDependencies()
+		cmakemodifier.CMakeBlock(tree).accept(expected)
+		visitor = cmakemodifier.VisitorFindModuleDependencies()
+		cmakeflattree.flatten_tree(tree).accept(visitor)
+		self.assertEqual(visitor.findmodules, ["FindFoo"])
+		self.assertEqual(visitor.directories, ["src"])
+		for name in ("findmodules", "modules", "optionalmodules",
+					"files", "optionalfiles", "directories"):
+			self.assertEqual(getattr(visitor, name), getattr(expected, name))
+
+	def testEveryStatement(self):
+		"""a visitor overriding visit_statement sees every statement in order"""
+		class Recorder(cmakemodifier.CMakeVisitor):
+			def __init__(self):
+				cmakemodifier.CMakeVisitor.__init__(self)
+				self.seen = []
+			def visit_statement(self, statement):
+				self.seen.append((statement.command, statement.tokens, statement.comment))
+		tree = [('IF', 'A', None, [('include', 'B OPTIONAL', '# b', None)]),
+				('endif', None, None, None)]
+		visitor = Recorder()
+		cmakeflattree.flatten_tree(tree).accept(visitor)
+		self.assertEqual(visitor.seen, [("if", ("A",), None),
+										("include", ("B", "OPTIONAL"), "# b"),
+										("endif", (), None)])
+
+	def testReadOnly(self):
+		"""a visitor can't change a flat tree's statements"""
+		flat = cmakeflattree.flatten_tree([('subdirs', 'a', None, None)])
+		self.assertRaises(AttributeError, flat.accept,
+						cmakemodifier.VisitorReplaceSubdirs())
+
+
+if __name__=="__main__":
+	## Run tests if executed directly
+	try:
+		import nose
+		start = nose.main
+	except (ImportError):
+		start = unittest.main
+
+	start()
@@ -24,6 +24,8 @@ import re
 ###
 # internal packages
 import cmakegrammar
+import cmakeflattree
+import cmakestats
 
 grammar = cmakegrammar
 
@@ -35,24 +37,66 @@ class CMakeFormatter():
 		self.parsetree = parsetree
 
 	def output_as_cmake(self):
-		return "\n".join(self.output_block(self.parsetree, 0))
+		with cmakestats.timer("format"):
+			return "\n".join(self.iter_lines())
+
+	def iter_lines(self):
+		"""Generate the output one line at a time, without line endings,
+		so the first line comes out before the rest is formatted."""
+		if isinstance(self.parsetree, cmakeflattree.FlatTree):
+			return self.output_flat(self.parsetree)
+		return self.iter_block_lines(self.parsetree, 0)
+
+	def iter_block_lines(self, block, level):
+		"""Generate the lines of a block of statements at an indent level,
+		walking nested blocks with an explicit stack, not by recursion."""
+		# Walk the tree with a stack of (statements left, indent level)
+		stack = [(iter(block), level)]
+		while len(stack) > 0:
+			statements, level = stack[-1]
+			for statement in statements:
+				func, args, comment, children = statement
+				if func is None:
+					# Allow visitors to replace one line with multiple lines
+					# by making a None function have children.
+					childlevel = level
+				else:
+					yield self.output_line(statement, level)
+					childlevel = level + 1
+				if children is not None:
+					stack.append((iter(children), childlevel))
+					break
+			else:
+				stack.pop()
+
+	def write_to(self, outfile):
+		"""Write the output to a file object, ending every line with a
+		newline, one line at a time."""
+		with cmakestats.timer("format"):
+			write = outfile.write
+			for line in self.iter_lines():
+				write(line)
+				write("\n")
+
+	def output_flat(self, tree):
+		"""Generate the lines for a FlatTree: a plain loop over its
+		statements, with no recursion."""
+		levels = tree.levels()
+		for i in xrange(len(tree)):
+			func, args, comment = tree.statement(i)
+			if func is not None:
+				yield self.output_line((func, args, comment, None), levels[i])
 
 	def output_block(self, block, level):
-		lines = []
 		if block is None:
-			return lines
-		for statement in block:
-			lines.extend(self.output_statement(statement, level))
-		return lines
+			return []
+		return list(self.iter_block_lines(block, level))
 
 	def output_statement(self, statement, level):
+		return list(self.iter_block_lines([statement], level))
 
+	def output_line(self, statement, level):
 		func, args, comment, children = statement
-		if func == None:
-			# Allow visitors to replace one line with multiple lines
-			# by making a None function have children.
-			return self.output_block(children, level)
-
 		if func == "" and comment is None:
 			thisline = ""
 		else:
@@ -61,10 +105,7 @@ class CMakeFormatter():
 		thisline = self.output_function(statement, level, thisline)
 		thisline = self.output_args(statement, level, thisline)
 		thisline = self.output_comment(statement, level, thisline)
-		output = [thisline]
-		# Recurse into children
-		output.extend(self.output_block(children, level + 1))
-		return output
+		return thisline
 
 	def create_indent(self, level):
 		return "\t" * level
@@ -104,7 +145,10 @@ class NiceFormatter(CMakeFormatter):
 		newline = line
 
 		if func is not None and func != "":
-			arglist = grammar.split_args(args)
+			# CMakeStatements keep their tokens once split
+			arglist = getattr(statement, "tokens", None)
+			if arglist is None:
+				arglist = grammar.arg_tokens(args)
 			if len(newline + "(" + args + ")") > 72:
 				newline = (newline + "(" +
 							("\n"+self.create_indent(level+1)).join(arglist)
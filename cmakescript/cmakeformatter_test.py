@@ -11,6 +11,7 @@ Iowa State University HCI Graduate Program/VRAC
 ###
 # standard packages
 import unittest
+import StringIO
 import re
 import os
 import glob
@@ -25,6 +26,8 @@ import glob
 import cmakeparser
 import cmakegrammar
 import cmakeformatter
+import cmakemodifier
+import cmakeparser_test
 import findcmakescripts
 
 
@@ -42,10 +45,12 @@ parsedstrings = dict()
 parseduppers = dict()
 parsedlowers = dict()
 
-def setUp():
-	cmakes = glob.glob(os.path.split(__file__)[0] + '/testdata/KnownValues/*.cmake')
+def setUpModule():
+	testdata = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+								'testdata', 'KnownValues')
+	cmakes = glob.glob(os.path.join(testdata, '*.cmake'))
 	cmakes.sort()
-	parses = glob.glob(os.path.split(__file__)[0] + '/testdata/KnownValues/*.parse')
+	parses = glob.glob(os.path.join(testdata, '*.parse'))
 	parses.sort()
 
 	assert len(parses) == len(cmakes)
@@ -122,6 +127,71 @@ class KnownParses(unittest.TestCase):
 			formatted = formatter.output_as_cmake()
 			self.assertEqual(cmakeparser.parse_string(formatted).parsetree, parsedstrings[key])
 
+	def testCanOutputBlocks(self):
+		"""formatting a CMakeBlock gives the same text as its parse tree"""
+		self.assertNotEqual(len(parsedstrings), 0)
+		for key in parsedstrings.keys():
+			self.subtest = key
+			block = cmakemodifier.CMakeBlock(parsedstrings[key])
+			expected = cmakeformatter.NiceFormatter(parsedstrings[key]).output_as_cmake()
+			self.assertEqual(cmakeformatter.NiceFormatter(block).output_as_cmake(), expected)
+
+## Requirement:
+## Streamed output is the same as output as one string
+class Streaming(unittest.TestCase):
+
+	subtest = ""
+
+	def testIterLines(self):
+		"""the generated lines are the lines of output_as_cmake"""
+		self.assertNotEqual(len(parsedstrings), 0)
+		for key in parsedstrings.keys():
+			self.subtest = key
+			formatter = cmakeformatter.NiceFormatter(parsedstrings[key])
+			self.assertEqual("\n".join(formatter.iter_lines()),
+							formatter.output_as_cmake())
+
+	def testWriteTo(self):
+		"""writing to a file object ends every line with a newline"""
+		self.assertNotEqual(len(parsedstrings), 0)
+		for key in parsedstrings.keys():
+			self.subtest = key
+			formatter = cmakeformatter.CMakeFormatter(parsedstrings[key])
+			out = StringIO.StringIO()
+			formatter.write_to(out)
+			self.assertEqual(out.getvalue(),
+							"".join([x + "\n" for x in formatter.iter_lines()]))
+
+	def testFirstLineFirst(self):
+		"""the first line comes out before later statements are read"""
+		def statements():
+			yield ("if", "A", None, [("foo", None, None, None)])
+			raise AssertionError("read past the first statement")
+		lines = cmakeformatter.CMakeFormatter(statements()).iter_lines()
+		self.assertEqual(lines.next(), "if(A)")
+		self.assertEqual(lines.next(), "\tfoo()")
+
+## Requirement:
+## Blocks nested deeper than the recursion limit can be output
+class DeepNesting(unittest.TestCase):
+	def testOutputDeepTree(self):
+		"""each level of a deep tree is indented one more"""
+		depth = cmakeparser_test.deepnesting
+		source = cmakeparser_test.nested_source(depth)
+		tree = cmakeparser.parse_string(source).parsetree
+		for parsetree in (tree, cmakemodifier.CMakeBlock(tree)):
+			lines = cmakeformatter.CMakeFormatter(parsetree).output_as_cmake().split("\n")
+			self.assertEqual([x.strip() for x in lines], source.splitlines())
+			self.assertEqual(lines[depth], "\t" * depth + "foo()")
+			self.assertEqual(lines[-1], "endif()")
+
+	def testOutputDeepBlock(self):
+		"""output_block gives the same lines as iter_lines"""
+		tree = cmakeparser.parse_string(
+			cmakeparser_test.nested_source(cmakeparser_test.deepnesting)).parsetree
+		formatter = cmakeformatter.CMakeFormatter(tree)
+		self.assertEqual(formatter.output_block(tree, 0), list(formatter.iter_lines()))
+
 
 #class WildModules(unittest.TestCase):
 #	def setUp(self):
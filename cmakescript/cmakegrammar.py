@@ -53,9 +53,6 @@ _reParenArgFuncs = (r"(?ix)" # case-insensitive and verbose
 ## A possible function name
 _reFuncName = r"(?x) (?P<FuncName> [\w\d]+)"
 
-## Extremely general "non-empty arguments," no leading or trailing whitespc
-_reArgs = r"(?x) (?P<Args> (\S ((\s)*\S)*))"
-
 ## A given single valid argument
 _reArg = r"""(?x) (?:
 			(?:\\.|[^"'\s])+|	# anything that's a single word
@@ -73,40 +70,6 @@ _reArg = r"""(?x) (?:
 # (?<!\\)
 _reComment = r"(?x) (?P<Comment> (?<!\\) \# (?: [^\S\n]* \S+)*)"
 
-## The start of a command, up until the arguments
-_reCommandStart = _reFuncName + r"\s* \("
-
-## The end of a command
-_reCommandEnd = r"\)"
-
-## A full (complete) line
-_reFullLine = ( r"^\s*(?P<FullLine>"	# start the full line bool group
-			+ r"("			# start optional func call group
-			+ _reCommandStart
-			+ r"\s*"
-			+ r"("			# start optional args group
-			+ _reArgs
-			+ r")?"			# end optional args group
-			+ r"\s*"
-			+ _reCommandEnd
-			+ r")?"			# end optional func call group
-			+ r"\s*"
-			+ r"("			# start optional comment group
-			+ _reComment
-			+ r")?" 		# end optional comment group
-			+ r")\s*$")		# end the full line bool group
-
-## Either an argument or a comment: use for parsing initial args of
-## a multiline command
-_reMLChunk = ( r"(?mx)(" + _reComment + "\n|" + _reArg + ")")
-
-## Regex matching all the functions that permit parens in their args
-#reParenArgFuncs = re.compile("^" + _parenArgFuncs + "$",
-#	re.IGNORECASE | re.VERBOSE)
-
-## Regex matching a full line
-reFullLine = re.compile(_reFullLine, re.IGNORECASE | re.VERBOSE | re.MULTILINE)
-
 ## A dictionary where blockEndings[blockBeginFunc]=(blockEndFunc1,...),
 ## all datatypes are strings.
 _blockTagsDict = {'foreach'	: ('endforeach',),
@@ -123,9 +86,9 @@ _blockTagsDict = {'foreach'	: ('endforeach',),
 
 ##
 _reBlockBeginnings = (r"(?ix)" +		# case-insensitive and verbose
-						r"(?P<BlockBeginnings>" +
+						r"^(?P<BlockBeginnings>" +
 						"|".join(_blockTagsDict.keys()) +
-						r")")
+						r")$")
 
 ## A compiled regex that matches exactly the functions that start a block
 reBlockBeginnings = re.compile(_reBlockBeginnings, re.IGNORECASE)
@@ -151,44 +114,54 @@ assert len(_blockTagsDict) == len(dReBlockTagsDict)
 
 
 def parse_line(line):
+	"""Parse the text of one statement, which may span several lines, into
+	a (func, args, comment) tuple.
+
+	This runs the same hand-written state machine the parser reads files
+	with (cmaketokenizer.StatementTokenizer), so it takes time linear in
+	the length of line, however badly line is formed.  Blank lines around
+	the statement are ignored; anything less or more than one statement
+	raises IncompleteStatementError.
+	"""
 	# Handle EOF sentry: a "None" entry returns an all-None tuple
 	if line is None:
 		return (None, None, None)
 
-	m = reFullLine.match(line)
-	if m is None:
-		raise IncompleteStatementError
-
-	FuncName, Args, Comment = m.group("FuncName",
-					"Args", # todo change to argsCareful
-					"Comment")
-
-	if Args is not None and re.search(r"\n", Args) is not None:
-		# This is multiline - we may have comments embedded in the args
-		# so, we need to parse that apart more carefully
-
-		units = re.findall(_reMLChunk, Args)
-		MLArgs = []
-		MLComment = []
-		for unit in units:
-			if re.match(_reComment, unit[0]):
-				MLComment.append(unit[0])
-			elif re.match(_reArg, unit[0]):
-				MLArgs.append(unit[0])
-
-		Args = " ".join(MLArgs)
-		if Comment is not None:
-			MLComment.append(Comment)
-		if len(MLComment) > 0:
-			Comment = "\n".join(MLComment)
-		else:
-			Comment = None
-
-	# Can't have a None FuncName unless we are out of input
-	if FuncName is None:
-		FuncName = ""
-
-	return (FuncName, Args, Comment)
+	# Imported here, since the tokenizer is built on this module
+	import cmaketokenizer
+
+	blank = ("", None, None)
+	found = blank
+	for statement in cmaketokenizer.tokenize_string(line):
+		if statement == blank:
+			continue
+		if found is not blank:
+			# A second statement: line wasn't just one
+			raise IncompleteStatementError
+		found = statement
+	return found
+
+## Regex matching a single argument
+reArg = re.compile(_reArg)
+
+## Kinds of argument token
+UNQUOTED = "unquoted"
+QUOTED = "quoted"
+SINGLE_QUOTED = "single-quoted"
+
+_tokenKinds = {'"' : QUOTED, "'" : SINGLE_QUOTED}
 
 def split_args(args):
-	return re.findall(_reArg, args)
+	return reArg.findall(args)
+
+def token_kind(token):
+	"""Return whether an argument token is UNQUOTED, QUOTED or
+	SINGLE_QUOTED"""
+	return _tokenKinds.get(token[:1], UNQUOTED)
+
+def arg_tokens(args):
+	"""Return the tuple of argument tokens of some args, which may be
+	None."""
+	if args is None:
+		return ()
+	return tuple(reArg.findall(args))
@@ -12,6 +12,7 @@ Iowa State University HCI Graduate Program/VRAC
 # standard packages
 import unittest
 import re
+import time
 
 ###
 # third-party packages
@@ -247,6 +248,74 @@ class ParsePartialLine(unittest.TestCase):
 			self.assertRaises(cmakegrammar.IncompleteStatementError,
 							cmakegrammar.parse_line, line)
 
+	def testParseTwoStatements(self):
+		"""parse_line on more than one statement"""
+		for line in ("func() func()", "func()\nfunc()", "# comment\nfunc()"):
+			self.subtest = line
+			self.assertRaises(cmakegrammar.IncompleteStatementError,
+							cmakegrammar.parse_line, line)
+
+## Requirement:
+## Take time linear in the input, however it is malformed
+class AdversarialInput(unittest.TestCase):
+	## Long enough that any backtracking blows well past the limit
+	size = 100000
+
+	## Seconds allowed per input
+	limit = 1.0
+
+	subtest = ""
+	def _exc_info(self):
+		print "Subtest info:"
+		print self.subtest
+		return unittest.TestCase._exc_info(self)
+
+	def timed_parse(self, line):
+		start = time.time()
+		try:
+			result = cmakegrammar.parse_line(line)
+		except cmakegrammar.IncompleteStatementError:
+			result = None
+		self.assertTrue(time.time() - start < self.limit,
+						"took %.2f seconds" % (time.time() - start))
+		return result
+
+	def testUnterminatedArgs(self):
+		"""parse_line on long unterminated argument lists"""
+		for line in ("func(" + "arg " * (self.size / 4),
+					"func(" + "arg\n" * (self.size / 4),
+					"func(" + "(" * self.size,
+					"func(" + "\\" * self.size):
+			self.subtest = line[:40]
+			self.assertEqual(self.timed_parse(line), None)
+
+	def testSpaces(self):
+		"""parse_line on thousands of spaces in every position"""
+		spaces = " " * self.size
+		for line in (spaces,
+					spaces + "func" + spaces + "(" + spaces + "x" + spaces + ")" + spaces,
+					"f(" + spaces + "x",
+					"f(x" + spaces + "x" + spaces,
+					"#" + spaces + "x" + spaces):
+			self.subtest = line.strip()[:40]
+			self.timed_parse(line)
+
+	def testUnbalancedQuotes(self):
+		"""parse_line on unbalanced quotes"""
+		for line in ('func("' + "a " * (self.size / 2),
+					"func(" + '"a" "' * (self.size / 4),
+					'func("' + '\\"' * (self.size / 3),
+					"func(" + "'" * self.size + ")"):
+			self.subtest = line[:40]
+			self.timed_parse(line)
+
+	def testLongValidStatement(self):
+		"""parse_line on a long but valid statement"""
+		line = "func(" + "arg " * (self.size / 4) + ") # done"
+		func, args, comment = self.timed_parse(line)
+		self.assertEqual(len(cmakegrammar.arg_tokens(args)), self.size / 4)
+		self.assertEqual(comment, "# done")
+
 class HandleEOFSentry(unittest.TestCase):
 	def testHandleEOFSentry(self):
 		"""Parsing None as your line results in an all-None tuple"""
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+Module for re-parsing only the edited regions of a CMake source file
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+from itertools import chain, islice
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmaketokenizer
+import cmakeparser
+
+class IncrementalParser():
+	"""A parse of some CMake source that can be edited line by line.
+
+	The source is kept as a list of lines, and split into units: a
+	top-level statement, or a top-level block from its opening statement
+	through its closing one, along with any other statements sharing
+	their lines.  Parsing always starts afresh at the start of a unit,
+	so an edit only needs the units it touches re-parsed, plus any that
+	the edit changes the block structure of.
+
+	parsetree is always the same tree parse_string would give for the
+	current text.
+	"""
+
+	def __init__(self, source):
+		if isinstance(source, basestring):
+			source = source.splitlines()
+		self.lines = list(source)
+		self.parsetree = []
+		# For each unit, [number of lines, number of top-level statements]
+		self.units = []
+		self.parsetree, self.units = self._parse_from(self.lines, 0, 0, iter([]))[:2]
+
+	def text(self):
+		"""Return the current source as a string, ending each line with a
+		newline so that even a blank last line survives re-parsing."""
+		return "".join([line + "\n" for line in self.lines])
+
+	def replace_lines(self, start, end, newlines):
+		"""Replace lines[start:end] (counting from 0) with newlines, a
+		list of lines or a string, and re-parse what that changed.
+
+		If the new text doesn't parse, the error parse_string would give
+		is raised and nothing is changed.
+		"""
+		if isinstance(newlines, basestring):
+			newlines = newlines.splitlines()
+		assert 0 <= start <= end <= len(self.lines)
+
+		# Find the unit holding the first changed line: parsing starts there
+		first = 0
+		firstline = 0
+		firststatement = 0
+		while first < len(self.units) and firstline + self.units[first][0] <= start:
+			firstline = firstline + self.units[first][0]
+			firststatement = firststatement + self.units[first][1]
+			first = first + 1
+
+		newlines = list(newlines)
+		delta = len(newlines) - (end - start)
+
+		# Parse the edited text without copying all the lines first
+		lines = chain(islice(self.lines, firstline, start), newlines,
+					islice(self.lines, end, None))
+
+		tree, units, last, laststatement = self._parse_from(lines, firstline,
+			start + len(newlines), self._resync_points(first, firstline,
+			firststatement, end, delta))
+
+		self.lines[start:end] = newlines
+		self.parsetree[firststatement:laststatement] = tree
+		self.units[first:last] = units
+
+	def _resync_points(self, first, line, statement, end, delta):
+		"""Generate the units from first on that start at or after line
+		end, which an edit leaves unchanged, as (line where it starts
+		after the edit, unit index, statement index).  The end of input
+		comes last."""
+		for index in xrange(first, len(self.units)):
+			if line >= end:
+				yield (line + delta, index, statement)
+			line = line + self.units[index][0]
+			statement = statement + self.units[index][1]
+		yield (line + delta, len(self.units), statement)
+
+	def apply_edits(self, edits):
+		"""Apply several (start, end, newlines) edits, all given in terms
+		of the lines before any of them is made.  The edits must not
+		overlap."""
+		edits = sorted(edits, key=lambda x: (x[0], x[1]), reverse=True)
+		for start, end, newlines in edits:
+			self.replace_lines(start, end, newlines)
+
+	def _parse_from(self, lines, startline, editend, resync):
+		"""Parse lines, which start at line startline, until reaching the
+		end of input or the start of an unchanged unit from resync at or
+		after line editend.
+
+		Returns (top-level statements, units, index of the first unit
+		kept, index of its first statement)."""
+		tree = []
+		units = []
+		target = next(resync, None)
+
+		# Every open block, as (isEnder, list of its children)
+		stack = []
+		unitstart = startline
+		unitcount = 0
+		prevend = None
+
+		tokenizer = cmaketokenizer.StatementTokenizer(lines)
+		for func, args, comment in tokenizer:
+			first = startline + tokenizer.startline - 1
+
+			if len(stack) == 0 and prevend is not None and first > prevend:
+				# The last unit is finished, and this line starts a new one
+				units.append([first - unitstart, unitcount])
+				unitstart = first
+				unitcount = 0
+				if first >= editend:
+					while target is not None and target[0] < first:
+						target = next(resync, None)
+					if target is not None and target[0] == first:
+						return (tree, units, target[1], target[2])
+
+			if len(stack) > 0 and stack[-1][0](func):
+				# The ender itself belongs to the enclosing block
+				stack.pop()
+
+			isEnder = cmakeparser.block_ender(func)
+			if isEnder is None:
+				children = None
+			else:
+				children = []
+
+			if len(stack) > 0:
+				stack[-1][1].append((func, args, comment, children))
+			else:
+				tree.append((func, args, comment, children))
+				unitcount = unitcount + 1
+
+			if children is not None:
+				stack.append((isEnder, children))
+			prevend = startline + tokenizer.endline - 1
+
+		if len(stack) > 0:
+			raise cmakeparser.UnclosedChildBlockError
+
+		if prevend is not None:
+			units.append([prevend + 1 - unitstart, unitcount])
+		return (tree, units, len(self.units), len(self.parsetree))
+
+#if __name__ == "__main__":
+#	pass
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Tests for the cmakescript.cmakeincremental module
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import unittest
+import os
+import glob
+import random
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakegrammar
+import cmakeincremental
+import cmakeparser
+
+# format for each:
+# key is the filename - extension
+# value is whatever the variable name suggests
+inputstrings = dict()
+
+## Lines spliced in by the random edits, chosen to open, close and
+## split blocks and statements
+snippets = ["if(A)", "elseif(B)", "else()", "endif()", "foreach(x a b)",
+			"endforeach()", "macro(m)", "endmacro()", "message(hi)", "",
+			"# comment", "set(x \"a", "b\")", "set(y", "c)", "a() b()"]
+
+def setUpModule():
+	cmakes = glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+							'testdata', 'KnownValues', '*.cmake'))
+	cmakes.sort()
+	assert len(cmakes) == 10
+
+	for cmakefn in cmakes:
+		cmakef = open(cmakefn, 'r')
+		inputstrings[os.path.splitext(cmakefn)[0]] = cmakef.read()
+		cmakef.close()
+
+def full_parse(lines):
+	return cmakeparser.parse_string("".join([x + "\n" for x in lines])).parsetree
+
+## Requirement:
+## Re-parsing only the edited regions gives the same tree as a full parse
+class IncrementalEdits(unittest.TestCase):
+
+	subtest = ""
+
+	def testInitialParse(self):
+		"""the initial parse matches parse_string"""
+		self.assertNotEqual(len(inputstrings), 0)
+		for key in inputstrings.keys():
+			self.subtest = key
+			incremental = cmakeincremental.IncrementalParser(inputstrings[key])
+			self.assertEqual(incremental.parsetree,
+							cmakeparser.parse_string(inputstrings[key]).parsetree)
+
+	def testRandomEdits(self):
+		"""random edits of known files give the tree of a full parse"""
+		self.assertNotEqual(len(inputstrings), 0)
+		rand = random.Random(2010)
+		for key in inputstrings.keys():
+			self.subtest = key
+			incremental = cmakeincremental.IncrementalParser(inputstrings[key])
+			for i in range(40):
+				count = len(incremental.lines)
+				start = rand.randint(0, count)
+				end = min(count, start + rand.randint(0, 3))
+				newlines = [rand.choice(snippets) for x in range(rand.randint(0, 3))]
+				lines = incremental.lines[:start] + newlines + incremental.lines[end:]
+
+				try:
+					expected = full_parse(lines)
+				except (cmakegrammar.IncompleteStatementError,
+						cmakeparser.UnclosedChildBlockError):
+					# A failed edit leaves everything as it was
+					before = (list(incremental.lines), list(incremental.parsetree))
+					self.assertRaises((cmakegrammar.IncompleteStatementError,
+									cmakeparser.UnclosedChildBlockError),
+									incremental.replace_lines, start, end, newlines)
+					self.assertEqual((incremental.lines, incremental.parsetree), before)
+					continue
+
+				incremental.replace_lines(start, end, newlines)
+				self.assertEqual(incremental.lines, lines)
+				self.assertEqual(incremental.parsetree, expected)
+				self.assertEqual(full_parse(incremental.text().splitlines()), expected)
+
+	def testOpenBlockSwallowsLaterUnits(self):
+		"""opening a block re-parses the following statements into it"""
+		incremental = cmakeincremental.IncrementalParser(
+			"a()\nb()\nendif()\nc()\n")
+		incremental.replace_lines(1, 1, ["if(X)"])
+		self.assertEqual(incremental.parsetree,
+			[	("a", None, None, None),
+				("if", "X", None, [("b", None, None, None)]),
+				("endif", None, None, None),
+				("c", None, None, None)	])
+
+	def testSeveralEdits(self):
+		"""edits given in terms of the original lines are all applied"""
+		incremental = cmakeincremental.IncrementalParser("a()\nb()\nc()\nd()\n")
+		incremental.apply_edits([(0, 1, ["x()"]), (2, 3, "y()\nz()")])
+		self.assertEqual(incremental.lines, ["x()", "b()", "y()", "z()", "d()"])
+		self.assertEqual(incremental.parsetree, full_parse(incremental.lines))
+
+
+if __name__=="__main__":
+	## Run tests if executed directly
+	try:
+		import nose
+		start = nose.main
+	except (ImportError):
+		start = unittest.main
+
+	start()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""
+Module for remembering which files a tool has already processed
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import os
+import time
+import json
+import hashlib
+import tempfile
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+# - none
+
+## A file modified this many seconds before it was recorded might be
+## modified again without its mtime changing, so it is re-hashed next time.
+RACY_SECONDS = 2
+
+def hash_contents(data):
+	"""Return the hash stored for some file contents or tool output"""
+	return hashlib.sha1(data).hexdigest()
+
+class Manifest():
+	"""A file recording, for each path a tool processed, the path's mtime,
+	size and content hash, and the hash of what the tool made of it.
+
+	All of it is thrown away when the tool's version changes.  A file is
+	unchanged if its mtime and size are the same as recorded, or failing
+	that, if its contents hash the same.
+	"""
+
+	def __init__(self, filename, version):
+		self.filename = filename
+		self.version = version
+		self.entries = {}
+		self._pending = {}
+		self._dirty = False
+
+		try:
+			manifestfile = open(filename, 'r')
+			try:
+				data = json.load(manifestfile)
+			finally:
+				manifestfile.close()
+		except (IOError, ValueError):
+			# No manifest yet, or a damaged one: everything is new
+			return
+
+		if isinstance(data, dict) and data.get("version") == version:
+			# JSON gives back unicode paths, but we look up byte strings
+			self.entries = dict([(path.encode("utf-8"), entry)
+								for path, entry in data.get("files", {}).items()])
+
+	def __len__(self):
+		return len(self.entries)
+
+	def unchanged(self, path):
+		"""Return True if path is the same as when it was last recorded."""
+		path = os.path.abspath(path)
+		info = os.stat(path)
+		entry = self.entries.get(path)
+		if entry is not None and entry["mtime"] == info.st_mtime and entry["size"] == info.st_size:
+			return True
+
+		if entry is not None and entry["size"] != info.st_size:
+			contenthash = None
+		else:
+			contenthash = self._hash_file(path)
+			if entry is not None and entry["hash"] == contenthash:
+				# Only touched: remember the new mtime
+				entry["mtime"] = self._stable_mtime(info)
+				self._dirty = True
+				return True
+
+		self._pending[path] = (info, contenthash)
+		return False
+
+	def record(self, path, output, error=None, rewritten=False):
+		"""Record that path was processed, giving output (or None, with
+		the reason in error).  If rewritten, path has been (or is about
+		to be) replaced by output itself, which is recorded as its
+		contents."""
+		path = os.path.abspath(path)
+		info, contenthash = self._pending.pop(path, (None, None))
+		if rewritten:
+			# Its mtime isn't known yet: the next run checks the hash
+			outputhash = hash_contents(output)
+			self.entries[path] = {	"mtime"		: None,
+									"size"		: len(output),
+									"hash"		: outputhash,
+									"output"	: outputhash,
+									"error"		: None	}
+			self._dirty = True
+			return
+
+		if info is None:
+			info = os.stat(path)
+		if contenthash is None:
+			contenthash = self._hash_file(path)
+
+		if output is not None:
+			output = hash_contents(output)
+		self.entries[path] = {	"mtime"		: self._stable_mtime(info),
+								"size"		: info.st_size,
+								"hash"		: contenthash,
+								"output"	: output,
+								"error"		: error	}
+		self._dirty = True
+
+	def save(self):
+		"""Write the manifest out, if anything changed, replacing the old
+		one all at once."""
+		if not self._dirty:
+			return
+		directory = os.path.dirname(os.path.abspath(self.filename))
+		handle, temp = tempfile.mkstemp(dir=directory)
+		try:
+			out = os.fdopen(handle, 'w')
+			try:
+				json.dump({"version" : self.version, "files" : self.entries},
+						out, indent=1, sort_keys=True)
+			finally:
+				out.close()
+			os.rename(temp, self.filename)
+		except:
+			os.remove(temp)
+			raise
+		self._dirty = False
+
+	def _hash_file(self, path):
+		datafile = open(path, 'rb')
+		try:
+			return hash_contents(datafile.read())
+		finally:
+			datafile.close()
+
+	def _stable_mtime(self, info):
+		if time.time() - info.st_mtime < RACY_SECONDS:
+			return None
+		return info.st_mtime
+
+#if __name__ == "__main__":
+#	pass
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+Tests for the cmakescript.cmakemanifest module
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import unittest
+import os
+import shutil
+import tempfile
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakemanifest
+
+## Requirement:
+## Only files that changed since they were recorded are reported changed
+class ChangedFiles(unittest.TestCase):
+	def setUp(self):
+		self.tempdir = tempfile.mkdtemp()
+		self.manifestfn = os.path.join(self.tempdir, "manifest")
+		self.cmakefn = os.path.join(self.tempdir, "CMakeLists.txt")
+		self.write("project(a)\n", 1000000000)
+
+	def tearDown(self):
+		shutil.rmtree(self.tempdir)
+
+	def write(self, contents, mtime):
+		cmakefile = open(self.cmakefn, 'w')
+		cmakefile.write(contents)
+		cmakefile.close()
+		os.utime(self.cmakefn, (mtime, mtime))
+
+	def recorded(self, version="1"):
+		manifest = cmakemanifest.Manifest(self.manifestfn, version)
+		self.assertFalse(manifest.unchanged(self.cmakefn))
+		manifest.record(self.cmakefn, "project(a)")
+		manifest.save()
+		return cmakemanifest.Manifest(self.manifestfn, version)
+
+	def testUnchanged(self):
+		"""a recorded file is unchanged in the next run"""
+		manifest = self.recorded()
+		self.assertEqual(len(manifest), 1)
+		self.assertTrue(manifest.unchanged(self.cmakefn))
+		entry = manifest.entries[self.cmakefn]
+		self.assertEqual(entry["output"], cmakemanifest.hash_contents("project(a)"))
+		self.assertEqual(entry["hash"], cmakemanifest.hash_contents("project(a)\n"))
+
+	def testTouched(self):
+		"""a file with a new mtime but the same contents is unchanged"""
+		manifest = self.recorded()
+		self.write("project(a)\n", 1000000100)
+		self.assertTrue(manifest.unchanged(self.cmakefn))
+		self.assertEqual(manifest.entries[self.cmakefn]["mtime"], 1000000100)
+
+	def testEdited(self):
+		"""a file with new contents is changed, even with the same size"""
+		manifest = self.recorded()
+		self.write("project(b)\n", 1000000100)
+		self.assertFalse(manifest.unchanged(self.cmakefn))
+		self.write("project(bb)\n", 1000000200)
+		self.assertFalse(manifest.unchanged(self.cmakefn))
+
+	def testRewritten(self):
+		"""a file replaced by its output is unchanged in the next run"""
+		manifest = cmakemanifest.Manifest(self.manifestfn, "1")
+		self.assertFalse(manifest.unchanged(self.cmakefn))
+		manifest.record(self.cmakefn, "project(b)\n", rewritten=True)
+		self.write("project(b)\n", 1000000100)
+		manifest.save()
+		manifest = cmakemanifest.Manifest(self.manifestfn, "1")
+		self.assertTrue(manifest.unchanged(self.cmakefn))
+		self.assertEqual(manifest.entries[self.cmakefn]["mtime"], 1000000100)
+
+	def testNewVersion(self):
+		"""a new tool version forgets every file"""
+		self.recorded("1")
+		manifest = cmakemanifest.Manifest(self.manifestfn, "2")
+		self.assertEqual(len(manifest), 0)
+		self.assertFalse(manifest.unchanged(self.cmakefn))
+
+	def testDamagedManifest(self):
+		"""a damaged manifest is treated as empty"""
+		manifestfile = open(self.manifestfn, 'w')
+		manifestfile.write("{ not json")
+		manifestfile.close()
+		manifest = cmakemanifest.Manifest(self.manifestfn, "1")
+		self.assertEqual(len(manifest), 0)
+
+
+if __name__=="__main__":
+	## Run tests if executed directly
+	try:
+		import nose
+		start = nose.main
+	except (ImportError):
+		start = unittest.main
+
+	start()
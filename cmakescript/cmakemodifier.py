@@ -24,30 +24,83 @@ import re
 ###
 # internal packages
 import cmakegrammar
+import cmaketokenizer
+import cmakeparser
+import cmakestats
 
 grammar = cmakegrammar
 
-class CMakeBlock():
+def intern_func(func):
+	"""Return the shared copy of a command name, so that every statement
+	calling the same command refers to one string."""
+	if func is None:
+		return None
+	return intern(func)
+
+class CMakeBlock(object):
+	"""A block of CMakeStatements, which visitors can modify in place.
+
+	Wrapping a parse tree, getting one back and visiting are all done
+	with an explicit stack rather than by recursion, so blocks can nest
+	as deeply as memory allows.
+	"""
+	__slots__ = ("data",)
+
 	def __init__(self, block):
-		self.data = [CMakeStatement(x) for x in block]
+		self.data = []
+		pending = [(self.data, block)]
+		while len(pending) > 0:
+			data, statements = pending.pop()
+			for func, args, comment, children in statements:
+				statement = CMakeStatement((func, args, comment, None))
+				if children is not None:
+					statement.children = CMakeBlock(())
+					pending.append((statement.children.data, children))
+				data.append(statement)
 
 	def __repr__(self):
 		return repr([repr(x) for x in self.data])
 
+	def __iter__(self):
+		"""Iterate over the statements, like the list of a parse tree"""
+		return iter(self.data)
+
 	def get(self):
-		output = []
-		for x in self.data:
-			output.extend(x.get())
-		return output
+		return tree_of_statements(self.data)
 
 	def accept(self, visitor):
+		"""Visit this block and then each statement, visiting the
+		children of a statement right after it."""
 		visitor.visit_block(self)
-		for x in self.data:
-			x.accept(visitor)
+		stack = [iter(self.data)]
+		while len(stack) > 0:
+			for statement in stack[-1]:
+				visitor.visit_statement(statement)
+				# Read only now, since the visitor may have replaced them
+				children = statement.children
+				if children is not None:
+					visitor.visit_block(children)
+					stack.append(iter(children.data))
+					break
+			else:
+				stack.pop()
+
+class CMakeStatement(object):
+	"""A statement, which visitors can modify in place.
+
+	args is the joined string of a parse tree, and tokens the tuple of
+	argument tokens it splits into, kept in step with it: given by the
+	tokenizer when built straight from source, and otherwise split out
+	the first time they are read, so wrapping a parse tree costs
+	nothing for statements no one looks into.
+	"""
+	__slots__ = ("func", "_args", "_tokens", "comment", "children")
 
-class CMakeStatement():
-	def __init__(self, statement):
-		self.func, self.args, self.comment, children = statement
+	def __init__(self, statement, tokens=None):
+		func, args, self.comment, children = statement
+		self.func = intern_func(func)
+		self._args = args
+		self._tokens = tokens
 		if children is not None:
 			self.children = CMakeBlock(children)
 		else:
@@ -56,13 +109,39 @@ class CMakeStatement():
 	def __repr__(self):
 		return repr( (self.func, self.args, self.comment, repr(self.children) ))
 
+	def __iter__(self):
+		"""Unpack like a (func, args, comment, children) parse tree tuple,
+		so formatters can output a CMakeBlock directly."""
+		return iter((self.func, self.args, self.comment, self.children))
+
+	@property
+	def command(self):
+		"""The lowercase name of the command, as visitors dispatch on"""
+		return command_key(self.func)
+
+	def _get_args(self):
+		return self._args
+
+	def _set_args(self, args):
+		self._args = args
+		self._tokens = None
+
+	args = property(_get_args, _set_args)
+
+	@property
+	def tokens(self):
+		"""The tuple of argument tokens args splits into"""
+		if self._tokens is None:
+			self._tokens = grammar.arg_tokens(self._args)
+		return self._tokens
+
+	@property
+	def kinds(self):
+		"""The kind (cmakegrammar.UNQUOTED, QUOTED...) of each token"""
+		return [grammar.token_kind(x) for x in self.tokens]
+
 	def get(self):
-		if self.func is None:
-			return self.children.get()
-		elif self.children is None:
-			return [(self.func, self.args, self.comment, None )]
-		else:
-			return [(self.func, self.args, self.comment, self.children.get() )]
+		return tree_of_statements([self])
 
 	def replace_with_statements(self, statements):
 		if self.func is not None:
@@ -78,41 +157,163 @@ class CMakeStatement():
 		if self.children is not None:
 			self.children.accept(visitor)
 
+def tree_of_statements(statements):
+	"""Return a parse tree of a list of CMakeStatements.  A statement
+	replaced by others (with a None func) gives those others instead."""
+	tree = []
+	stack = [(iter(statements), tree)]
+	while len(stack) > 0:
+		remaining, block = stack[-1]
+		for statement in remaining:
+			if statement.func is None:
+				stack.append((iter(statement.children.data), block))
+				break
+			elif statement.children is None:
+				block.append((statement.func, statement.args, statement.comment, None))
+			else:
+				children = []
+				block.append((statement.func, statement.args, statement.comment, children))
+				stack.append((iter(statement.children.data), children))
+				break
+		else:
+			stack.pop()
+	return tree
+
+
+## Memo of the lowercase dispatch name of each command name seen
+_commandkeys = {}
+
+def command_key(func):
+	"""Return the lowercase name a command is dispatched by, or None"""
+	try:
+		return _commandkeys[func]
+	except KeyError:
+		if func is None:
+			return None
+		key = _commandkeys[func] = intern(func.lower())
+		return key
+
+## Prefix of the methods handling a command, which can't be confused with
+## the visit_block and visit_statement hooks, even for a command such as
+## block()
+COMMAND_PREFIX = "command_"
+
+## Per visitor class, the command names it has command_<command> methods for
+_handlernames = {}
 
 class CMakeVisitor:
+	"""Base class of tree visitors.
+
+	To handle a particular command, define a method named command_ plus
+	the command name in lowercase, such as command_find_package.  The
+	default visit_statement dispatches to those by looking up the
+	command in a table, so statements a visitor has no method for cost
+	a single dict lookup.  Override visit_statement instead to see
+	every statement.
+	"""
+
+	def __init__(self):
+		pass
+
+	def dispatch_table(self):
+		"""Return a dict from lowercase command name to this visitor's
+		command_<command> method, built once per visitor."""
+		try:
+			return self._dispatch
+		except AttributeError:
+			pass
+
+		names = _handlernames.get(self.__class__)
+		if names is None:
+			names = [x[len(COMMAND_PREFIX):] for x in dir(self.__class__)
+					if x.startswith(COMMAND_PREFIX)]
+			_handlernames[self.__class__] = names
+		self._dispatch = dict([(name, getattr(self, COMMAND_PREFIX + name))
+							for name in names])
+		return self._dispatch
+
+	def visits_every_statement(self):
+		"""Return True if this visitor overrides visit_statement"""
+		return (self.__class__.visit_statement.im_func
+				is not CMakeVisitor.visit_statement.im_func)
 
 	def visit_block(self, block):
 		pass
 
 	def visit_statement(self, statement):
-		pass
+		handler = self.dispatch_table().get(command_key(statement.func))
+		if handler is not None:
+			handler(statement)
 
 
-class VisitorRemoveRedundantConditions(CMakeVisitor):
-	funcs = ["else", "endif", "endmacro", "endfunction", "endforeach", "endwhile"]
-	_reFuncs = (r"(?ix)" +		# case-insensitive and verbose
-						r"(?P<RedundantConditionFuncs>" +
-						"|".join(funcs) +
-						r")$")
-	reFuncs = re.compile(_reFuncs)
+class VisitorPipeline(CMakeVisitor):
+	"""Runs several visitors in a single walk of the tree.
+
+	At each node, the visitors are called in the order given.  Once a
+	visitor replaces a statement with others (leaving its func None),
+	the remaining visitors skip it and visit the replacements instead.
+	If a visitor renames a statement's command, the remaining visitors
+	are dispatched by the new name.
+	"""
+	def __init__(self, *visitors):
+		CMakeVisitor.__init__(self)
+		self.visitors = list(visitors)
+
+		# Visitors that want every statement are called for every command
+		self._default = [(i, x.visit_statement) for i, x in enumerate(visitors)
+						if x.visits_every_statement()]
+		self._table = {}
+		for i, visitor in enumerate(visitors):
+			if visitor.visits_every_statement():
+				continue
+			for name, handler in visitor.dispatch_table().items():
+				self._table.setdefault(name, []).append((i, handler))
+		for handlers in self._table.values():
+			handlers.extend(self._default)
+			handlers.sort(key=lambda x: x[0])
+
+	def visit_block(self, block):
+		for visitor in self.visitors:
+			visitor.visit_block(block)
+
 	def visit_statement(self, statement):
-		if self.reFuncs.match(statement.func):
-			statement.args = None
+		func = statement.func
+		handlers = self._table.get(command_key(func), self._default)
+		done = -1
+		i = 0
+		while i < len(handlers):
+			position, handler = handlers[i]
+			i = i + 1
+			if position <= done:
+				continue
+			done = position
+			handler(statement)
+			if statement.func is not func:
+				if statement.func is None:
+					break
+				func = statement.func
+				handlers = self._table.get(command_key(func), self._default)
+				i = 0
+
+
+class VisitorRemoveRedundantConditions(CMakeVisitor):
+	def remove_args(self, statement):
+		statement.args = None
+
+	command_else = remove_args
+	command_endif = remove_args
+	command_endmacro = remove_args
+	command_endfunction = remove_args
+	command_endforeach = remove_args
+	command_endwhile = remove_args
 
 class VisitorReplaceSubdirs(CMakeVisitor):
-	funcs = ["subdirs"]
-	_reFuncs = (r"(?ix)" +		# case-insensitive and verbose
-						r"(?P<SubdirsFuncs>" +
-						"|".join(funcs) +
-						r")$")
-	reFuncs = re.compile(_reFuncs)
-	def visit_statement(self, statement):
-		if self.reFuncs.match(statement.func):
-			args = grammar.split_args(statement.args)
-			if len(args) == 1:
-				statement.func = "add_subdirectory"
-			else:
-				statement.replace_with_statements([("add_subdirectory", x, None, None) for x in args ])
+	def command_subdirs(self, statement):
+		args = statement.tokens
+		if len(args) == 1:
+			statement.func = "add_subdirectory"
+		else:
+			statement.replace_with_statements([("add_subdirectory", x, None, None) for x in args ])
 
 class VisitorFindModuleDependencies(CMakeVisitor):
 	def __init__(self):
@@ -123,43 +324,69 @@ class VisitorFindModuleDependencies(CMakeVisitor):
 		self.files = []
 		self.optionalfiles = []
 		self.directories = []
-	def visit_statement(self, statement):
-		if re.match(r"(?i)find_package$", statement.func):
-			args = grammar.split_args(statement.args)
-			if args[0]:
-				self.findmodules.append("Find"+args[0])
-		elif re.match(r"(?i)include$", statement.func):
-			args = grammar.split_args(statement.args)
-			if args[0]:
-				if re.search(r"(?i)[/.]", args[0]):
-					file = args[0]
-					module = None
+
+	def command_find_package(self, statement):
+		args = statement.tokens
+		if len(args) > 0:
+			self.findmodules.append("Find"+args[0])
+
+	def command_include(self, statement):
+		args = statement.tokens
+		if len(args) > 0:
+			if re.search(r"(?i)[/.]", args[0]):
+				if "OPTIONAL" in args:
+					self.optionalfiles.append(args[0])
 				else:
-					file = None
-					module = args[0]
+					self.files.append(args[0])
+			else:
 				if "OPTIONAL" in args:
-					self.optionalmodules.append(module)
-					self.optionalfiles.append(file)
+					self.optionalmodules.append(args[0])
 				else:
-					self.modules.append(module)
-					self.files.append(file)
-		elif re.match(r"(?i)add_subdirectory$", statement.func):
-			args = grammar.split_args(statement.args)
-			if args[0]:
-				self.directories.append(args[0])
-		self.findmodules = [x for x in self.findmodules if x is not None]
-		self.modules = [x for x in self.modules if x is not None]
-		self.optionalmodules = [x for x in self.optionalmodules if x is not None]
-		self.files = [x for x in self.files if x is not None]
-		self.optionalfiles = [x for x in self.optionalfiles if x is not None]
-		self.directories = [x for x in self.directories if x is not None]
+					self.modules.append(args[0])
 
+	def command_add_subdirectory(self, statement):
+		args = statement.tokens
+		if len(args) > 0:
+			self.directories.append(args[0])
+
+
+def build_block(lines):
+	"""Build a CMakeBlock straight from lines of CMake source, such as an
+	open file object, without creating a parse tree of tuples first."""
+	root = CMakeBlock([])
+	stack = [root]
+	tokenizer = cmaketokenizer.StatementTokenizer(lines, keeptokens=True)
+	for event, statement in cmakeparser.iter_statements(tokenizer):
+		if event == cmakeparser.BLOCK_END:
+			stack.pop()
+			continue
+
+		node = CMakeStatement(statement + (None,), tokenizer.tokens)
+		stack[-1].data.append(node)
+		if event == cmakeparser.BLOCK_START:
+			node.children = CMakeBlock([])
+			stack.append(node.children)
+	return root
+
+def cleanup_visitors():
+	"""Return a new instance of every cleanup visitor, in the order they
+	should be applied."""
+	return [VisitorRemoveRedundantConditions(), VisitorReplaceSubdirs()]
+
+def cleanup_block(tree):
+	"""Apply all cleanup visitors in one walk, and return the cleaned
+	CMakeBlock.  tree may be a parse tree or a CMakeBlock, which is
+	modified in place."""
+	with cmakestats.timer("visit"):
+		if isinstance(tree, CMakeBlock):
+			rootBlock = tree
+		else:
+			rootBlock = CMakeBlock(tree)
+		rootBlock.accept(VisitorPipeline(*cleanup_visitors()))
+	return rootBlock
 
 def apply_all_cleanup_visitors(tree):
-	rootBlock = CMakeBlock(tree)
-	rootBlock.accept(VisitorRemoveRedundantConditions())
-	rootBlock.accept(VisitorReplaceSubdirs())
-	return rootBlock.get()
+	return cleanup_block(tree).get()
 
 #if __name__ == "__main__":
 #	pass
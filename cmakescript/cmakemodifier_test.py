@@ -27,7 +27,10 @@ import glob
 
 ###
 # internal packages
+import cmakegrammar
 import cmakemodifier
+import cmakeparser
+import cmakeparser_test
 import findcmakescripts
 
 # format for each:
@@ -36,10 +39,12 @@ import findcmakescripts
 inputparse = dict()
 expectedoutput = dict()
 
-def setUp():
-	infiles = glob.glob(os.path.split(__file__)[0] + '/testdata/Modifications/*.parse')
+def setUpModule():
+	testdata = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+								'testdata', 'Modifications')
+	infiles = glob.glob(os.path.join(testdata, '*.parse'))
 	infiles.sort()
-	outfiles = glob.glob(os.path.split(__file__)[0] + '/testdata/Modifications/*.output')
+	outfiles = glob.glob(os.path.join(testdata, '*.output'))
 	outfiles.sort()
 
 	assert len(outfiles) == len(infiles)
@@ -63,6 +68,9 @@ def setUp():
 		indata = eval(inputstr)
 		outdata = eval(outputstr)
 
+		inputparse[ibase] = indata
+		expectedoutput[ibase] = outdata
+
 	dataKeys = inputparse.keys()
 
 
@@ -86,6 +94,207 @@ class ExpectedCleanup(unittest.TestCase):
 			self.subtest = key
 			self.assertEqual(cmakemodifier.apply_all_cleanup_visitors(inparse), expected)
 
+## Requirement:
+## A pipeline runs every visitor in one walk, in order at each node
+class RecordingVisitor(cmakemodifier.CMakeVisitor):
+	def __init__(self, name, log):
+		cmakemodifier.CMakeVisitor.__init__(self)
+		self.name = name
+		self.log = log
+
+	def visit_statement(self, statement):
+		self.log.append((self.name, statement.func))
+
+class Pipeline(unittest.TestCase):
+
+	subtest = ""
+
+	def testVisitOrder(self):
+		"""each statement is visited by every visitor before the next statement"""
+		log = []
+		tree = [("if", "A", None, [("foo", None, None, None)]),
+				("endif", None, None, None)]
+		block = cmakemodifier.CMakeBlock(tree)
+		block.accept(cmakemodifier.VisitorPipeline(RecordingVisitor(1, log),
+												RecordingVisitor(2, log)))
+		self.assertEqual(log, [	(1, "if"), (2, "if"),
+								(1, "foo"), (2, "foo"),
+								(1, "endif"), (2, "endif")	])
+
+	def testReplacedStatements(self):
+		"""later visitors see the statements that replaced a statement"""
+		log = []
+		block = cmakemodifier.CMakeBlock([("subdirs", "a b", None, None)])
+		block.accept(cmakemodifier.VisitorPipeline(
+			cmakemodifier.VisitorReplaceSubdirs(), RecordingVisitor(2, log)))
+		self.assertEqual(log, [(2, "add_subdirectory"), (2, "add_subdirectory")])
+
+	def testCleanupBlockMatchesSeparateWalks(self):
+		"""one fused walk cleans up the same as one walk per visitor"""
+		self.assertNotEqual(len(inputparse), 0)
+		for key in inputparse.keys():
+			self.subtest = key
+			block = cmakemodifier.CMakeBlock(inputparse[key])
+			for visitor in cmakemodifier.cleanup_visitors():
+				block.accept(visitor)
+			self.assertEqual(cmakemodifier.cleanup_block(inputparse[key]).get(),
+							block.get())
+
+## Requirement:
+## Visitors are dispatched by command name, ignoring case
+class CountingVisitor(cmakemodifier.CMakeVisitor):
+	def __init__(self):
+		cmakemodifier.CMakeVisitor.__init__(self)
+		self.seen = []
+
+	def command_add_subdirectory(self, statement):
+		self.seen.append(statement.args)
+
+class Dispatch(unittest.TestCase):
+	def testCaseInsensitive(self):
+		"""a command_<command> method is called for any spelling of the command"""
+		visitor = CountingVisitor()
+		block = cmakemodifier.CMakeBlock([("ADD_SUBDIRECTORY", "a", None, None),
+										("Add_Subdirectory", "b", None, None),
+										("add_executable", "c", None, None),
+										("", None, "# comment", None)])
+		block.accept(visitor)
+		self.assertEqual(visitor.seen, ["a", "b"])
+
+	def testBlockCommand(self):
+		"""a block() command is dispatched apart from the visit_block hook"""
+		class BlockVisitor(cmakemodifier.CMakeVisitor):
+			def __init__(self):
+				cmakemodifier.CMakeVisitor.__init__(self)
+				self.blocks = 0
+				self.commands = []
+			def visit_block(self, block):
+				self.blocks = self.blocks + 1
+			def command_block(self, statement):
+				self.commands.append(statement.args)
+		visitor = BlockVisitor()
+		block = cmakemodifier.CMakeBlock([("block", "SCOPE_FOR VARIABLES", None, None),
+										("endblock", None, None, None)])
+		block.accept(visitor)
+		self.assertEqual(visitor.blocks, 1)
+		self.assertEqual(visitor.commands, ["SCOPE_FOR VARIABLES"])
+
+	def testRenamedStatements(self):
+		"""later visitors in a pipeline are dispatched by a renamed command"""
+		visitor = CountingVisitor()
+		block = cmakemodifier.CMakeBlock([("SUBDIRS", "a", None, None),
+										("subdirs", "b c", None, None)])
+		block.accept(cmakemodifier.VisitorPipeline(
+			cmakemodifier.VisitorReplaceSubdirs(), visitor))
+		self.assertEqual(visitor.seen, ["a", "b", "c"])
+
+	def testStatementNames(self):
+		"""statements give their lowercase command and their tokens"""
+		block = cmakemodifier.CMakeBlock([("SUBDIRS", "a b", None, None),
+										("ENDIF", None, None, None)])
+		self.assertEqual(block.data[0].command, "subdirs")
+		self.assertEqual(block.data[0].tokens, ("a", "b"))
+		self.assertEqual(block.data[1].tokens, ())
+
+	def testTokensFollowArgs(self):
+		"""tokens come from the tokenizer, and change along with args"""
+		block = cmakemodifier.build_block(['set(a "b c")', 'endif(x)'])
+		self.assertEqual(block.data[0].tokens, ("a", '"b c"'))
+		self.assertEqual(block.data[0].kinds, [cmakegrammar.UNQUOTED, cmakegrammar.QUOTED])
+		self.assertFalse(hasattr(block.data[0], "__dict__"))
+		block.data[0].args = "d"
+		self.assertEqual(block.data[0].tokens, ("d",))
+		block.accept(cmakemodifier.VisitorRemoveRedundantConditions())
+		self.assertEqual(block.data[1].args, None)
+		self.assertEqual(block.data[1].tokens, ())
+
+	def testTokensSplitWhenRead(self):
+		"""wrapping a parse tree splits no arguments until they are read"""
+		split = []
+		saved = cmakegrammar.arg_tokens
+		def arg_tokens(args):
+			split.append(args)
+			return saved(args)
+		cmakegrammar.arg_tokens = arg_tokens
+		try:
+			block = cmakemodifier.CMakeBlock([("set", "a b", None, None),
+											("if", "x", None, [("set", "c d", None, None)])])
+			self.assertEqual(split, [])
+			self.assertEqual(block.data[1].children.data[0].tokens, ("c", "d"))
+			self.assertEqual(block.data[1].children.data[0].tokens, ("c", "d"))
+			self.assertEqual(split, ["c d"])
+		finally:
+			cmakegrammar.arg_tokens = saved
+
+	def testDependencies(self):
+		"""the dependency visitor sorts includes into modules and files"""
+		visitor = cmakemodifier.VisitorFindModuleDependencies()
+		block = cmakemodifier.CMakeBlock([("find_package", "Foo REQUIRED", None, None),
+										("INCLUDE", "CTest", None, None),
+										("include", "extra.cmake OPTIONAL", None, None)])
+		block.accept(visitor)
+		self.assertEqual(visitor.findmodules, ["FindFoo"])
+		self.assertEqual(visitor.modules, ["CTest"])
+		self.assertEqual(visitor.optionalfiles, ["extra.cmake"])
+		self.assertEqual(visitor.files + visitor.optionalmodules, [])
+
+## Requirement:
+## Building nodes straight from the source matches wrapping a parse tree
+class DirectBuild(unittest.TestCase):
+
+	subtest = ""
+
+	def testBuildKnownFiles(self):
+		"""build_block on a known-good file gives the same tree as its parse"""
+		cmakes = glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+										'testdata', 'KnownValues', '*.cmake'))
+		self.assertNotEqual(len(cmakes), 0)
+		for cmakefn in cmakes:
+			self.subtest = cmakefn
+			expected = cmakeparser.parse_file(cmakefn).parsetree
+			cmakefile = open(cmakefn, 'r')
+			block = cmakemodifier.build_block(cmakefile)
+			cmakefile.close()
+			self.assertEqual(block.get(), expected)
+
+	def testCompactNodes(self):
+		"""nodes carry no per-instance dict and share command names"""
+		block = cmakemodifier.build_block(["set(a b)", "SET(c d)", "set(e f)"])
+		self.assertFalse(hasattr(block, "__dict__"))
+		self.assertFalse(hasattr(block.data[0], "__dict__"))
+		self.assertTrue(block.data[0].func is block.data[2].func)
+
+## Requirement:
+## Blocks nested deeper than the recursion limit can be wrapped and visited
+class DeepNesting(unittest.TestCase):
+	def setUp(self):
+		depth = cmakeparser_test.deepnesting
+		self.tree = cmakeparser.parse_string(
+			cmakeparser_test.nested_source(depth)).parsetree
+
+	def testWrapAndGet(self):
+		"""a deep tree wrapped in a CMakeBlock gives back the same tree"""
+		block = cmakemodifier.CMakeBlock(self.tree)
+		self.assertEqual(cmakeparser_test.walk(block.get()),
+						cmakeparser_test.walk(self.tree))
+
+	def testVisitDeepTree(self):
+		"""every statement of a deep tree is visited, in order"""
+		log = []
+		cmakemodifier.CMakeBlock(self.tree).accept(RecordingVisitor("a", log))
+		self.assertEqual(log,
+						[("a", func) for level, func in cmakeparser_test.walk(self.tree)])
+
+	def testCleanupDeepTree(self):
+		"""cleaning up a deep tree replaces statements at every level"""
+		depth = cmakeparser_test.deepnesting
+		tree = cmakeparser.parse_string(cmakeparser_test.nested_source(depth).replace(
+			"foo()", "subdirs(a b)")).parsetree
+		walked = cmakeparser_test.walk(cmakemodifier.cleanup_block(tree).get())
+		self.assertEqual(walked[depth:depth + 2], [(depth, "add_subdirectory"),
+													(depth, "add_subdirectory")])
+		self.assertEqual(len(walked), len(cmakeparser_test.walk(tree)) + 1)
+
 if __name__=="__main__":
 	## Run tests if executed directly
 	try:
@@ -16,6 +16,7 @@ Iowa State University HCI Graduate Program/VRAC
 ###
 # standard packages
 import re
+import mmap
 
 ###
 # third-party packages
@@ -24,34 +25,135 @@ import re
 ###
 # internal packages
 import cmakegrammar
+import cmaketokenizer
+import cmakestats
 
 grammar = cmakegrammar
 
 class UnclosedChildBlockError(Exception):
 	pass
 
+## Deprecated: no longer raised since statements come from the single-pass
+## tokenizer, but kept for code that catches it
 class InputExhaustedError(Exception):
 	pass
 
+## Events produced by iter_statements
+STATEMENT = "statement"
+BLOCK_START = "blockstart"
+BLOCK_END = "blockend"
+
 def parse_string(instr):
 	parser = CMakeParser(ParseInput(instr))
 	parser.parse()
 	return parser
 
-def parse_file(filename):
-	cmakefile = open(filename, 'r')
-	instr = cmakefile.read()
-	cmakefile.close()
-	return parse_string(instr)
+def parse_buffer(buf):
+	"""Parse a string or other buffer, such as an mmap, in place."""
+	parser = CMakeParser(ParseInput(cmaketokenizer.BufferTokenizer(buf)))
+	parser.parse()
+	return parser
+
+def parse_file(filename, mapped=False, cache=None):
+	"""Parse a file.  If mapped is true, the file is memory-mapped and
+	scanned in place instead of being read into a string first.  If a
+	cache (such as a cmakecache.ParseCache) is given, it is asked for the
+	parse instead."""
+	parser = _parse_file(filename, mapped, cache)
+	if cmakestats.active is not None:
+		cmakestats.active.count_tree(parser.parsetree)
+	return parser
+
+def _parse_file(filename, mapped, cache):
+	"""parse_file, without counting the statements parsed"""
+	if cache is not None:
+		with cmakestats.timer("cached parse"):
+			return cache.parse_file(filename, mapped)
+
+	if not mapped:
+		with cmakestats.timer("read"):
+			cmakefile = open(filename, 'r')
+			instr = cmakefile.read()
+			cmakefile.close()
+		cmakestats.count("bytes", len(instr))
+		with cmakestats.timer("parse"):
+			return parse_string(instr)
+
+	with cmakestats.timer("read"):
+		buf = map_file(filename)
+	if buf is not None:
+		cmakestats.count("bytes", len(buf))
+	with cmakestats.timer("parse"):
+		if buf is None:
+			return parse_string("")
+		try:
+			return parse_buffer(buf)
+		finally:
+			buf.close()
+
+def map_file(filename):
+	"""Return a read-only mmap of a file, or None if the file is empty
+	(empty files can't be mapped)."""
+	cmakefile = open(filename, 'rb')
+	try:
+		try:
+			return mmap.mmap(cmakefile.fileno(), 0, access=mmap.ACCESS_READ)
+		except ValueError:
+			return None
+	finally:
+		cmakefile.close()
+
+def block_ender(func):
+	"""Return a function matching the statements that end a block
+	started by func, or None if func can have no children."""
+	if grammar.reBlockBeginnings.match(func):
+		return grammar.dReBlockTagsDict[func.lower()].match
+	return None
+
+def iter_statements(lines):
+	"""Generate (event, statement) pairs while reading lines of CMake
+	source, such as an open file object, without building a parse tree.
+	lines may also be a cmaketokenizer.StatementTokenizer, whose
+	startline and tokens then describe each STATEMENT or BLOCK_START
+	statement while it is the latest event.
+
+	Statements are (func, args, comment) tuples.  A statement that can
+	have children comes as a BLOCK_START event, and its children are
+	followed by a BLOCK_END event carrying the same statement.  Any
+	other statement is a STATEMENT event.  Only the currently open
+	blocks are kept in memory.
+	"""
+	enders = []
+	openers = []
+	if not isinstance(lines, cmaketokenizer.StatementTokenizer):
+		lines = cmaketokenizer.StatementTokenizer(lines)
+	for statement in lines:
+		func = statement[0]
+		if len(enders) > 0 and enders[-1](func):
+			# The ender itself belongs to the enclosing block
+			enders.pop()
+			yield (BLOCK_END, openers.pop())
+
+		isEnder = block_ender(func)
+		if isEnder is None:
+			yield (STATEMENT, statement)
+		else:
+			enders.append(isEnder)
+			openers.append(statement)
+			yield (BLOCK_START, statement)
+
+	if len(enders) > 0:
+		raise UnclosedChildBlockError
 
 class ParseInput():
 	"""Class providing an iterable interface to the parser's input"""
 
 	def __init__(self, strdata):
-		self._data = strdata.splitlines()
-		# Add a None to the end as a sentry.
-		self._data.append(None)
-		self._lineindex = 0
+		if isinstance(strdata, basestring):
+			strdata = cmaketokenizer.tokenize_string(strdata)
+		# Otherwise, we were handed statements (such as a tokenizer)
+		self._statements = iter(strdata)
+		self._current = None
 		self.alldone = False
 		self.gotline = False
 		self.alreadyseen = False
@@ -61,50 +163,34 @@ class ParseInput():
 		return self
 
 	def next(self):
-		"""Return the current line each time we are iterated.
-		We don't go to the next line unless we've been accepted."""
+		"""Return the current statement each time we are iterated.
+		We don't go to the next statement unless we've been accepted."""
 
 		# Will always hit this condition if all works well
-		if self._lineindex == len(self._data):
-			self.alldone = True
+		if self.alldone:
 			raise StopIteration
 
-		# If we break, break big
-		assert self._lineindex < len(self._data)
+		if not self.gotline:
+			try:
+				self._current = self._statements.next()
+			except StopIteration:
+				# An all-None statement is the end of file sentry.
+				self._current = (None, None, None)
 
-		# OK, we can actually return the data now
 		self.alreadyseen = self.gotline
 		self.gotline = True
-		return self._data[self._lineindex]
+		return self._current
 
 	def accept(self):
-		"""Signal that we've processed this line and should go to the next"""
+		"""Signal that we've processed this statement and should go to the next"""
 
-		# We shouldn't accept a line we haven't even seen
+		# We shouldn't accept a statement we haven't even seen
 		assert self.gotline
 
-		self._lineindex = self._lineindex + 1
+		if self._current[0] is None:
+			self.alldone = True
 		self.gotline = False
 
-	def merge(self):
-		# Don't want to merge current line with the next if we don't
-		# know what the current line is
-		assert self.gotline
-
-		ln = self._lineindex
-		if len(self._data) <= ln + 2:
-			# we want 2 - one more text line, and the EOF sentinel
-			raise InputExhaustedError
-		newdata = self._data[:ln] + [self._data[ln] + "\n" + self._data[ln+1]]
-		newdata.extend(self._data[ln+2:])
-		# Make sure we didn't change anything - leave off end of file sentinel
-		old = "\n".join(self._data[:-1])
-		thenew = "\n".join(newdata[:-1])
-		assert old == thenew
-
-		self._data = newdata
-		return self._data[ln]
-
 class CMakeParser():
 
 	def __init__(self, parseinput):
@@ -117,47 +203,51 @@ class CMakeParser():
 			self.parsetree = []
 
 	def parse_block_children(self, startTag):
+		"""Return the statements up to the end of the block started by
+		startTag, or to the end of input if startTag is None, as a parse
+		tree, or None if startTag can have no children.
+
+		The blocks nested inside are kept on an explicit stack rather than
+		parsed by recursion, so how deep they nest is limited only by
+		memory.  The ender of the block itself is left unaccepted.
+		"""
 		if startTag is None:
-			# AKA, the block is the entire file
-			isEnder = lambda x: (x is None)
-
-		elif grammar.reBlockBeginnings.match(startTag):
-			# can have children
-			endblock = grammar.dReBlockTagsDict[startTag.lower()]
-			isEnder = endblock.match
+			# AKA, the block is the entire file: only the end of input ends it
+			isEnder = lambda x: False
 
 		else:
-			# This function can have no children
-			return None
+			isEnder = block_ender(startTag)
+			if isEnder is None:
+				# This function can have no children
+				return None
 
 		block = []
-		for line in self.input:
-			# Keep merging lines until we either:
-			# - successfully parse
-			# - run out of input (that is, input contains incomplete statement)
-			while 1:
-				try:
-					func, args, comment = grammar.parse_line(line)
-				except grammar.IncompleteStatementError:
-					try:
-						line = self.input.merge()
-					except InputExhaustedError:
-						raise grammar.IncompleteStatementError
-				else:
-					# If no exception in parsing, break out
-					# of this while loop: we can keep going now
-					break
-
-			if startTag == None and isEnder(func):
-				return block
-			elif func is not None and isEnder(func) and not self.input.alreadyseen:
-				return block
-
-			# Not an ender, so we accept this child.
+		# (isEnder, block) of each block enclosing the one being read
+		enclosing = []
+		for func, args, comment in self.input:
+			if func is None:
+				if startTag is None and len(enclosing) == 0:
+					return block
+				# Input ended inside a block
+				break
+
+			if isEnder(func):
+				if len(enclosing) == 0:
+					return block
+				# The ender itself belongs to the enclosing block
+				isEnder, block = enclosing.pop()
+
+			# Not an ender of this block, so we accept this child.
 			self.input.accept()
-			children = self.parse_block_children(func)
-			statement = ( func, args, comment, children)
-			block.append( statement )
+			childEnder = block_ender(func)
+			if childEnder is None:
+				block.append( ( func, args, comment, None) )
+			else:
+				children = []
+				block.append( ( func, args, comment, children) )
+				enclosing.append( (isEnder, block) )
+				isEnder = childEnder
+				block = children
 
 		# If we make it this far, we never found our Ender.
 		raise UnclosedChildBlockError
@@ -18,6 +18,7 @@ Iowa State University HCI Graduate Program/VRAC
 import unittest
 import re
 import os
+import sys
 import glob
 
 ###
@@ -44,10 +45,12 @@ parsedstrings = dict()
 parseduppers = dict()
 parsedlowers = dict()
 
-def setUp():
-	cmakes = glob.glob(os.path.split(__file__)[0] + '/testdata/KnownValues/*.cmake')
+def setUpModule():
+	knownvalues = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+								'testdata', 'KnownValues')
+	cmakes = glob.glob(os.path.join(knownvalues, '*.cmake'))
 	cmakes.sort()
-	parses = glob.glob(os.path.split(__file__)[0] + '/testdata/KnownValues/*.parse')
+	parses = glob.glob(os.path.join(knownvalues, '*.parse'))
 	parses.sort()
 
 	assert len(parses) == len(cmakes)
@@ -127,6 +130,16 @@ class KnownValues(unittest.TestCase):
 			out = cmakeparser.parse_file(cmakefn)
 			self.assertEqual(out.parsetree, expected)
 
+	def testFullParseKnownMappedFile(self):
+		"""passing in a known-good input filename to the memory-mapped parser"""
+		self.assertNotEqual(len(inputfiles), 0)
+		for key in inputfiles.keys():
+			cmakefn = inputfiles[key]
+			expected = parsedfiles[key]
+			self.subtest = key
+			out = cmakeparser.parse_file(cmakefn, mapped=True)
+			self.assertEqual(out.parsetree, expected)
+
 	def testFullParseKnownUppercaseString(self):
 		"""passing in a known-good uppercased string to the full parser"""
 		for key in inputuppers.keys():
@@ -149,6 +162,99 @@ class KnownValues(unittest.TestCase):
 	#def testToKnownParsesWhitespace(self):
 	#	pass
 
+## Requirement:
+## Streaming statements must describe the same tree as a full parse
+class StreamingStatements(unittest.TestCase):
+
+	subtest = ""
+
+	def buildTree(self, events):
+		"""Reassemble a nested parse tree from iter_statements events"""
+		stack = [[]]
+		for event, (func, args, comment) in events:
+			if event == cmakeparser.BLOCK_END:
+				stack.pop()
+			elif event == cmakeparser.BLOCK_START:
+				children = []
+				stack[-1].append((func, args, comment, children))
+				stack.append(children)
+			else:
+				stack[-1].append((func, args, comment, None))
+		self.assertEqual(len(stack), 1)
+		return stack[0]
+
+	def testStreamKnownFile(self):
+		"""streaming a known-good file gives events matching its parse"""
+		self.assertNotEqual(len(inputfiles), 0)
+		for key in inputfiles.keys():
+			self.subtest = key
+			cmakefile = open(inputfiles[key], 'r')
+			events = list(cmakeparser.iter_statements(cmakefile))
+			cmakefile.close()
+			self.assertEqual(self.buildTree(events), parsedfiles[key])
+
+	def testStreamUnclosedBlock(self):
+		"""streaming a block that is never closed raises"""
+		lines = ["if(WIN32)", "  foo()"]
+		self.assertRaises(cmakeparser.UnclosedChildBlockError,
+						list, cmakeparser.iter_statements(lines))
+
+## Requirement:
+## Blocks may nest deeper than the Python recursion limit
+
+## Nesting depth well past the recursion limit
+deepnesting = sys.getrecursionlimit() * 5
+
+def nested_source(depth):
+	"""Return CMake source with if() blocks nested depth deep, each
+	with an else()"""
+	return "if(A)\n" * depth + "foo()\n" + "else()\nbar()\nendif()\n" * depth
+
+def walk(tree):
+	"""Return a list of (nesting level, func) of every statement in a
+	parse tree, in order, without recursion"""
+	walked = []
+	stack = [iter(tree)]
+	while len(stack) > 0:
+		for statement in stack[-1]:
+			walked.append((len(stack) - 1, statement[0]))
+			if statement[3] is not None:
+				stack.append(iter(statement[3]))
+				break
+		else:
+			stack.pop()
+	return walked
+
+class DeepNesting(unittest.TestCase):
+	def testParseDeepString(self):
+		"""parsing deeply nested blocks gives every level"""
+		tree = cmakeparser.parse_string(nested_source(deepnesting)).parsetree
+		walked = walk(tree)
+		self.assertEqual(len(walked), 4 * deepnesting + 1)
+		self.assertEqual(walked[deepnesting], (deepnesting, "foo"))
+		self.assertEqual(walked[deepnesting + 1], (deepnesting - 1, "else"))
+		self.assertEqual(walked[-1], (0, "endif"))
+
+	def testStreamMatchesParse(self):
+		"""streaming deeply nested blocks matches the full parse"""
+		source = nested_source(deepnesting)
+		tree = cmakeparser.parse_string(source).parsetree
+		walked = []
+		level = 0
+		for event, statement in cmakeparser.iter_statements(source.splitlines()):
+			if event == cmakeparser.BLOCK_END:
+				level = level - 1
+				continue
+			walked.append((level, statement[0]))
+			if event == cmakeparser.BLOCK_START:
+				level = level + 1
+		self.assertEqual(walked, walk(tree))
+
+	def testDeepUnclosedBlock(self):
+		"""deeply nested blocks that are never closed raise"""
+		self.assertRaises(cmakeparser.UnclosedChildBlockError,
+						cmakeparser.parse_string, "if(A)\n" * deepnesting)
+
 ## Requirement:
 ## Parsing invalid source trees should fail
 # TODO
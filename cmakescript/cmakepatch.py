@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Module for writing the changes a tool made to files as unified diffs
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import os
+import re
+import sys
+import difflib
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+# - none
+
+## Lines of unchanged context around each change
+DEFAULT_CONTEXT = 3
+
+## Bytes of patch output buffered before writing
+BUFFER_SIZE = 1 << 16
+
+## Marker git and patch expect after a line with no newline
+_nonewline = "\\ No newline at end of file\n"
+
+def patch_path(path, root=None):
+	"""Return the name a patch uses for path: relative to root (the
+	current directory by default), with / between directories."""
+	if root is None:
+		root = os.getcwd()
+	relative = os.path.relpath(os.path.abspath(path), os.path.abspath(root))
+	return "/".join(relative.split(os.sep))
+
+def unified_diff(name, original, modified, context=DEFAULT_CONTEXT):
+	"""Return a unified diff turning the string original into modified,
+	both contents of the file name, as git apply and patch -p1 take it,
+	or "" if they are the same."""
+	if original == modified:
+		return ""
+	lines = ["diff --git a/%s b/%s\n" % (name, name)]
+	for line in difflib.unified_diff(original.splitlines(True),
+									modified.splitlines(True),
+									"a/" + name, "b/" + name,
+									n=context, lineterm="\n"):
+		lines.append(line)
+		if not line.endswith("\n"):
+			lines.append("\n")
+			lines.append(_nonewline)
+	return "".join(lines)
+
+class PatchWriter():
+	"""Writes unified diffs of changed files, all into a single patch
+	file, or each into its own numbered file in a directory.
+
+	Output is buffered and written by this process alone: no diff tool
+	is run.  A patch file of "-" is standard output.
+	"""
+
+	def __init__(self, patchfile=None, patchdir=None, root=None,
+				context=DEFAULT_CONTEXT):
+		assert (patchfile is None) != (patchdir is None)
+		self.patchdir = patchdir
+		self.root = root
+		self.context = context
+		self.files = 0
+		self.changed = 0
+		self._out = None
+		if patchfile == "-":
+			self._out = sys.stdout
+		elif patchfile is not None:
+			self._out = open(patchfile, 'wb', BUFFER_SIZE)
+		elif not os.path.isdir(patchdir):
+			os.makedirs(patchdir)
+
+	def add(self, path, original, modified):
+		"""Write the diff turning original into modified for the file at
+		path, if they differ.  Returns True if they did."""
+		self.files = self.files + 1
+		name = patch_path(path, self.root)
+		diff = unified_diff(name, original, modified, self.context)
+		if diff == "":
+			return False
+
+		self.changed = self.changed + 1
+		if self.patchdir is None:
+			self._out.write(diff)
+		else:
+			patchname = "%04d-%s.patch" % (self.changed,
+											re.sub(r"[^\w.-]+", "-", name))
+			out = open(os.path.join(self.patchdir, patchname), 'wb')
+			try:
+				out.write(diff)
+			finally:
+				out.close()
+		return True
+
+	def close(self):
+		if self._out is sys.stdout:
+			self._out.flush()
+		elif self._out is not None:
+			self._out.close()
+		self._out = None
+
+#if __name__ == "__main__":
+#	pass
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Tests for the cmakescript.cmakepatch module
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import unittest
+import os
+import shutil
+import tempfile
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakepatch
+
+## Requirement:
+## Diffs are unified diffs with a/ and b/ paths, as git apply takes
+class UnifiedDiffs(unittest.TestCase):
+	def testUnchanged(self):
+		"""identical contents give no diff"""
+		self.assertEqual(cmakepatch.unified_diff("CMakeLists.txt", "a\n", "a\n"), "")
+
+	def testChangedLine(self):
+		"""a changed line is removed and added, with context"""
+		diff = cmakepatch.unified_diff("src/CMakeLists.txt",
+									"project(a)\nSET(b c)\nfoo()\n",
+									"project(a)\nset(b c)\nfoo()\n")
+		self.assertEqual(diff,	"diff --git a/src/CMakeLists.txt b/src/CMakeLists.txt\n"
+								"--- a/src/CMakeLists.txt\n"
+								"+++ b/src/CMakeLists.txt\n"
+								"@@ -1,3 +1,3 @@\n"
+								" project(a)\n"
+								"-SET(b c)\n"
+								"+set(b c)\n"
+								" foo()\n")
+
+	def testNoNewlineAtEnd(self):
+		"""a last line without a newline is marked as such"""
+		diff = cmakepatch.unified_diff("x.cmake", "foo()", "foo()\n")
+		self.assertTrue(diff.endswith("-foo()\n"
+									"\\ No newline at end of file\n"
+									"+foo()\n"))
+
+	def testPatchPath(self):
+		"""patch paths are relative to the root, with / separators"""
+		root = os.path.abspath("top")
+		self.assertEqual(cmakepatch.patch_path(os.path.join(root, "a", "b.cmake"), root),
+						"a/b.cmake")
+
+## Requirement:
+## Only changed files are written, to one patch or one per file
+class WritePatches(unittest.TestCase):
+	def setUp(self):
+		self.tempdir = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.tempdir)
+
+	def addFiles(self, writer):
+		writer.add(os.path.join(self.tempdir, "CMakeLists.txt"), "A()\n", "a()\n")
+		writer.add(os.path.join(self.tempdir, "same.cmake"), "b()\n", "b()\n")
+		writer.add(os.path.join(self.tempdir, "sub", "CMakeLists.txt"), "C()\n", "c()\n")
+		writer.close()
+		self.assertEqual((writer.files, writer.changed), (3, 2))
+
+	def testSinglePatch(self):
+		"""every changed file goes into one patch, in order"""
+		patchfn = os.path.join(self.tempdir, "out.patch")
+		self.addFiles(cmakepatch.PatchWriter(patchfn, root=self.tempdir))
+		patch = open(patchfn, 'rb').read()
+		self.assertEqual(patch,
+			cmakepatch.unified_diff("CMakeLists.txt", "A()\n", "a()\n") +
+			cmakepatch.unified_diff("sub/CMakeLists.txt", "C()\n", "c()\n"))
+
+	def testPatchDirectory(self):
+		"""each changed file gets its own numbered patch"""
+		patchdir = os.path.join(self.tempdir, "patches")
+		self.addFiles(cmakepatch.PatchWriter(patchdir=patchdir, root=self.tempdir))
+		self.assertEqual(sorted(os.listdir(patchdir)),
+						["0001-CMakeLists.txt.patch",
+						"0002-sub-CMakeLists.txt.patch"])
+		patch = open(os.path.join(patchdir, "0002-sub-CMakeLists.txt.patch"), 'rb').read()
+		self.assertEqual(patch,
+			cmakepatch.unified_diff("sub/CMakeLists.txt", "C()\n", "c()\n"))
+
+
+if __name__=="__main__":
+	## Run tests if executed directly
+	try:
+		import nose
+		start = nose.main
+	except (ImportError):
+		start = unittest.main
+
+	start()
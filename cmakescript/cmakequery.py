@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+Module for searching CMake files for commands by name and arguments
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import re
+import fnmatch
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakegrammar
+import cmaketokenizer
+import cmakemodifier
+
+grammar = cmakegrammar
+
+## Glob wildcards, including whole [...] sets
+_reGlobWildcards = re.compile(r"\[[^\]]*\]|[*?]")
+
+## Any regex syntax: a pattern without it matches only itself
+_reRegexSyntax = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+def _longest(strings):
+	longest = ""
+	for string in strings:
+		if len(string) > len(longest):
+			longest = string
+	return longest
+
+class Query():
+	"""Matches the statements calling a command whose name matches the
+	glob command, without regard to case, and whose arguments satisfy
+	every one of argpatterns: a regex searched for in each argument,
+	which is satisfied if it is found in any of them.
+
+	Matching is on statements, so text in comments never matches, and a
+	command spanning several lines is matched as a whole.  The
+	keywords() are text that any file with a match must contain, so
+	files can be ruled out by a quick search before being tokenized.
+	"""
+
+	def __init__(self, command, argpatterns=(), ignorecase=False):
+		self.command = command
+		self.argpatterns = list(argpatterns)
+		self.ignorecase = ignorecase
+		self._command = re.compile(fnmatch.translate(command.lower())).match
+		flags = 0
+		if ignorecase:
+			flags = re.IGNORECASE
+		self._args = [re.compile(x, flags).search for x in self.argpatterns]
+
+		# (keyword, ignore case) pairs
+		self._keywords = []
+		keyword = _longest(_reGlobWildcards.split(command))
+		if keyword != "":
+			self._keywords.append((keyword, True))
+		for pattern in self.argpatterns:
+			if pattern != "" and _reRegexSyntax.search(pattern) is None:
+				self._keywords.append((pattern, ignorecase))
+
+		self._prefilter = []
+		for keyword, nocase in self._keywords:
+			if nocase:
+				self._prefilter.append(re.compile(re.escape(keyword), re.IGNORECASE).search)
+			else:
+				self._prefilter.append(lambda data, keyword=keyword: data.find(keyword) != -1)
+
+	def keywords(self):
+		"""Return the list of (text, ignore case) that a file must contain
+		to have any match."""
+		return list(self._keywords)
+
+	def might_match(self, data):
+		"""Return False if data can't have any match, without tokenizing
+		it, and True if it might."""
+		for search in self._prefilter:
+			if not search(data):
+				return False
+		return True
+
+	def matches(self, func, args):
+		"""Return True if the statement func(args) matches"""
+		key = cmakemodifier.command_key(func)
+		if key is None or not self._command(key):
+			return False
+		if len(self._args) == 0:
+			return True
+		tokens = grammar.arg_tokens(args)
+		for search in self._args:
+			for token in tokens:
+				if search(token):
+					break
+			else:
+				return False
+		return True
+
+def search_data(data, query):
+	"""Find the statements in CMake source data matching query.
+
+	Returns (matches, error): a list of (line, func, args) of each
+	matching statement, and None, or the name of the error that kept
+	the source from being read to the end, in which case the matches
+	are those before it.
+	"""
+	matches = []
+	tokenizer = cmaketokenizer.BufferTokenizer(data)
+	try:
+		for func, args, comment in tokenizer:
+			if func != "" and query.matches(func, args):
+				matches.append((tokenizer.startline, func, args))
+	except grammar.IncompleteStatementError:
+		return (matches, "IncompleteStatementError")
+	return (matches, None)
+
+def search_file(filename, query):
+	"""Like search_data, for the file called filename.
+
+	Returns (filename, matches, error, searched), where searched is False
+	if the file was ruled out by the query's keywords without being
+	tokenized.
+	"""
+	datafile = open(filename, 'rb')
+	try:
+		data = datafile.read()
+	finally:
+		datafile.close()
+	if not query.might_match(data):
+		return (filename, [], None, False)
+	matches, error = search_data(data, query)
+	return (filename, matches, error, True)
+
+#if __name__ == "__main__":
+#	pass
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Tests for the cmakescript.cmakequery module
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import unittest
+import os
+import shutil
+import tempfile
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakequery
+
+source = """# target_link_libraries(app pthread) is only a comment
+Target_Link_Libraries(app
+	${FOO_LIBRARIES}
+	pthread)
+target_link_libraries(lib m)
+add_library(pthread_helpers helpers.c)
+"""
+
+## Requirement:
+## Queries match statements by command name and arguments
+class Matching(unittest.TestCase):
+	def testCommandAndArgument(self):
+		"""comments never match, and multi-line commands match whole"""
+		query = cmakequery.Query("target_link_libraries", ["pthread"])
+		matches, error = cmakequery.search_data(source, query)
+		self.assertEqual([(line, func) for line, func, args in matches],
+						[(2, "Target_Link_Libraries")])
+		self.assertEqual(error, None)
+
+	def testCommandGlob(self):
+		"""the command is a glob, matched without regard to case"""
+		query = cmakequery.Query("ADD_*", ["^pthread"])
+		matches, error = cmakequery.search_data(source, query)
+		self.assertEqual([line for line, func, args in matches], [6])
+
+	def testEveryPattern(self):
+		"""every argument pattern must be found, each in any argument"""
+		query = cmakequery.Query("target_link_libraries", ["pthread", "^app$"])
+		self.assertEqual(len(cmakequery.search_data(source, query)[0]), 1)
+		query = cmakequery.Query("target_link_libraries", ["pthread", "^lib$"])
+		self.assertEqual(len(cmakequery.search_data(source, query)[0]), 0)
+		query = cmakequery.Query("target_link_libraries")
+		self.assertEqual(len(cmakequery.search_data(source, query)[0]), 2)
+
+	def testIgnoreCase(self):
+		"""arguments are matched with case unless asked not to"""
+		query = cmakequery.Query("target_link_libraries", ["PTHREAD"])
+		self.assertEqual(len(cmakequery.search_data(source, query)[0]), 0)
+		query = cmakequery.Query("target_link_libraries", ["PTHREAD"], ignorecase=True)
+		self.assertEqual(len(cmakequery.search_data(source, query)[0]), 1)
+
+	def testIncomplete(self):
+		"""matches before a broken statement are still found"""
+		query = cmakequery.Query("foo")
+		matches, error = cmakequery.search_data("foo()\nbar(\n", query)
+		self.assertEqual(len(matches), 1)
+		self.assertEqual(error, "IncompleteStatementError")
+
+## Requirement:
+## Files without a query's keywords are ruled out before tokenizing
+class Prefilter(unittest.TestCase):
+	def testKeywords(self):
+		"""literal parts of the glob and patterns are keywords"""
+		query = cmakequery.Query("find_*_args", ["pthread", "^app$"])
+		self.assertEqual(query.keywords(), [("find_", True), ("pthread", False)])
+		self.assertEqual(cmakequery.Query("*").keywords(), [])
+
+	def testMightMatch(self):
+		"""the command keyword is found without regard to case"""
+		query = cmakequery.Query("target_link_libraries", ["pthread"])
+		self.assertTrue(query.might_match("TARGET_LINK_LIBRARIES(a pthread)"))
+		self.assertFalse(query.might_match("target_link_libraries(a m)"))
+		self.assertFalse(query.might_match("add_library(pthread a.c)"))
+
+	def testSearchFile(self):
+		"""a ruled out file isn't searched"""
+		tempdir = tempfile.mkdtemp()
+		try:
+			filename = os.path.join(tempdir, "CMakeLists.txt")
+			outfile = open(filename, 'w')
+			outfile.write(source)
+			outfile.close()
+			query = cmakequery.Query("target_link_libraries", ["pthread"])
+			filename, matches, error, searched = cmakequery.search_file(filename, query)
+			self.assertTrue(searched)
+			self.assertEqual(len(matches), 1)
+			query = cmakequery.Query("install")
+			filename, matches, error, searched = cmakequery.search_file(filename, query)
+			self.assertFalse(searched)
+			self.assertEqual(matches, [])
+		finally:
+			shutil.rmtree(tempdir)
+
+
+if __name__=="__main__":
+	## Run tests if executed directly
+	try:
+		import nose
+		start = nose.main
+	except (ImportError):
+		start = unittest.main
+
+	start()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""
+Module for rewriting files in place, safely and in batches
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import os
+import stat
+import tempfile
+try:
+	# Not in every build of Python
+	import ctypes
+except ImportError:
+	ctypes = None
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+# - none
+
+## Files written before their new contents are synced to disk together
+DEFAULT_BATCH = 64
+
+def _load_syncfs():
+	"""Return the C library's syncfs(fd), which syncs the whole
+	filesystem holding fd, or None where there is none (only Linux has
+	it)."""
+	if ctypes is None:
+		return None
+	try:
+		syncfs = ctypes.CDLL(None, use_errno=True).syncfs
+	except (OSError, AttributeError):
+		return None
+	syncfs.argtypes = [ctypes.c_int]
+	syncfs.restype = ctypes.c_int
+	return syncfs
+
+_syncfs = _load_syncfs()
+
+def _sync_filesystems(handles):
+	"""Sync the filesystems holding each of the open files handles with
+	one syncfs each.  Returns the handles on filesystems that couldn't be
+	synced that way."""
+	if _syncfs is None:
+		return list(handles)
+	byfilesystem = {}
+	for handle in handles:
+		byfilesystem.setdefault(os.fstat(handle).st_dev, []).append(handle)
+	unsynced = []
+	for filesystem in byfilesystem.values():
+		if _syncfs(filesystem[0]) != 0:
+			unsynced.extend(filesystem)
+	return unsynced
+
+def _sync_directories(directories):
+	"""Make the renames in directories durable, where the platform
+	allows: with one syncfs per filesystem, or else an fsync of each."""
+	handles = []
+	try:
+		for directory in directories:
+			try:
+				handles.append(os.open(directory, os.O_RDONLY))
+			except OSError:
+				pass
+		for handle in _sync_filesystems(handles):
+			try:
+				os.fsync(handle)
+			except OSError:
+				pass
+	finally:
+		for handle in handles:
+			os.close(handle)
+
+class FileRewriter():
+	"""Replaces the contents of files with new contents, only where they
+	differ.
+
+	Each file's new contents go into a temporary file beside it, which
+	is renamed over the file once the contents are safely on disk, so a
+	crash leaves either the old or the new file, never a mix.  The
+	replacement keeps the file's permissions, owner and group.
+
+	Files are synced and renamed in batches of batchsize.  Where syncfs
+	is available, a batch takes one sync of each filesystem it touches
+	before the renames, and another after them to make the renames
+	durable.  Elsewhere each file has to be fsynced on its own, as
+	nothing else guarantees its contents are on disk before the rename,
+	and each directory is synced once per batch.
+	"""
+
+	def __init__(self, batchsize=DEFAULT_BATCH):
+		self.batchsize = batchsize
+		self.files = 0
+		self.changed = 0
+		# (open temp file handle, temp path, path to replace)
+		self._pending = []
+
+	def add(self, path, original, modified):
+		"""Replace the file at path, holding original, with modified if
+		they differ.  Returns True if they did.  The file is replaced by
+		the time close() returns."""
+		self.files = self.files + 1
+		if original == modified:
+			return False
+
+		self.changed = self.changed + 1
+		# Replace what a symlink points to, not the symlink
+		path = os.path.realpath(path)
+		directory, name = os.path.split(path)
+		handle, temp = tempfile.mkstemp(prefix="." + name + ".", suffix=".tmp",
+										dir=directory)
+		try:
+			info = os.stat(path)
+			tempinfo = os.fstat(handle)
+			if (info.st_uid, info.st_gid) != (tempinfo.st_uid, tempinfo.st_gid):
+				# Such as when run as root on someone else's file
+				os.chown(temp, info.st_uid, info.st_gid)
+			os.chmod(temp, stat.S_IMODE(info.st_mode))
+			while len(modified) > 0:
+				written = os.write(handle, modified)
+				modified = modified[written:]
+		except:
+			os.close(handle)
+			os.remove(temp)
+			raise
+		self._pending.append((handle, temp, path))
+
+		if len(self._pending) >= self.batchsize:
+			self.flush()
+		return True
+
+	def flush(self):
+		"""Sync and rename every file waiting to be replaced"""
+		pending = self._pending
+		self._pending = []
+		directories = set()
+		try:
+			for handle in _sync_filesystems([x[0] for x in pending]):
+				os.fsync(handle)
+			for i, (handle, temp, path) in enumerate(pending):
+				os.close(handle)
+				pending[i] = (None, temp, path)
+				os.rename(temp, path)
+				pending[i] = (None, None, path)
+				directories.add(os.path.dirname(path))
+		finally:
+			# Don't leave temporary files behind if anything failed
+			for handle, temp, path in pending:
+				if handle is not None:
+					os.close(handle)
+				if temp is not None:
+					try:
+						os.remove(temp)
+					except OSError:
+						pass
+		_sync_directories(directories)
+
+	def close(self):
+		self.flush()
+
+#if __name__ == "__main__":
+#	pass
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+Tests for the cmakescript.cmakerewrite module
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import unittest
+import os
+import stat
+import shutil
+import tempfile
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakerewrite
+
+## Requirement:
+## Only files whose contents change are replaced, whole and in batches
+class RewriteFiles(unittest.TestCase):
+	def setUp(self):
+		self.tempdir = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.tempdir)
+
+	def write(self, name, contents):
+		path = os.path.join(self.tempdir, name)
+		out = open(path, 'wb')
+		out.write(contents)
+		out.close()
+		return path
+
+	def read(self, path):
+		infile = open(path, 'rb')
+		try:
+			return infile.read()
+		finally:
+			infile.close()
+
+	def testUnchangedNotWritten(self):
+		"""a file that would stay the same is left alone"""
+		path = self.write("CMakeLists.txt", "project(a)\n")
+		before = os.stat(path)
+		rewriter = cmakerewrite.FileRewriter()
+		self.assertFalse(rewriter.add(path, "project(a)\n", "project(a)\n"))
+		rewriter.close()
+		self.assertEqual(os.stat(path).st_ino, before.st_ino)
+		self.assertEqual((rewriter.files, rewriter.changed), (1, 0))
+
+	def testReplaced(self):
+		"""a changed file is replaced, keeping its permissions"""
+		path = self.write("CMakeLists.txt", "PROJECT(a)\n")
+		os.chmod(path, 0640)
+		rewriter = cmakerewrite.FileRewriter()
+		self.assertTrue(rewriter.add(path, "PROJECT(a)\n", "project(a)\n"))
+		rewriter.close()
+		self.assertEqual(self.read(path), "project(a)\n")
+		self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0640)
+		self.assertEqual(os.listdir(self.tempdir), ["CMakeLists.txt"])
+
+	def testBatches(self):
+		"""files are only replaced once a batch fills up, or on close"""
+		paths = [self.write("%d.cmake" % i, "A()\n") for i in range(3)]
+		rewriter = cmakerewrite.FileRewriter(batchsize=2)
+		rewriter.add(paths[0], "A()\n", "a()\n")
+		self.assertEqual(self.read(paths[0]), "A()\n")
+		rewriter.add(paths[1], "A()\n", "a()\n")
+		self.assertEqual(self.read(paths[0]), "a()\n")
+		self.assertEqual(self.read(paths[1]), "a()\n")
+		rewriter.add(paths[2], "A()\n", "a()\n")
+		self.assertEqual(self.read(paths[2]), "A()\n")
+		rewriter.close()
+		self.assertEqual(self.read(paths[2]), "a()\n")
+		self.assertEqual(len(os.listdir(self.tempdir)), 3)
+
+	def testOwner(self):
+		"""a replaced file keeps its owner and group"""
+		if not hasattr(os, "getuid") or os.getuid() != 0:
+			# Only root can give files away
+			return
+		path = self.write("CMakeLists.txt", "PROJECT(a)\n")
+		os.chown(path, 12345, 23456)
+		rewriter = cmakerewrite.FileRewriter()
+		rewriter.add(path, "PROJECT(a)\n", "project(a)\n")
+		rewriter.close()
+		info = os.stat(path)
+		self.assertEqual((info.st_uid, info.st_gid), (12345, 23456))
+
+	def testSyncsOncePerFilesystem(self):
+		"""a batch syncs each filesystem, not each file, where it can"""
+		calls = []
+		def syncfs(handle):
+			calls.append(handle)
+			return 0
+		paths = [self.write("%d.cmake" % i, "A()\n") for i in range(5)]
+		saved = cmakerewrite._syncfs
+		cmakerewrite._syncfs = syncfs
+		try:
+			rewriter = cmakerewrite.FileRewriter()
+			for path in paths:
+				rewriter.add(path, "A()\n", "a()\n")
+			rewriter.close()
+		finally:
+			cmakerewrite._syncfs = saved
+		# Once for the contents, once for the renames
+		self.assertEqual(len(calls), 2)
+		self.assertEqual([self.read(x) for x in paths], ["a()\n"] * 5)
+
+	def testWithoutSyncfs(self):
+		"""files are still replaced where each must be fsynced"""
+		path = self.write("CMakeLists.txt", "A()\n")
+		saved = cmakerewrite._syncfs
+		cmakerewrite._syncfs = None
+		try:
+			rewriter = cmakerewrite.FileRewriter()
+			rewriter.add(path, "A()\n", "a()\n")
+			rewriter.close()
+		finally:
+			cmakerewrite._syncfs = saved
+		self.assertEqual(self.read(path), "a()\n")
+
+	def testSymlink(self):
+		"""a symlinked file has its target replaced, not the link"""
+		if not hasattr(os, "symlink"):
+			return
+		path = self.write("real.cmake", "A()\n")
+		link = os.path.join(self.tempdir, "link.cmake")
+		os.symlink(path, link)
+		rewriter = cmakerewrite.FileRewriter()
+		rewriter.add(link, "A()\n", "a()\n")
+		rewriter.close()
+		self.assertTrue(os.path.islink(link))
+		self.assertEqual(self.read(path), "a()\n")
+
+
+if __name__=="__main__":
+	## Run tests if executed directly
+	try:
+		import nose
+		start = nose.main
+	except (ImportError):
+		start = unittest.main
+
+	start()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""
+Module for optionally timing and counting what the cmakescript tools do
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import time
+import json
+from contextlib import contextmanager
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+# - none
+
+## The Stats collecting right now, or None when instrumentation is off.
+## Code being instrumented checks this before doing any extra work.
+active = None
+
+class Stats():
+	"""Wall time per phase and counters, in total and per file.
+
+	Phases are timed with timer(name), which also counts its calls, and
+	anything else with count(name).  Between begin_file() and end_file(),
+	both are also kept for that file.
+	"""
+
+	def __init__(self):
+		self.timers = {}
+		self.counters = {}
+		self.files = []
+		self.current = None
+
+	def begin_file(self, path):
+		self.current = {"path" : path, "timers" : {}, "counters" : {}}
+		self.files.append(self.current)
+
+	def end_file(self):
+		self.current = None
+
+	def add_time(self, name, seconds, calls=1):
+		total = self.timers.setdefault(name, [0.0, 0])
+		total[0] = total[0] + seconds
+		total[1] = total[1] + calls
+		if self.current is not None:
+			timers = self.current["timers"]
+			timers[name] = timers.get(name, 0.0) + seconds
+
+	@contextmanager
+	def timer(self, name):
+		start = time.time()
+		try:
+			yield
+		finally:
+			self.add_time(name, time.time() - start)
+
+	def count(self, name, amount=1):
+		self.counters[name] = self.counters.get(name, 0) + amount
+		if self.current is not None:
+			counters = self.current["counters"]
+			counters[name] = counters.get(name, 0) + amount
+
+	def count_tree(self, tree):
+		"""Count the statements and blocks of a parse tree"""
+		statements = 0
+		blocks = 0
+		stack = [tree]
+		while len(stack) > 0:
+			for statement in stack.pop():
+				statements = statements + 1
+				if statement[3] is not None:
+					blocks = blocks + 1
+					stack.append(statement[3])
+		self.count("statements", statements)
+		self.count("blocks", blocks)
+
+	def merge(self, other):
+		"""Add in the data of another Stats, or of its as_dict(), such as
+		one collected in a worker process."""
+		if isinstance(other, Stats):
+			other = other.as_dict()
+		for name, timer in other["timers"].items():
+			self.add_time(name, timer["seconds"], timer["calls"])
+		for name, amount in other["counters"].items():
+			self.count(name, amount)
+		for filestats in other["files"]:
+			self.begin_file(filestats["path"])
+			self.current["timers"].update(filestats["timers"])
+			self.current["counters"].update(filestats["counters"])
+			self.end_file()
+
+	def as_dict(self):
+		return {	"timers"	: dict([(name, {"seconds" : x[0], "calls" : x[1]})
+									for name, x in self.timers.items()]),
+					"counters"	: dict(self.counters),
+					"files"		: self.files	}
+
+	def dump(self, outfile):
+		"""Write the collected data to a file object as JSON"""
+		json.dump(self.as_dict(), outfile, indent=1, sort_keys=True)
+
+def enable(stats=None):
+	"""Start collecting into stats, or a new Stats, and return it"""
+	global active
+	if stats is None:
+		stats = Stats()
+	active = stats
+	return stats
+
+def disable():
+	"""Stop collecting, and return what was collected"""
+	global active
+	stats = active
+	active = None
+	return stats
+
+@contextmanager
+def collecting(stats=None):
+	"""Collect into stats, or a new Stats, in the body of a with
+	statement, then go back to whatever was collecting before."""
+	global active
+	previous = active
+	if stats is None:
+		stats = Stats()
+	active = stats
+	try:
+		yield stats
+	finally:
+		active = previous
+
+class _NoTimer():
+	def __enter__(self):
+		pass
+
+	def __exit__(self, *exc_info):
+		return False
+
+_notimer = _NoTimer()
+
+def timer(name):
+	"""Return a context manager timing its body as phase name, if
+	instrumentation is on, and doing nothing otherwise."""
+	if active is None:
+		return _notimer
+	return active.timer(name)
+
+def count(name, amount=1):
+	if active is not None:
+		active.count(name, amount)
+
+#if __name__ == "__main__":
+#	pass
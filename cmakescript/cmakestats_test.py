@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Tests for the cmakescript.cmakestats module
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import unittest
+import os
+import json
+import StringIO
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakestats
+import cmakeparser
+import cmakemodifier
+import cmakeformatter
+
+knownfile = os.path.join(os.path.split(__file__)[0], 'testdata', 'KnownValues',
+						'08ifelseendifblock.cmake')
+
+## Requirement:
+## Phases are timed and parses counted only while collecting
+class Collecting(unittest.TestCase):
+	def tearDown(self):
+		cmakestats.disable()
+
+	def testOffByDefault(self):
+		"""nothing is collected unless asked for"""
+		self.assertTrue(cmakestats.active is None)
+		cmakeparser.parse_file(knownfile)
+		with cmakestats.timer("anything"):
+			pass
+		cmakestats.count("anything")
+
+	def testPhases(self):
+		"""parsing, cleaning up and formatting are timed and counted"""
+		stats = cmakestats.enable()
+		stats.begin_file(knownfile)
+		tree = cmakeparser.parse_file(knownfile).parsetree
+		cmakeformatter.NiceFormatter(cmakemodifier.cleanup_block(tree)).output_as_cmake()
+		stats.end_file()
+		cmakestats.disable()
+
+		for name in ("read", "parse", "visit", "format"):
+			self.assertEqual(stats.timers[name][1], 1)
+		self.assertEqual(stats.counters["statements"], 5)
+		self.assertEqual(stats.counters["blocks"], 2)
+		self.assertEqual(stats.counters["bytes"], os.path.getsize(knownfile))
+		self.assertEqual(stats.files[0]["path"], knownfile)
+		self.assertEqual(stats.files[0]["counters"], stats.counters)
+
+	def testNestedCollecting(self):
+		"""collecting() keeps its data apart, then merges like any other"""
+		outer = cmakestats.enable()
+		with cmakestats.collecting() as inner:
+			cmakestats.count("statements", 3)
+		self.assertTrue(cmakestats.active is outer)
+		self.assertEqual(outer.counters, {})
+
+		outer.begin_file("a")
+		outer.merge(inner.as_dict())
+		outer.end_file()
+		self.assertEqual(outer.counters, {"statements" : 3})
+		self.assertEqual(outer.files[0]["counters"], {"statements" : 3})
+
+	def testJson(self):
+		"""the collected data is written as JSON"""
+		stats = cmakestats.Stats()
+		stats.add_time("parse", 0.5)
+		stats.count("statements", 2)
+		out = StringIO.StringIO()
+		stats.dump(out)
+		data = json.loads(out.getvalue())
+		self.assertEqual(data["timers"]["parse"], {"seconds" : 0.5, "calls" : 1})
+		self.assertEqual(data["counters"]["statements"], 2)
+
+
+if __name__=="__main__":
+	## Run tests if executed directly
+	try:
+		import nose
+		start = nose.main
+	except (ImportError):
+		start = unittest.main
+
+	start()
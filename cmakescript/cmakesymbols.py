@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+"""
+Module for a persistent index of the functions and macros defined and
+called across many CMake files
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import os
+import sys
+import sqlite3
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakegrammar
+import cmaketokenizer
+import cmakeparser
+import cmakecache
+import cmakemanifest
+import cmakemodifier
+import cmakestats
+
+grammar = cmakegrammar
+
+## Commands that define a new command
+DEFINERS = ("function", "macro")
+
+## Files indexed between commits to the database
+COMMIT_EVERY = 500
+
+_schema = """
+	CREATE TABLE IF NOT EXISTS meta (
+		key TEXT PRIMARY KEY,
+		value TEXT);
+	CREATE TABLE IF NOT EXISTS files (
+		id INTEGER PRIMARY KEY,
+		path TEXT UNIQUE NOT NULL,
+		mtime REAL,
+		size INTEGER NOT NULL,
+		hash TEXT NOT NULL,
+		error TEXT);
+	CREATE TABLE IF NOT EXISTS definitions (
+		file INTEGER NOT NULL,
+		name TEXT NOT NULL,
+		spelling TEXT NOT NULL,
+		kind TEXT NOT NULL,
+		line INTEGER NOT NULL);
+	CREATE TABLE IF NOT EXISTS calls (
+		file INTEGER NOT NULL,
+		name TEXT NOT NULL,
+		line INTEGER NOT NULL,
+		caller TEXT);
+	CREATE INDEX IF NOT EXISTS definitions_name ON definitions (name);
+	CREATE INDEX IF NOT EXISTS definitions_file ON definitions (file);
+	CREATE INDEX IF NOT EXISTS calls_name ON calls (name);
+	CREATE INDEX IF NOT EXISTS calls_file ON calls (file);
+	"""
+
+def index_version():
+	"""Return a string that changes whenever indexing the same file could
+	give different symbols."""
+	return cmakecache.source_version((cmakegrammar, cmaketokenizer,
+									cmakeparser, sys.modules[__name__]))
+
+def scan_symbols(data):
+	"""Find the definitions and calls in CMake source data, in one pass
+	of cmakeparser.iter_statements.
+
+	Returns (definitions, calls, error).  Definitions are (name,
+	spelling, kind, line) and calls (name, line, caller), where names
+	are lowercase, kind is "function" or "macro", and caller is the name
+	of the function or macro the call is in, or None.  Commands that
+	only start or end blocks, such as if() and endif(), aren't calls.
+	If the source couldn't be read to the end, error names the reason,
+	and the symbols are those found before it.
+	"""
+	definitions = []
+	calls = []
+	# For each open block, the function or macro it is in, if any
+	callers = [None]
+	ending = False
+	tokenizer = cmaketokenizer.BufferTokenizer(data, keeptokens=True)
+	try:
+		for event, (func, args, comment) in cmakeparser.iter_statements(tokenizer):
+			if event == cmakeparser.BLOCK_END:
+				callers.pop()
+				# The statement that ended the block comes next
+				ending = True
+				continue
+
+			caller = callers[-1]
+			if event == cmakeparser.BLOCK_START:
+				key = cmakemodifier.command_key(func)
+				if key in DEFINERS and len(tokenizer.tokens) > 0:
+					caller = tokenizer.tokens[0].lower()
+					definitions.append((caller, tokenizer.tokens[0], key,
+										tokenizer.startline))
+				callers.append(caller)
+			elif func != "" and not ending:
+				calls.append((cmakemodifier.command_key(func), tokenizer.startline, caller))
+			ending = False
+	except grammar.IncompleteStatementError:
+		return (definitions, calls, "IncompleteStatementError")
+	except cmakeparser.UnclosedChildBlockError:
+		return (definitions, calls, "UnclosedChildBlockError")
+	return (definitions, calls, None)
+
+class SymbolIndex():
+	"""A SQLite database of the functions and macros each file defines,
+	and of each command it calls, with line numbers.
+
+	update() re-indexes only the files whose contents changed since
+	they were last indexed.  Names are looked up without regard to case,
+	as CMake does, through indexed columns.
+	"""
+
+	def __init__(self, filename, version=None):
+		if version is None:
+			version = index_version()
+		self.filename = filename
+		self.db = sqlite3.connect(filename)
+		self.db.text_factory = str
+		self.db.executescript(_schema)
+
+		row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+		if row is None or row[0] != version:
+			# Indexed by different code: start over
+			with self.db:
+				self.db.execute("DELETE FROM calls")
+				self.db.execute("DELETE FROM definitions")
+				self.db.execute("DELETE FROM files")
+				self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+								(version,))
+
+	def __len__(self):
+		return self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+	def close(self):
+		self.db.close()
+
+	def update(self, paths, prune=False):
+		"""Index each of paths that is new or changed, and if prune is
+		true, forget any indexed file not among them.  Returns the number
+		of files (re-)indexed."""
+		paths = [os.path.abspath(x) for x in paths]
+		known = {}
+		for fileid, path, mtime, size, contenthash in self.db.execute(
+				"SELECT id, path, mtime, size, hash FROM files"):
+			known[path] = (fileid, mtime, size, contenthash)
+
+		indexed = 0
+		with cmakestats.timer("index"):
+			try:
+				for path in paths:
+					if self._update_file(path, known.get(path)):
+						indexed = indexed + 1
+						if indexed % COMMIT_EVERY == 0:
+							self.db.commit()
+
+				if prune:
+					for path in set(known.keys()).difference(paths):
+						self._forget(known[path][0])
+				self.db.commit()
+			except:
+				self.db.rollback()
+				raise
+		cmakestats.count("files indexed", indexed)
+		return indexed
+
+	def _update_file(self, path, entry):
+		info = os.stat(path)
+		if entry is not None and entry[1] == info.st_mtime and entry[2] == info.st_size:
+			return False
+
+		datafile = open(path, 'rb')
+		try:
+			data = datafile.read()
+		finally:
+			datafile.close()
+		contenthash = cmakemanifest.hash_contents(data)
+		if entry is not None and entry[3] == contenthash:
+			# Only touched
+			self.db.execute("UPDATE files SET mtime = ? WHERE id = ?",
+							(info.st_mtime, entry[0]))
+			return False
+
+		definitions, calls, error = scan_symbols(data)
+		if entry is not None:
+			self._forget(entry[0])
+		fileid = self.db.execute(
+			"INSERT INTO files (path, mtime, size, hash, error) VALUES (?, ?, ?, ?, ?)",
+			(path, info.st_mtime, info.st_size, contenthash, error)).lastrowid
+		self.db.executemany("INSERT INTO definitions VALUES (?, ?, ?, ?, ?)",
+							[(fileid,) + x for x in definitions])
+		self.db.executemany("INSERT INTO calls VALUES (?, ?, ?, ?)",
+							[(fileid,) + x for x in calls])
+		return True
+
+	def _forget(self, fileid):
+		self.db.execute("DELETE FROM calls WHERE file = ?", (fileid,))
+		self.db.execute("DELETE FROM definitions WHERE file = ?", (fileid,))
+		self.db.execute("DELETE FROM files WHERE id = ?", (fileid,))
+
+	def definitions(self, name):
+		"""Return a list of (path, line, kind, spelling) of each
+		definition of the function or macro called name."""
+		return self.db.execute(
+			"SELECT files.path, line, kind, spelling FROM definitions "
+			"JOIN files ON files.id = definitions.file "
+			"WHERE name = ? ORDER BY files.path, line", (name.lower(),)).fetchall()
+
+	def callers(self, name):
+		"""Return a list of (path, line, caller) of each call to the
+		command called name, where caller is the function or macro the
+		call is in, or None."""
+		return self.db.execute(
+			"SELECT files.path, line, caller FROM calls "
+			"JOIN files ON files.id = calls.file "
+			"WHERE name = ? ORDER BY files.path, line", (name.lower(),)).fetchall()
+
+	def errors(self):
+		"""Return a list of (path, error) of the files that couldn't be
+		read to the end."""
+		return self.db.execute(
+			"SELECT path, error FROM files WHERE error IS NOT NULL "
+			"ORDER BY path").fetchall()
+
+#if __name__ == "__main__":
+#	pass
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+"""
+Tests for the cmakescript.cmakesymbols module
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import unittest
+import os
+import shutil
+import tempfile
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakesymbols
+
+helpers = """# Helpers
+function(add_Helper name)
+	message(STATUS "${name}")
+	if(WIN32)
+		Use_Helper(${name})
+	endif()
+endfunction()
+
+macro(use_helper name)
+	message(STATUS "using")
+endmacro()
+"""
+
+lists = """include(Helpers.cmake)
+add_helper(foo)
+use_helper(
+	bar)
+"""
+
+## Requirement:
+## Definitions and calls are found with their line and enclosing definition
+class ScanSymbols(unittest.TestCase):
+	def testDefinitions(self):
+		"""function and macro definitions keep their spelling and line"""
+		definitions, calls, error = cmakesymbols.scan_symbols(helpers)
+		self.assertEqual(definitions, [
+			("add_helper", "add_Helper", "function", 2),
+			("use_helper", "use_helper", "macro", 9)])
+		self.assertEqual(error, None)
+
+	def testCalls(self):
+		"""calls name their caller, and block commands aren't calls"""
+		definitions, calls, error = cmakesymbols.scan_symbols(helpers)
+		self.assertEqual(calls, [
+			("message", 3, "add_helper"),
+			("use_helper", 5, "add_helper"),
+			("message", 10, "use_helper")])
+
+	def testTopLevel(self):
+		"""calls outside any definition have no caller"""
+		definitions, calls, error = cmakesymbols.scan_symbols(lists)
+		self.assertEqual(calls, [
+			("include", 1, None),
+			("add_helper", 2, None),
+			("use_helper", 3, None)])
+
+	def testIncomplete(self):
+		"""what comes before a broken statement is still found"""
+		definitions, calls, error = cmakesymbols.scan_symbols("foo()\nbar(\n")
+		self.assertEqual(calls, [("foo", 1, None)])
+		self.assertEqual(error, "IncompleteStatementError")
+
+	def testUnclosed(self):
+		"""an unclosed block is an error"""
+		definitions, calls, error = cmakesymbols.scan_symbols("function(foo)\n")
+		self.assertEqual(len(definitions), 1)
+		self.assertEqual(error, "UnclosedChildBlockError")
+
+## Requirement:
+## The index answers queries and re-indexes only changed files
+class Index(unittest.TestCase):
+	def setUp(self):
+		self.tempdir = tempfile.mkdtemp()
+		self.helpers = self.write("Helpers.cmake", helpers)
+		self.lists = self.write("CMakeLists.txt", lists)
+		self.indexfn = os.path.join(self.tempdir, "symbols.sqlite")
+		self.index = cmakesymbols.SymbolIndex(self.indexfn, version="test")
+		self.assertEqual(self.index.update([self.helpers, self.lists]), 2)
+
+	def tearDown(self):
+		self.index.close()
+		shutil.rmtree(self.tempdir)
+
+	def write(self, name, contents):
+		path = os.path.join(self.tempdir, name)
+		outfile = open(path, 'w')
+		outfile.write(contents)
+		outfile.close()
+		return path
+
+	def testDefinitions(self):
+		"""definitions are found without regard to case"""
+		self.assertEqual(self.index.definitions("ADD_HELPER"),
+						[(self.helpers, 2, "function", "add_Helper")])
+		self.assertEqual(self.index.definitions("message"), [])
+
+	def testCallers(self):
+		"""who calls a command, across files"""
+		self.assertEqual(self.index.callers("use_helper"), [
+			(self.lists, 3, None),
+			(self.helpers, 5, "add_helper")])
+
+	def testUnchanged(self):
+		"""unchanged and merely touched files aren't re-indexed"""
+		self.assertEqual(self.index.update([self.helpers, self.lists]), 0)
+		stamp = os.stat(self.lists).st_mtime + 10
+		os.utime(self.lists, (stamp, stamp))
+		self.assertEqual(self.index.update([self.helpers, self.lists]), 0)
+
+	def testChanged(self):
+		"""a changed file's symbols replace its old ones"""
+		self.write("CMakeLists.txt", "add_helper(foo)\n")
+		stamp = os.stat(self.lists).st_mtime + 10
+		os.utime(self.lists, (stamp, stamp))
+		self.assertEqual(self.index.update([self.helpers, self.lists]), 1)
+		self.assertEqual(self.index.callers("use_helper"), [
+			(self.helpers, 5, "add_helper")])
+		self.assertEqual(self.index.callers("add_helper"), [(self.lists, 1, None)])
+
+	def testPrune(self):
+		"""files no longer given are forgotten when pruning"""
+		self.index.update([self.helpers], prune=True)
+		self.assertEqual(len(self.index), 1)
+		self.assertEqual(self.index.callers("add_helper"), [])
+
+	def testReopen(self):
+		"""the index persists, unless made by a different version"""
+		self.index.close()
+		self.index = cmakesymbols.SymbolIndex(self.indexfn, version="test")
+		self.assertEqual(len(self.index), 2)
+		self.index.close()
+		self.index = cmakesymbols.SymbolIndex(self.indexfn, version="other")
+		self.assertEqual(len(self.index), 0)
+
+
+if __name__=="__main__":
+	## Run tests if executed directly
+	try:
+		import nose
+		start = nose.main
+	except (ImportError):
+		start = unittest.main
+
+	start()
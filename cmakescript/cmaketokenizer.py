@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+"""
+Module for splitting CMake source into statements in a single pass
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import re
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakegrammar
+
+grammar = cmakegrammar
+
+## Leading whitespace on a line or between tokens
+reSpace = re.compile(r"\s*")
+
+## The name of a command at the start of a statement
+reFuncName = re.compile(r"[\w\d]+")
+
+## Whatever may follow the closing paren of a command on the same line
+reTrailing = re.compile(r"\s*(?P<Comment>\#.*)?")
+
+## One token inside the parens of a command.  Whitespace and unquoted
+## words are taken as a single "plain" run, since only parens, quotes and
+## comments matter for finding the end of the command.  The alternatives
+## never overlap on their first character, so matching never backtracks.
+reArgToken = re.compile(r"""(?x)
+	(?P<plain> (?: \s+ | (?:\\.|[^\s()\#"\\]) (?:\\.|[^\s()"\\])* )+ ) |
+	(?P<comment> \# .* ) |
+	(?P<quoted> " (?:\\.|[^"\\])* " ) |
+	(?P<openquote> " .* ) |
+	(?P<open> \( ) |
+	(?P<close> \) ) |
+	(?P<other> . )
+	""")
+
+## The rest of a quoted argument that started on an earlier line
+reQuoteEnd = re.compile(r'(?:\\.|[^"\\])*"')
+
+# Tokenizer states
+_START, _NAME, _ARGS, _QUOTE = range(4)
+
+class StatementTokenizer():
+	"""Iterable turning lines of CMake source into (func, args, comment)
+	statement tuples, reading each line exactly once.
+
+	The tuples match what cmakegrammar.parse_line returns for the same
+	statement.  While iterating, startline and endline hold the
+	(1-based) line numbers spanned by the statement last produced.  If
+	keeptokens is true, tokens also holds the tuple of its argument
+	tokens, split out as it was read; otherwise only a statement spanning
+	several lines, which has to be split to be normalized, gives its
+	tokens, and the others leave it None.
+	"""
+
+	def __init__(self, lines, keeptokens=False):
+		self.lines = lines
+		self.keeptokens = keeptokens
+		self.lineno = 0
+		self.startline = None
+		self.endline = None
+		self.tokens = None
+
+	def _line_spans(self):
+		"""Generate (buffer, start, end) for each line of input, where
+		buffer[start:end] is the line without its line terminator."""
+		for line in self.lines:
+			end = len(line)
+			if line.endswith("\n"):
+				end = end - 1
+			if line.endswith("\r", 0, end):
+				end = end - 1
+			yield (line, 0, end)
+
+	def __iter__(self):
+		state = _START
+		for line, pos, end in self._line_spans():
+			self.lineno = self.lineno + 1
+			linestart = (state == _START)
+			if state == _ARGS or state == _QUOTE:
+				# Still inside the parens of a command from an earlier line
+				argstart = pos
+
+			while 1:
+				if state == _START:
+					pos = reSpace.match(line, pos, end).end()
+					if pos == end:
+						if linestart:
+							# A blank line is an empty statement
+							self.startline = self.endline = self.lineno
+							self.tokens = ()
+							yield ("", None, None)
+						break
+
+					linestart = False
+					self.startline = self.lineno
+					if line[pos] == "#":
+						self.endline = self.lineno
+						self.tokens = ()
+						yield ("", None, line[pos:end].rstrip())
+						break
+
+					m = reFuncName.match(line, pos, end)
+					if m is None:
+						raise grammar.IncompleteStatementError
+					func = intern(m.group())
+					pos = m.end()
+					state = _NAME
+
+				if state == _NAME:
+					pos = reSpace.match(line, pos, end).end()
+					if pos == end:
+						break
+					if line[pos] != "(":
+						raise grammar.IncompleteStatementError
+					pos = pos + 1
+					depth = 1
+					argstart = pos
+					rawlines = []
+					plainlines = []
+					comments = []
+					state = _ARGS
+
+				if state == _QUOTE:
+					m = reQuoteEnd.match(line, pos, end)
+					if m is None:
+						# Still quoted at the end of this line
+						pos = end
+					else:
+						pos = m.end()
+						state = _ARGS
+
+				plainend = end
+				while state == _ARGS and pos < end:
+					m = reArgToken.match(line, pos, end)
+					kind = m.lastgroup
+					if kind == "comment":
+						comments.append(line[pos:end].rstrip())
+						plainend = pos
+						pos = end
+						break
+					elif kind == "openquote":
+						state = _QUOTE
+					elif kind == "open":
+						depth = depth + 1
+					elif kind == "close":
+						depth = depth - 1
+						if depth == 0:
+							break
+					pos = m.end()
+
+				if state == _ARGS and pos < end:
+					# Found the closing paren of this command
+					rawlines.append(line[argstart:pos])
+					plainlines.append(line[argstart:pos])
+					m = reTrailing.match(line, pos + 1, end)
+					pos = m.end()
+					self.endline = self.lineno
+					yield self._make_statement(func, rawlines,
+						plainlines, comments, m.group("Comment"))
+					state = _START
+					continue
+
+				# Ran out of line inside the parens
+				rawlines.append(line[argstart:end])
+				plainlines.append(line[argstart:plainend])
+				break
+
+		if state != _START:
+			# Input ended in the middle of a statement
+			raise grammar.IncompleteStatementError
+
+	def _make_statement(self, func, rawlines, plainlines, comments, trailing):
+		"""Assemble the statement tuple the way parse_line would, and
+		set tokens to its argument tokens."""
+		args = "\n".join(rawlines).strip()
+		if len(comments) > 0 or "\n" in args:
+			# Multiline: args are normalized and comments gathered up
+			self.tokens = grammar.arg_tokens("\n".join(plainlines))
+			args = " ".join(self.tokens)
+			if trailing is not None:
+				comments.append(trailing.rstrip())
+			if len(comments) > 0:
+				comment = "\n".join(comments)
+			else:
+				comment = None
+		else:
+			if self.keeptokens:
+				self.tokens = grammar.arg_tokens(args)
+			else:
+				self.tokens = None
+			if trailing is not None:
+				comment = trailing.rstrip()
+			else:
+				comment = None
+
+		if args == "":
+			args = None
+
+		return (func, args, comment)
+
+class BufferTokenizer(StatementTokenizer):
+	"""StatementTokenizer scanning one buffer in place, such as a string
+	or an mmap of a file.  Lines are never copied out of the buffer:
+	only the text that ends up in the statements is sliced out."""
+
+	def __init__(self, buf, keeptokens=False):
+		StatementTokenizer.__init__(self, None, keeptokens)
+		self.buffer = buf
+
+	def _line_spans(self):
+		buf = self.buffer
+		size = len(buf)
+		start = 0
+		while start < size:
+			end = buf.find("\n", start)
+			if end == -1:
+				end = size
+			nextstart = end + 1
+			if end > start and buf[end - 1] == "\r":
+				end = end - 1
+			yield (buf, start, end)
+			start = nextstart
+
+def tokenize_string(instr):
+	"""Return a StatementTokenizer over the lines of a string"""
+	return StatementTokenizer(instr.splitlines())
+
+#if __name__ == "__main__":
+#	pass
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+"""
+Tests for the cmakescript.cmaketokenizer module
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+"""
+
+###
+# standard packages
+import unittest
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import cmakegrammar
+import cmaketokenizer
+import cmakegrammar_test
+
+
+## Requirement:
+## Produce the same statements as parse_line does for a complete statement
+class MatchParseLine(unittest.TestCase):
+
+	subtest = ""
+	def _exc_info(self):
+		print "Subtest info:"
+		print self.subtest
+		return unittest.TestCase._exc_info(self)
+
+	def testKnownLines(self):
+		"""tokenizing the parse_line known values gives the same statements"""
+		known = cmakegrammar_test.ParseCompleteLine
+		data = list(known.commandsOnly) + list(known.mixed)
+		data.extend([(x, ("", None, x)) for x in known.commentsOnly])
+		for line, expected in data:
+			self.subtest = line
+			tokenizer = cmaketokenizer.StatementTokenizer(line.split("\n"))
+			statements = list(tokenizer)
+			self.assertEqual(statements, [expected])
+
+	def testMultilineArgs(self):
+		"""statements spanning several lines come out as one statement"""
+		data = (	("func(a\n  b\n  c)", ("func", "a b c", None)),
+					("func\n(a)", ("func", "a", None)),
+					("func(\n\ta\n)", ("func", "a", None)),
+					('func("quoted\nstring")', ("func", '"quoted\nstring"', None)),
+					("func(a # one\n b # two\n) # three", ("func", "a b", "# one\n# two\n# three"))	)
+		for instr, expected in data:
+			self.subtest = instr
+			statements = list(cmaketokenizer.tokenize_string(instr))
+			self.assertEqual(statements, [expected])
+
+	def testParensInArgs(self):
+		"""parens in quotes or nested in args don't end the statement"""
+		data = (	("if((A) OR B)", ("if", "(A) OR B", None)),
+					('message("(")', ("message", '"("', None)),
+					(r"set(a \) b)", ("set", r"a \) b", None)),
+					("if(A) # comment (B)", ("if", "A", "# comment (B)"))	)
+		for instr, expected in data:
+			self.subtest = instr
+			statements = list(cmaketokenizer.tokenize_string(instr))
+			self.assertEqual(statements, [expected])
+
+## Requirement:
+## Blank and comment lines are statements of their own
+class LineStatements(unittest.TestCase):
+	def testBlankLines(self):
+		"""each blank line is an empty statement, but a final newline is not"""
+		statements = list(cmaketokenizer.tokenize_string("a()\n\n  \nb(\n)\n"))
+		self.assertEqual(statements, [	("a", None, None),
+										("", None, None),
+										("", None, None),
+										("b", None, None)	])
+
+	def testLineNumbers(self):
+		"""the tokenizer reports the lines spanned by each statement"""
+		tokenizer = cmaketokenizer.tokenize_string("# c\nset(a\nb\nc)\n\nx()")
+		spans = [(tokenizer.startline, tokenizer.endline) for x in tokenizer]
+		self.assertEqual(spans, [(1, 1), (2, 4), (5, 5), (6, 6)])
+
+## Requirement:
+## Scanning a buffer in place gives the same statements as scanning lines
+class BufferInput(unittest.TestCase):
+	def testBufferMatchesLines(self):
+		"""a BufferTokenizer agrees with tokenizing the split lines"""
+		data = (	"",
+					"a()\n",
+					"a()\n\n",
+					"# c\r\nset(a # one\r\n  b)\r\n\r\nx()",
+					'message("two\nlines") # done'	)
+		for instr in data:
+			expected = list(cmaketokenizer.tokenize_string(instr))
+			statements = list(cmaketokenizer.BufferTokenizer(instr))
+			self.assertEqual(statements, expected)
+
+## Requirement:
+## Notify on an incomplete statement at the end of input
+class IncompleteInput(unittest.TestCase):
+	data = (	"func(",
+				"func(arg\narg",
+				"func",
+				'func("unterminated)',
+				"func(a # )",
+				"not a statement"	)
+
+	subtest = ""
+	def _exc_info(self):
+		print "Subtest info:"
+		print self.subtest
+		return unittest.TestCase._exc_info(self)
+
+	def testIncompleteStatement(self):
+		"""tokenizing input that ends mid-statement raises"""
+		for instr in self.data:
+			self.subtest = instr
+			self.assertRaises(cmakegrammar.IncompleteStatementError,
+							list, cmaketokenizer.tokenize_string(instr))
+
+
+## Requirement:
+## The tokenizer splits out each statement's argument tokens as it reads it
+class ArgumentTokens(unittest.TestCase):
+	def testTokens(self):
+		"""args stay the joined string, and tokens come alongside"""
+		tokenizer = cmaketokenizer.StatementTokenizer(
+			'set(a "b c" \'d\')\nmessage(\n  x # why\n  "y z")\nfoo()\n# c'.splitlines(),
+			keeptokens=True)
+		seen = [(statement, tokenizer.tokens) for statement in tokenizer]
+		self.assertEqual(seen[0], (("set", 'a "b c" \'d\'', None),
+									('a', '"b c"', "'d'")))
+		self.assertTrue(type(seen[0][0][1]) is str)
+		self.assertEqual(seen[1][1], ('x', '"y z"'))
+		self.assertEqual(seen[2], (("foo", None, None), ()))
+		self.assertEqual(seen[3][1], ())
+
+	def testOnlyWhenKept(self):
+		"""single-line statements are only split when tokens are kept"""
+		tokenizer = cmaketokenizer.tokenize_string('set(a b)\nset(c\nd)')
+		seen = [tokenizer.tokens for statement in tokenizer]
+		self.assertEqual(seen, [None, ("c", "d")])
+
+	def testArgTokens(self):
+		"""args from elsewhere, such as a cache, split the same way"""
+		self.assertEqual(cmakegrammar.arg_tokens("a b"), ("a", "b"))
+		self.assertEqual(cmakegrammar.arg_tokens(None), ())
+		self.assertEqual([cmakegrammar.token_kind(x) for x in ('a', '"b c"', "'d'")],
+						[cmakegrammar.UNQUOTED, cmakegrammar.QUOTED,
+						cmakegrammar.SINGLE_QUOTED])
+
+
+if __name__=="__main__":
+	## Run tests if executed directly
+	try:
+		import nose
+		start = nose.main
+	except (ImportError):
+		start = unittest.main
+
+	start()
@@ -15,40 +15,220 @@ Iowa State University HCI Graduate Program/VRAC
 
 ###
 # standard packages
+import os
 import os.path
 import re
+import stat
+import fnmatch
+import warnings
+from multiprocessing.pool import ThreadPool
 
 ###
 # third-party packages
-# - none
+try:
+	# Standard from Python 3.5, and available before that as the scandir
+	# package from PyPI, which Python 2 needs for the walk to tell files
+	# from directories without a stat for every entry.
+	from os import scandir
+except ImportError:
+	try:
+		from scandir import scandir
+	except ImportError:
+		scandir = None
 
 ###
 # internal packages
-from recursivelistdir import recursive_listdir_iter
+import cmakestats
 
-def find_cmake_scripts(startPath):
+## Directories walked at once by default.  Listing directories mostly
+## waits on the filesystem, so threads help a lot on network mounts.
+DEFAULT_JOBS = 8
 
-	# Get the path the way we want it.
-	startPath = os.path.abspath(startPath)
+## Build a regex to find CMakeLists.txt or *.cmake, case insensitive
+## A match against the filename (not including the path!) means that
+## this is probably a valid input file.
+_reCMakeLists = r"(?ix)^(CMakeLists\.txt)$"
+_reCMakeModule = r"(?ix)(\.cmake)$"
+isScript = re.compile(r"(" + _reCMakeLists + r"|" + _reCMakeModule + r")")
 
-	if os.path.isfile(startPath):
-		# Any file directly passed in is assumed to be a script, no matter its name
-		return [startPath]
+def _compile_excludes(patterns):
+	"""Turn exclude globs into (match name, match relative path, match
+	directory name) regex search functions, any of which may be None.
 
+	A pattern ending in / only matches directories.  A pattern with a /
+	anywhere else is matched against the path relative to the start
+	directory, and any other pattern against the entry's name alone.
+	"""
+	names = []
+	paths = []
+	dirnames = []
+	for pattern in patterns:
+		if pattern.endswith("/"):
+			pattern = pattern.rstrip("/")
+			if "/" in pattern:
+				paths.append(pattern)
+			else:
+				dirnames.append(pattern)
+		elif "/" in pattern:
+			paths.append(pattern)
+		else:
+			names.append(pattern)
 
-	# Build a regex to find CMakeLists.txt or *.cmake, case insensitive
-	# A match against the filename (not including the path!) means that
-	# this is probably a valid input file.
-	reCMakeLists = r"(?ix)^(CMakeLists\.txt)$"
-	reCMakeModule = r"(?ix)(\.cmake)$"
-	isScript = re.compile(r"(" + reCMakeLists + r"|" + reCMakeModule + r")")
+	def compile_any(globs):
+		if len(globs) == 0:
+			return None
+		return re.compile("|".join([fnmatch.translate(os.path.normcase(x))
+									for x in globs])).match
 
-	# A little function to use with filter - so we only apply the regex
-	# to the file's basename, not the full path
-	isPathScript = lambda filepath: isScript.search(os.path.basename(filepath))
+	return (compile_any(names), compile_any(paths), compile_any(dirnames))
 
-	# Now, actually do it.
-	# Use our regex to filter the recursive list of files returned
-	cmakeScripts = filter(isPathScript, recursive_listdir_iter(startPath))
+def _list_directory(directory):
+	"""Return (directories, files): the names of the subdirectories and
+	regular files in directory, following symlinks, and skipping hidden
+	entries and broken links.  Without scandir, this costs a stat for
+	every entry."""
+	directories = []
+	files = []
+	if scandir is not None:
+		for entry in scandir(directory):
+			if entry.name[0] == ".":
+				continue
+			try:
+				if entry.is_dir():
+					directories.append(entry.name)
+				elif entry.is_file():
+					files.append(entry.name)
+			except OSError:
+				continue
+	else:
+		for name in os.listdir(directory):
+			if name[0] == ".":
+				continue
+			try:
+				mode = os.stat(os.path.join(directory, name)).st_mode
+			except OSError:
+				continue
+			if stat.S_ISDIR(mode):
+				directories.append(name)
+			elif stat.S_ISREG(mode):
+				files.append(name)
+	return (directories, files)
 
-	return cmakeScripts
+class _DirectoryWalk():
+	"""Walks several directory trees at once, a level at a time, listing
+	the directories of each level with a pool of threads and collecting
+	the CMake scripts found.
+
+	Every directory is identified by its device and inode, so a directory
+	reachable by several paths (through a symlink, or from overlapping
+	start paths) is only walked once, and symlink loops end.  Which path
+	it is walked by doesn't depend on the threads: it is the one found at
+	the shallowest level, and the first in sorted order within a level.
+	"""
+
+	def __init__(self, excludes, jobs):
+		self.matchName, self.matchPath, self.matchDirName = _compile_excludes(excludes)
+		self.jobs = max(1, jobs)
+		self.scripts = set()
+		self._visited = set()
+		# (directory, relpath) of the start directories, in order
+		self._start = []
+
+	def add_directory(self, directory):
+		"""Walk the start directory, which must exist"""
+		os.stat(directory)
+		self._start.append((directory, ""))
+
+	def add_file(self, filename):
+		self.scripts.add(filename)
+
+	def excluded(self, name, relpath, isdir):
+		name = os.path.normcase(name)
+		if self.matchName is not None and self.matchName(name):
+			return True
+		if isdir and self.matchDirName is not None and self.matchDirName(name):
+			return True
+		if self.matchPath is not None and self.matchPath(os.path.normcase(relpath)):
+			return True
+		return False
+
+	def list(self, item):
+		"""Return (key, directories, files) of a (directory, relpath),
+		or None if it was walked on an earlier level or is gone."""
+		directory, relpath = item
+		try:
+			info = os.stat(directory)
+		except OSError:
+			return None
+		key = (info.st_dev, info.st_ino)
+		if key in self._visited:
+			return None
+		directories, files = _list_directory(directory)
+		return (key, directories, files)
+
+	def run(self):
+		"""Walk the start directories, and raise the first error seen"""
+		pool = None
+		if self.jobs > 1:
+			pool = ThreadPool(self.jobs)
+		try:
+			level = self._start
+			while len(level) > 0:
+				if pool is None:
+					listings = map(self.list, level)
+				else:
+					listings = pool.map(self.list, level)
+
+				nextlevel = []
+				for (directory, relpath), listing in zip(level, listings):
+					if listing is None:
+						continue
+					key, directories, files = listing
+					# An earlier directory of this level may be the same one
+					if key in self._visited:
+						continue
+					self._visited.add(key)
+
+					for name in files:
+						if isScript.search(name) and not self.excluded(name, relpath + name, False):
+							self.scripts.add(os.path.join(directory, name))
+					for name in directories:
+						if not self.excluded(name, relpath + name, True):
+							nextlevel.append((os.path.join(directory, name),
+											relpath + name + "/"))
+				nextlevel.sort()
+				level = nextlevel
+		finally:
+			if pool is not None:
+				pool.close()
+				pool.join()
+
+def find_cmake_scripts(startPath, excludes=(), jobs=DEFAULT_JOBS):
+	"""Return a sorted list of the CMakeLists.txt and *.cmake files in
+	startPath, a path or a list of paths, with each file given once.
+
+	Any file directly passed in is assumed to be a script, no matter its
+	name.  Hidden files and directories are skipped, as is anything
+	matching one of the excludes globs, such as "build*/" or ".git".
+	Up to jobs directories are listed at once.  On Python 2, install the
+	scandir package to avoid a stat for every entry found.
+	"""
+	if scandir is None:
+		warnings.warn("the scandir package isn't installed, so finding "
+					"scripts needs a stat for every file", RuntimeWarning)
+	if isinstance(startPath, basestring):
+		startPath = [startPath]
+
+	with cmakestats.timer("discover"):
+		walk = _DirectoryWalk(excludes, jobs)
+		for path in startPath:
+			# Get the path the way we want it.
+			path = os.path.abspath(path)
+			if os.path.isfile(path):
+				walk.add_file(path)
+			else:
+				walk.add_directory(path)
+
+		walk.run()
+	cmakestats.count("scripts found", len(walk.scripts))
+	return sorted(walk.scripts)
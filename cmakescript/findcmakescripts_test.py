@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+Tests for the cmakescript.findcmakescripts module
+
+Original Author:
+2010 Ryan Pavlik <rpavlik@iastate.edu> <abiryan@ryand.net>
+http://academic.cleardefinition.com
+Iowa State University HCI Graduate Program/VRAC
+
+          Copyright Iowa State University 2010.
+ Distributed under the Boost Software License, Version 1.0.
+    (See accompanying file LICENSE_1_0.txt or copy at
+          http://www.boost.org/LICENSE_1_0.txt)
+"""
+
+###
+# standard packages
+import unittest
+import os
+import shutil
+import tempfile
+import warnings
+
+###
+# third-party packages
+# - none
+
+###
+# internal packages
+import findcmakescripts
+
+## Requirement:
+## Every script in a tree is found once, skipping excluded directories
+class FindScripts(unittest.TestCase):
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+		for path in ["CMakeLists.txt",
+					"notes.txt",
+					"src/CMakeLists.txt",
+					"src/lib/CMakeLists.txt",
+					"cmake/FindFoo.cmake",
+					"build-debug/CMakeFiles/Check.cmake",
+					"_deps/foo-src/CMakeLists.txt",
+					".hidden/CMakeLists.txt"]:
+			self.touch(path)
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def touch(self, path):
+		path = os.path.join(self.root, path)
+		if not os.path.isdir(os.path.dirname(path)):
+			os.makedirs(os.path.dirname(path))
+		open(path, 'w').close()
+
+	def relative(self, found):
+		return sorted([os.path.relpath(x, self.root) for x in found])
+
+	def testFindsAll(self):
+		"""every visible script is found, the same with or without threads"""
+		expected = ["CMakeLists.txt",
+					"_deps/foo-src/CMakeLists.txt",
+					"build-debug/CMakeFiles/Check.cmake",
+					"cmake/FindFoo.cmake",
+					"src/CMakeLists.txt",
+					"src/lib/CMakeLists.txt"]
+		for jobs in (1, 4):
+			found = findcmakescripts.find_cmake_scripts(self.root, jobs=jobs)
+			self.assertEqual(self.relative(found), expected)
+			self.assertEqual(found, sorted(found))
+
+	def testWithoutScandir(self):
+		"""without scandir, the same scripts are found, with a warning"""
+		expected = self.relative(findcmakescripts.find_cmake_scripts(self.root))
+		saved = findcmakescripts.scandir
+		findcmakescripts.scandir = None
+		try:
+			# Python 2 only warns once per place, whatever the filter
+			getattr(findcmakescripts, "__warningregistry__", {}).clear()
+			with warnings.catch_warnings(record=True) as caught:
+				warnings.simplefilter("always")
+				found = findcmakescripts.find_cmake_scripts(self.root)
+		finally:
+			findcmakescripts.scandir = saved
+		self.assertEqual(self.relative(found), expected)
+		self.assertEqual([x.category for x in caught], [RuntimeWarning])
+
+	def testExcludes(self):
+		"""directory, name and relative path globs are skipped"""
+		found = findcmakescripts.find_cmake_scripts(self.root,
+			excludes=["build*/", "_deps/", "src/lib", "Find*.cmake"])
+		self.assertEqual(self.relative(found), ["CMakeLists.txt",
+												"src/CMakeLists.txt"])
+
+	def testDirectoryOnlyExclude(self):
+		"""a glob ending in / doesn't skip files of the same name"""
+		found = findcmakescripts.find_cmake_scripts(self.root,
+			excludes=["CMakeLists.txt/"])
+		self.assertTrue(os.path.join(self.root, "CMakeLists.txt") in found)
+
+	def testSymlinkLoop(self):
+		"""a symlink back up the tree is only walked once"""
+		if not hasattr(os, "symlink"):
+			return
+		os.symlink(self.root, os.path.join(self.root, "src", "loop"))
+		os.symlink(os.path.join(self.root, "cmake"),
+					os.path.join(self.root, "cmake-link"))
+		found = findcmakescripts.find_cmake_scripts(self.root)
+		self.assertEqual(len(found), 6)
+
+	def testSymlinkedDirectory(self):
+		"""a directory reachable two ways is always found by the same path"""
+		if not hasattr(os, "symlink"):
+			return
+		# Same level: the first in sorted order wins
+		os.symlink(os.path.join(self.root, "cmake"),
+					os.path.join(self.root, "a-link"))
+		# Shallower wins over sorted order
+		os.symlink(os.path.join(self.root, "src", "lib"),
+					os.path.join(self.root, "z-link"))
+		for jobs in (1, 2, 8):
+			for i in range(5):
+				found = findcmakescripts.find_cmake_scripts(self.root,
+					excludes=["build*/", "_deps/"], jobs=jobs)
+				self.assertEqual(self.relative(found), ["CMakeLists.txt",
+														"a-link/FindFoo.cmake",
+														"src/CMakeLists.txt",
+														"z-link/CMakeLists.txt"])
+
+	def testOverlappingPaths(self):
+		"""overlapping start paths and files give each script once"""
+		found = findcmakescripts.find_cmake_scripts([
+			os.path.join(self.root, "src"),
+			self.root,
+			os.path.join(self.root, "src", "CMakeLists.txt"),
+			os.path.join(self.root, "notes.txt")])
+		self.assertEqual(len(found), 7)
+		self.assertTrue(os.path.join(self.root, "notes.txt") in found)
+
+	def testMissingStart(self):
+		"""a start path that doesn't exist is an error"""
+		self.assertRaises(OSError, findcmakescripts.find_cmake_scripts,
+						os.path.join(self.root, "missing"))
+
+
+if __name__=="__main__":
+	## Run tests if executed directly
+	try:
+		import nose
+		start = nose.main
+	except (ImportError):
+		start = unittest.main
+
+	start()
@@ -31,14 +31,52 @@ import cmakescript
 class App:
 	def __init__(self, args_in=sys.argv[1:]):
 		self.args_in = args_in
+		self.cache = None
+		self.stats = None
 
 	def main(self):
-		for infile in self.args_in:
+		parser = OptionParser(usage="usage: %prog [options] file...",
+							  version="%prog 0.5, part of the cmakescript tools")
+
+		parser.add_option("--cache-dir",
+						metavar="DIR",
+						dest="cachedir",
+						default=None,
+						help="keep parsed files in DIR and reuse them "
+							 "on later runs for files that haven't changed")
+
+		parser.add_option("--stats",
+						metavar="FILE",
+						dest="stats",
+						default=None,
+						help="time each phase of the work and count what "
+							 "was parsed, in total and for each file, and "
+							 "save it to FILE as JSON")
+
+		(self.options, args) = parser.parse_args(self.args_in)
+
+		if self.options.stats is not None:
+			self.stats = cmakescript.cmakestats.enable()
+
+		if self.options.cachedir is not None:
+			self.cache = cmakescript.ParseCache(self.options.cachedir)
+
+		for infile in args:
+			if self.stats is not None:
+				self.stats.begin_file(infile)
 			print self.processFile(infile)
+			if self.stats is not None:
+				self.stats.end_file()
+
+		if self.stats is not None:
+			cmakescript.cmakestats.disable()
+			statsfile = open(self.options.stats, 'w')
+			self.stats.dump(statsfile)
+			statsfile.close()
 
 	def processFile(self, filename):
 		try:
-			parser = cmakescript.parse_file(filename)
+			parser = cmakescript.parse_file(filename, cache=self.cache)
 		except cmakescript.IncompleteStatementError:
 			print "Error parsing file: IncompleteStatementError"
 			return None